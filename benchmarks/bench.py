@@ -0,0 +1,275 @@
+"""Benchmark the crawl, the security matrix and the trees against a mock API.
+
+    python -m benchmarks.bench --size medium --latency 0.02
+    python -m benchmarks.bench --save baseline.json
+    python -m benchmarks.bench --baseline baseline.json
+
+Every benchmark reports its wall time over `--repeat` runs, the API requests
+of one run and its peak Python memory, measured with tracemalloc in an extra
+run. With `--baseline`, a slower, larger or chattier result than the saved
+one fails the command.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+from textual.app import App
+
+from benchmarks.mock_api import env_settings, serve, size_arguments, tenant_size
+from eye.main import RUON, build_tree
+from eye.views.object_tree_widget import ObjectTreeWidget
+
+# Relative increase of the wall time or peak memory reported as a regression
+DEFAULT_TOLERANCE = 0.25
+
+
+@dataclass
+class Result:
+    name: str
+    times: list = field(default_factory=list)
+    requests: int = 0
+    peak: int | None = None
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.times)
+
+
+class MockApi:
+    """Mock server run in a child process, so it does not weigh on the
+    measured time and memory
+    """
+
+    def __init__(self, size, latency=0.0, jitter=0.0):
+        context = multiprocessing.get_context("spawn")
+        receiver, sender = context.Pipe(duplex=False)
+        self.process = context.Process(
+            target=serve, args=(size, latency, jitter, 0, sender), daemon=True
+        )
+        self.process.start()
+        self.url = receiver.recv()
+
+    def requests(self) -> int:
+        with urllib.request.urlopen(f"{self.url}/_stats") as response:
+            counts = json.load(response)["requests"]
+        return sum(count for endpoint, count in counts.items() if endpoint != "token")
+
+    def stop(self):
+        self.process.terminate()
+        self.process.join()
+
+
+def measure(name, run, api, repeat, memory=True) -> Result:
+    result = Result(name)
+    for _ in range(repeat):
+        before = api.requests()
+        start_time = time.perf_counter()
+        run()
+        result.times.append(time.perf_counter() - start_time)
+        result.requests = api.requests() - before
+    if memory:
+        tracemalloc.start()
+        try:
+            run()
+            result.peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+class TreeApp(App):
+    def __init__(self, manager):
+        super().__init__()
+        self.manager = manager
+
+    def compose(self):
+        yield ObjectTreeWidget(self.manager, id="tree-view")
+
+
+def bench_tree_reload(manager, api, repeat, memory) -> Result:
+    async def run():
+        app = TreeApp(manager)
+        async with app.run_test() as pilot:
+            tree = app.query_one(ObjectTreeWidget)
+            # every workspace open, as after browsing the whole tenant
+            tree.expanded.update(key for key in manager.runners)
+            result = measure(
+                "ObjectTreeWidget.reload", tree.reload, api, repeat, memory
+            )
+            await pilot.pause()
+        return result
+
+    return asyncio.run(run())
+
+
+def run_benchmarks(manager, api, args) -> list[Result]:
+    memory = not args.no_memory
+    results = [
+        measure(
+            "update_summary_data",
+            manager.update_summary_data,
+            api,
+            args.repeat,
+            memory,
+        )
+    ]
+    organization_id = manager.organizations[0].id
+    results.append(
+        measure(
+            "get_security_dataframe",
+            lambda: manager.get_security_dataframe(organization_id, refresh=True),
+            api,
+            args.repeat,
+            memory,
+        )
+    )
+    results.append(
+        measure("build_tree", lambda: build_tree(manager), api, args.repeat, memory)
+    )
+    results.append(bench_tree_reload(manager, api, args.repeat, memory))
+    return results
+
+
+def regressions(result, baseline, tolerance) -> list[str]:
+    """What got worse than the baseline result beyond the tolerance"""
+    found = []
+    if result.median > baseline["median"] * (1 + tolerance):
+        found.append(f"time x{result.median / baseline['median']:.2f}")
+    if result.requests > baseline["requests"]:
+        found.append(f"requests {baseline['requests']} -> {result.requests}")
+    peak = baseline.get("peak")
+    if result.peak and peak and result.peak > peak * (1 + tolerance):
+        found.append(f"memory x{result.peak / peak:.2f}")
+    return found
+
+
+def report(results, baseline=None, tolerance=DEFAULT_TOLERANCE) -> bool:
+    """Print the results, returning False if one regressed"""
+    table = Table(title="Benchmarks")
+    table.add_column("Benchmark")
+    table.add_column("Median", justify="right")
+    table.add_column("Min", justify="right")
+    table.add_column("Max", justify="right")
+    table.add_column("Requests", justify="right")
+    table.add_column("Peak memory", justify="right")
+    if baseline is not None:
+        table.add_column("Baseline")
+    ok = True
+    for result in results:
+        row = [
+            result.name,
+            f"{result.median * 1000:.1f} ms",
+            f"{min(result.times) * 1000:.1f} ms",
+            f"{max(result.times) * 1000:.1f} ms",
+            str(result.requests),
+            "" if result.peak is None else f"{result.peak / 2**20:.1f} MiB",
+        ]
+        if baseline is not None:
+            previous = baseline.get(result.name)
+            found = regressions(result, previous, tolerance) if previous else []
+            ok = ok and not found
+            row.append(f"[red]{', '.join(found)}[/]" if found else "[green]ok[/]")
+        table.add_row(*row)
+    Console().print(table)
+    return ok
+
+
+def save_results(path, size, latency, results):
+    data = {
+        "size": asdict(size),
+        "latency": latency,
+        "results": {
+            result.name: {
+                "median": result.median,
+                "times": result.times,
+                "requests": result.requests,
+                "peak": result.peak,
+            }
+            for result in results
+        },
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks against a mock API")
+    size_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs")
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="crawl_concurrency setting"
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=0,
+        help="API calls per second, unlimited by default",
+    )
+    parser.add_argument(
+        "--no-memory", action="store_true", help="skip the tracemalloc run"
+    )
+    parser.add_argument("--save", metavar="FILE", help="save the results as JSON")
+    parser.add_argument(
+        "--baseline", metavar="FILE", help="fail on regressions from saved results"
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--verbose", action="store_true", help="keep the eye logs")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    size = tenant_size(args)
+    api = MockApi(size, args.latency, args.jitter)
+    cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            settings = {
+                **env_settings(api.url),
+                "cache_dir": str(Path(directory) / "cache"),
+                "crawl_concurrency": args.concurrency,
+                "rate_limit": args.rate_limit or 1e9,
+                "rate_burst": max(int(args.rate_limit), 1)
+                if args.rate_limit
+                else 10**9,
+            }
+            with open(Path(directory) / ".env", "w") as f:
+                f.writelines(f'{key}="{value}"\n' for key, value in settings.items())
+            # RUON reads the .env file of the working directory
+            os.chdir(directory)
+            manager = RUON()
+            manager.connect()
+            results = run_benchmarks(manager, api, args)
+            manager.disconnect()
+    finally:
+        os.chdir(cwd)
+        api.stop()
+    print(f"Tenant {asdict(size)}, latency {args.latency}s")
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    ok = report(results, baseline, args.tolerance)
+    if args.save:
+        save_results(args.save, size, args.latency, results)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""Stand-in for the Cosmo Tech API and its Keycloak token endpoint.
+
+Tenants are synthesized on the fly from their sizes, so a tenant with
+millions of runs costs no memory, and every response is delayed by the
+configured latency. Requests are counted per endpoint and exposed on
+`GET /_stats`, `POST /_reset` sets the counters back to zero.
+
+Run `python -m benchmarks.mock_api` to browse a synthetic tenant with the
+app: it prints the settings of a matching `.env` file.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+ROLES = ("admin", "editor", "validator", "user", "viewer")
+STATES = ("Successful", "Successful", "Successful", "Failed", "Running")
+# 2024-01-01, in milliseconds like the platform timestamps
+EPOCH = 1704067200000
+REALM = "bench"
+
+
+@dataclass
+class TenantSize:
+    organizations: int = 5
+    workspaces: int = 5  # per organization
+    solutions: int = 2  # per organization
+    runners: int = 10  # per workspace
+    runs: int = 20  # per runner
+    users: int = 20  # per organization ACL, workspaces get half of them
+
+
+SIZES = {
+    "small": TenantSize(),
+    "medium": TenantSize(20, 10, 3, 20, 50, 200),
+    "large": TenantSize(50, 20, 5, 50, 200, 1000),
+}
+
+
+def info(index):
+    return {"timestamp": EPOCH + index * 60000, "userId": f"user-{index % 7}"}
+
+
+class Tenant:
+    """Deterministic objects of a synthetic tenant, built per request"""
+
+    def __init__(self, size: TenantSize):
+        self.size = size
+
+    def acl(self, users):
+        return [
+            {"id": f"user{index}@bench.local", "role": ROLES[index % len(ROLES)]}
+            for index in range(users)
+        ]
+
+    def security(self, users):
+        return {"default": "none", "accessControlList": self.acl(users)}
+
+    def organization(self, o):
+        return {
+            "id": f"o-{o:010d}",
+            "name": f"Organization {o}",
+            "createInfo": info(o),
+            "updateInfo": info(o),
+            "security": self.security(self.size.users),
+        }
+
+    def workspace(self, o, w):
+        return {
+            "id": f"w-{o:06d}{w:04d}",
+            "organizationId": f"o-{o:010d}",
+            "key": f"workspace{w}",
+            "name": f"Workspace {o}.{w}",
+            "createInfo": info(w),
+            "updateInfo": info(w),
+            "solution": {"solutionId": f"sol-{o:06d}{w % self.size.solutions:04d}"},
+            "security": self.security(self.size.users // 2),
+        }
+
+    def solution(self, o, s):
+        return {
+            "id": f"sol-{o:06d}{s:04d}",
+            "organizationId": f"o-{o:010d}",
+            "key": f"solution{s}",
+            "name": f"Solution {o}.{s}",
+            "repository": f"bench/solution{s}",
+            "version": "1.0.0",
+            "createInfo": info(s),
+            "updateInfo": info(s),
+            "parameters": [],
+            "parameterGroups": [],
+            "runTemplates": [],
+            "security": self.security(1),
+        }
+
+    def runner(self, o, w, r):
+        runner_id = f"r-{o:06d}{w:04d}{r:04d}"
+        return {
+            "id": runner_id,
+            "name": f"Scenario {o}.{w}.{r}",
+            "createInfo": info(r),
+            "updateInfo": info(r),
+            "solutionId": f"sol-{o:06d}{w % self.size.solutions:04d}",
+            "runTemplateId": "standalone",
+            "organizationId": f"o-{o:010d}",
+            "workspaceId": f"w-{o:06d}{w:04d}",
+            "ownerName": f"user{r % max(self.size.users, 1)}@bench.local",
+            "datasets": {"bases": [], "parameter": ""},
+            "parametersValues": [],
+            "lastRunInfo": {
+                "lastRunId": f"run-{runner_id[2:]}{self.size.runs - 1:05d}",
+                "lastRunStatus": STATES[(o + w + r) % len(STATES)],
+            },
+            "validationStatus": "Draft",
+            "security": self.security(1),
+        }
+
+    def run(self, o, w, r, n):
+        return {
+            "id": f"run-{o:06d}{w:04d}{r:04d}{n:05d}",
+            "organizationId": f"o-{o:010d}",
+            "workspaceId": f"w-{o:06d}{w:04d}",
+            "runnerId": f"r-{o:06d}{w:04d}{r:04d}",
+            "createInfo": info(n),
+            "state": STATES[(o + w + r + n) % len(STATES)],
+        }
+
+    def run_status(self, o, w, r, n):
+        state = STATES[(o + w + r + n) % len(STATES)]
+        return {
+            "id": f"run-{o:06d}{w:04d}{r:04d}{n:05d}",
+            "organizationId": f"o-{o:010d}",
+            "workspaceId": f"w-{o:06d}{w:04d}",
+            "runnerId": f"r-{o:06d}{w:04d}{r:04d}",
+            "phase": "Running" if state == "Running" else "Succeeded",
+            "state": state,
+            "progress": "1/2" if state == "Running" else "2/2",
+        }
+
+
+# (endpoint, pattern) of the served paths, ids parsed by the handler
+ROUTES = [
+    ("token", r"/realms/[^/]+/protocol/openid-connect/token"),
+    ("list_organizations", r"/organizations"),
+    ("get_organization_security", r"/organizations/o-(\d+)/security"),
+    ("list_workspaces", r"/organizations/o-(\d+)/workspaces"),
+    ("list_solutions", r"/organizations/o-(\d+)/solutions"),
+    (
+        "get_workspace_security",
+        r"/organizations/o-(\d+)/workspaces/w-\d{6}(\d{4})/security",
+    ),
+    ("list_runners", r"/organizations/o-(\d+)/workspaces/w-\d{6}(\d{4})/runners"),
+    (
+        "list_runs",
+        r"/organizations/o-(\d+)/workspaces/w-\d{6}(\d{4})/runners/r-\d{10}(\d{4})/runs",
+    ),
+    (
+        "get_run_status",
+        (
+            r"/organizations/o-(\d+)/workspaces/w-\d{6}(\d{4})/runners/r-\d{10}(\d{4})"
+            r"/runs/run-\d{14}(\d{5})/status"
+        ),
+    ),
+]
+ROUTES = [(endpoint, re.compile(pattern + "$")) for endpoint, pattern in ROUTES]
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, tenant, latency=0.0, jitter=0.0):
+        super().__init__(address, Handler)
+        self.tenant = tenant
+        self.latency = latency
+        self.jitter = jitter
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, data, status=200):
+        body = json.dumps(data, separators=(",", ":")).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        path = urlparse(self.path).path
+        if path == "/_reset":
+            with self.server.lock:
+                self.server.counts.clear()
+            return self.send_json({})
+        if ROUTES[0][1].match(path):
+            return self.serve("token", ())
+        self.send_json({"error": "not found"}, 404)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/_stats":
+            with self.server.lock:
+                return self.send_json({"requests": dict(self.server.counts)})
+        for endpoint, pattern in ROUTES[1:]:
+            match = pattern.match(url.path)
+            if match:
+                ids = tuple(int(group) for group in match.groups())
+                return self.serve(endpoint, ids, parse_qs(url.query))
+        self.send_json({"error": "not found"}, 404)
+
+    def serve(self, endpoint, ids, query=None):
+        server = self.server
+        with server.lock:
+            server.counts[endpoint] += 1
+        delay = server.latency * (1 + random.uniform(-1, 1) * server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        tenant, size = server.tenant, server.tenant.size
+        if endpoint == "token":
+            return self.send_json(
+                {"access_token": "bench", "expires_in": 3600, "token_type": "Bearer"}
+            )
+        if endpoint == "get_organization_security":
+            return self.send_json(tenant.security(size.users))
+        if endpoint == "get_workspace_security":
+            return self.send_json(tenant.security(size.users // 2))
+        if endpoint == "get_run_status":
+            return self.send_json(tenant.run_status(*ids))
+        counts = {
+            "list_organizations": (size.organizations, tenant.organization),
+            "list_workspaces": (size.workspaces, tenant.workspace),
+            "list_solutions": (size.solutions, tenant.solution),
+            "list_runners": (size.runners, tenant.runner),
+            "list_runs": (size.runs, tenant.run),
+        }
+        total, build = counts[endpoint]
+        start, end = 0, total
+        if "size" in query:
+            page_size = int(query["size"][0])
+            start = int(query.get("page", ["0"])[0]) * page_size
+            end = min(start + page_size, total)
+        self.send_json([build(*ids, index) for index in range(start, end)])
+
+
+def serve(size: TenantSize, latency=0.0, jitter=0.0, port=0, ready=None):
+    """Serve a tenant until interrupted, sending the server url to `ready`"""
+    server = MockServer(("127.0.0.1", port), Tenant(size), latency, jitter)
+    if ready is not None:
+        ready.send(server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def env_settings(url) -> dict:
+    """Settings of the .env file pointing eye at a mock server"""
+    return {
+        "host": url,
+        "server_url": f"{url}/",
+        "realm_name": REALM,
+        "client_secret": "bench",
+    }
+
+
+def size_arguments(parser):
+    parser.add_argument("--size", choices=SIZES, default="small")
+    for field in asdict(TenantSize()):
+        parser.add_argument(
+            f"--{field}", type=int, help=f"override the {field} of the size preset"
+        )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds added to every response"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="random share of the latency, 0-1"
+    )
+
+
+def tenant_size(args) -> TenantSize:
+    sizes = asdict(SIZES[args.size])
+    for field in sizes:
+        if getattr(args, field) is not None:
+            sizes[field] = getattr(args, field)
+    return TenantSize(**sizes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mock Cosmo Tech API")
+    size_arguments(parser)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+    server = MockServer(
+        ("127.0.0.1", args.port), Tenant(tenant_size(args)), args.latency, args.jitter
+    )
+    for key, value in env_settings(server.url).items():
+        print(f'{key}="{value}"')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Measure the cold start of the app against a mock API.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --save startup.json
+    python -m benchmarks.startup --baseline startup.json
+
+Every run starts a fresh interpreter, timing the import of eye.app, the
+first frame and the first tenant being displayed with its data. The modules
+that took the longest to import, as reported by `python -X importtime`, are
+listed below the timings.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.bench import (
+    DEFAULT_TOLERANCE,
+    MockApi,
+    Result,
+    report,
+    save_results,
+)
+from benchmarks.mock_api import env_settings, size_arguments, tenant_size
+
+ROOT = Path(__file__).resolve().parent.parent
+# Seconds given to the app to display its first tenant
+TIMEOUT = 60.0
+
+# Prefix of the line of timings printed among the logs of the app
+MARKER = "startup-timings:"
+# Run in the child interpreter, printing the timings as JSON
+PROBE = """
+import time
+start = time.perf_counter()
+import asyncio, json
+from eye.app import TUI
+imported = time.perf_counter()
+
+async def main():
+    app = TUI()
+    async with app.run_test() as pilot:
+        painted = time.perf_counter()
+        deadline = painted + {timeout}
+        while app.tenant is None or not app.manager.organizations:
+            if time.perf_counter() > deadline:
+                raise TimeoutError("no tenant displayed")
+            await pilot.pause(0.01)
+        ready = time.perf_counter()
+    print("{marker}", json.dumps({{
+        "import eye.app": imported - start,
+        "first frame": painted - start,
+        "tenant displayed": ready - start,
+    }}))
+
+asyncio.run(main())
+"""
+
+
+def child_env():
+    return {**os.environ, "PYTHONPATH": str(ROOT), "PYTHONDONTWRITEBYTECODE": "1"}
+
+
+def probe(directory) -> dict:
+    process = subprocess.run(
+        [sys.executable, "-c", PROBE.format(timeout=TIMEOUT, marker=MARKER)],
+        cwd=directory,
+        env=child_env(),
+        capture_output=True,
+        text=True,
+        timeout=TIMEOUT * 2,
+        check=False,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Startup probe failed:\n{process.stderr[-2000:]}")
+    for line in process.stdout.splitlines():
+        if line.startswith(MARKER):
+            return json.loads(line[len(MARKER) :])
+    raise RuntimeError(f"No timings in the output of the probe:\n{process.stdout}")
+
+
+def import_times(module="eye.app") -> list[tuple[str, float, float]]:
+    """(module, self, cumulative) import times in seconds, from importtime"""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=child_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        times.append((name.rstrip(), int(own) / 1e6, int(cumulative) / 1e6))
+    return times
+
+
+def print_import_times(times, top):
+    table = Table(title=f"Slowest imports of eye.app (total {times[-1][2]:.2f}s)")
+    table.add_column("Module")
+    table.add_column("Self", justify="right")
+    table.add_column("Cumulative", justify="right")
+    for name, own, cumulative in sorted(times, key=lambda t: -t[2])[:top]:
+        table.add_row(name, f"{own * 1000:.1f} ms", f"{cumulative * 1000:.1f} ms")
+    Console().print(table)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Cold start of the app")
+    size_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=3, help="timed starts")
+    parser.add_argument("--top", type=int, default=15, help="imports listed")
+    parser.add_argument("--save", metavar="FILE", help="save the results as JSON")
+    parser.add_argument(
+        "--baseline", metavar="FILE", help="fail on regressions from saved results"
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    size = tenant_size(args)
+    api = MockApi(size, args.latency, args.jitter)
+    results = {}
+    try:
+        for _ in range(args.repeat):
+            # a new cache every time, so each start crawls the tenant
+            with tempfile.TemporaryDirectory() as directory:
+                settings = {
+                    **env_settings(api.url),
+                    "cache_dir": str(Path(directory) / "cache"),
+                }
+                with open(Path(directory) / ".env", "w") as f:
+                    f.writelines(
+                        f'{key}="{value}"\n' for key, value in settings.items()
+                    )
+                before = api.requests()
+                timings = probe(directory)
+            for name, value in timings.items():
+                results.setdefault(name, Result(name)).times.append(value)
+            results["tenant displayed"].requests = api.requests() - before
+    finally:
+        api.stop()
+    print(f"Tenant {asdict(size)}, latency {args.latency}s")
+    results = list(results.values())
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    ok = report(results, baseline, args.tolerance)
+    print_import_times(import_times(), args.top)
+    if args.save:
+        save_results(args.save, size, args.latency, results)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+from functools import partial
+
+
+class ApiProxy:
+    """Wrap a generated cosmotech_api instance so its calls go through hooks.
+
+    A hook is called as `hook(call, endpoint, *args, **kwargs)` and must
+    return `call(*args, **kwargs)` or raise; `endpoint` is the qualified
+    method name, e.g. `OrganizationApi.list_organizations`. Hooks are applied
+    in list order, the first one being the outermost. The list is shared and
+    may be extended after the proxy was built.
+    """
+
+    def __init__(self, api, hooks):
+        self._api = api
+        self._hooks = hooks
+
+    def __getattr__(self, name):
+        attr = getattr(self._api, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        endpoint = f"{type(self._api).__name__}.{name}"
+        call = attr
+        for hook in reversed(self._hooks):
+            call = partial(hook, call, endpoint)
+        return call
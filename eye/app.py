@@ -1,21 +1,72 @@
+import argparse
 import logging
 from pathlib import Path
 
 from textual.app import App
 from textual.reactive import reactive
-
-from eye.main import RUON
-from eye.views.chatbot_screen import ChatBotScreen
-from eye.views.object_screen import ObjectScreen
-from eye.views.user_screen import UserScreen
+from textual.signal import Signal
+from textual.widgets import Header, LoadingIndicator
+
+from eye.crawler import DEFAULT_CONCURRENCY
+from eye.data_service import DataService
+from eye.log import configure_logging
+from eye.monitor import MAX_INTERVAL, MIN_INTERVAL, RunMonitor
+from eye.tenants import DEFAULT_PROFILE, TenantManager, list_profiles
+from eye.views.metrics_screen import MetricsScreen
+from eye.views.tenant_screen import TenantScreen
 from eye.widgets.status import ConnectionStatus
 
-# Create loggers
-
+# The platform SDK, pandas and aiohttp are imported on first use, by the
+# managers and the screens, so the first frame does not wait for them
+configure_logging()
 logger = logging.getLogger("back.front")
 action_logger = logging.getLogger("back.front.actions")
 
 
+# Actions needing a tenant, disabled while the first one loads
+TENANT_ACTIONS = {"users", "objects", "chatbot", "refresh", "tenants", "metrics"}
+
+
+class Tenant:
+    """Manager, services and screens of one profile, kept while switching"""
+
+    def __init__(self, app, manager, lazy=None):
+        config = manager.config
+        if lazy is None:
+            lazy = (config.get("lazy_tree") or "").lower() in ("1", "true")
+        self.manager = manager
+        self.data_service = DataService(app, manager, offline=app.offline, lazy=lazy)
+        self.run_monitor = RunMonitor(
+            app,
+            manager,
+            max_workers=int(config.get("crawl_concurrency", DEFAULT_CONCURRENCY)),
+            min_interval=float(config.get("monitor_min_interval", MIN_INTERVAL)),
+            max_interval=float(config.get("monitor_max_interval", MAX_INTERVAL)),
+        )
+        self.lazy = lazy
+        self.screens = {}
+        self.started = False
+
+    def screen(self, name):
+        """Screen of the tenant, built the first time it is shown"""
+        if name not in self.screens:
+            if name == "user_screen":
+                from eye.views.user_screen import UserScreen
+
+                self.screens[name] = UserScreen(self.manager)
+            else:
+                from eye.views.object_screen import ObjectScreen
+
+                self.screens[name] = ObjectScreen(self.manager, lazy=self.lazy)
+        return self.screens[name]
+
+
+def create_manager(profile):
+    from eye.main import RUON
+
+    return RUON(profile)
+
+
 class TUI(App):
     """Main TUI application class"""
 
@@ -25,58 +76,180 @@ class TUI(App):
         ("u", "users", "Users"),
         ("o", "objects", "Objects"),
         ("b", "chatbot", "ChatBot"),
+        ("r", "refresh", "Refresh"),
+        ("t", "tenants", "Tenants"),
+        ("p", "metrics", "Metrics"),
     ]
 
     CSS_PATH = Path(__file__).parent / "styles.tcss"
     connection_status = reactive(False)  # start offline
     data_refreshed = reactive(False)  # Track refresh state
+    data_version = reactive(0)  # Bumped whenever manager data changes
+    refresh_progress = reactive((0, 0))  # (done, total) listing calls
 
-    def __init__(self) -> None:
+    def __init__(self, offline=False, lazy=None, profile=DEFAULT_PROFILE) -> None:
         logger.info("Initializing TUI application")
         super().__init__()
-        self.manager = RUON()
+        self.offline = offline
+        self.lazy = lazy
+        profiles = list_profiles()
+        if profile not in profiles:
+            profiles.append(profile)
+        self.profile = profile
+        self.tenants = TenantManager(create_manager, profiles)
+        # Tenant of each profile switched to, the displayed one in `tenant`,
+        # None until the first one is loaded
+        self.sessions = {}
+        self.tenant = None
+        self.view = "user_screen"
+        # published with the list of eye.delta.Change of incremental refreshes
+        self.data_changed = Signal(self, "data_changed")
+        # published with (run key, RunStatus) lists by the run monitor
+        self.run_status_changed = Signal(self, "run_status_changed")
         self.status_indicator = ConnectionStatus(id="connection-indicator")
-        self.screens = {
-            "user_screen": UserScreen(self.manager),
-            "object_screen": ObjectScreen(self.manager),
-            "chatbot_screen": ChatBotScreen(self.manager),
-        }
+        # built on first navigation, it imports the chat client
+        self.chatbot_screen = None
+
+    @property
+    def manager(self):
+        return self.tenant.manager
+
+    @property
+    def data_service(self):
+        return self.tenant.data_service
+
+    @property
+    def run_monitor(self):
+        return self.tenant.run_monitor
+
+    def _session(self, profile) -> Tenant:
+        if profile not in self.sessions:
+            self.sessions[profile] = Tenant(self, self.tenants.get(profile), self.lazy)
+        return self.sessions[profile]
+
+    def compose(self):
+        # shown under the screens of the tenants until the first one is ready
+        yield Header(icon="⏿")
+        yield LoadingIndicator()
 
     def on_mount(self) -> None:
         """Handle mount event"""
-        self.manager.connect()
         logger.info("TUI mounted")
-        try:
-            for screen_name, screen in self.screens.items():
-                logger.info(f"Installing screen: {screen_name}")
-                try:
-                    self.install_screen(screen, screen_name)
-                    logger.info(f"Successfully installed screen: {screen_name}")
-                except Exception as e:
-                    logger.error(f"Failed to install screen {screen_name}: {str(e)}")
-                    raise
-            try:
-                logger.info("Switching to user_screen")
-                self.push_screen("user_screen")
-            except Exception as e:
-                logger.error(f"Failed to switch screen: {str(e)}")
-                raise
-        except Exception as e:
-            logger.error(e)
+        self.title = f"{self.__class__.__name__} - {self.profile}"
+        self.run_worker(self._start, name="start", group="start", thread=True)
+
+    def _start(self):
+        """Build the first manager once the first frame is displayed, its
+        data service connecting it in the background
+        """
+        self.tenants.get(self.profile)
+        self.call_from_thread(self.activate, self.profile, True)
+
+    def check_action(self, action, parameters):
+        return self.tenant is not None or action not in TENANT_ACTIONS
+
+    def activate(self, profile, push=False):
+        """Display the tenant of a profile, created and started on first use.
+
+        Tenants switched back to are shown from the collections they hold in
+        memory, including the results of a refresh that completed while
+        hidden. Only the run monitor of the displayed tenant polls.
+        """
+        tenant = self._session(profile)
+        self.tenant = tenant
+        if self.chatbot_screen is not None:
+            self.chatbot_screen.manager = tenant.manager
+        self.connection_status = tenant.data_service.connected
+        self.data_refreshed = tenant.data_service.refreshed
+        self.refresh_progress = (0, 0)
+        self.title = f"{self.__class__.__name__} - {profile}"
+        if push:
+            self.push_screen(self.install_view(self.view))
+        elif self.view != "chatbot_screen":
+            self.switch_screen(self.install_view(self.view))
+        if tenant.started:
+            # the screens of the tenant ignored updates while hidden
+            self.data_version += 1
+        else:
+            tenant.started = True
+            tenant.data_service.start()
+        if not self.offline:
+            # the monitor worker group is exclusive, cancelling the previous one
+            tenant.run_monitor.start()
+
+    def install_view(self, view) -> str:
+        """Name of a screen of the displayed tenant, installed on first use"""
+        name = f"{view}:{self.manager.profile}"
+        if not self.is_screen_installed(name):
+            logger.info(f"Installing screen: {name}")
+            self.install_screen(self.tenant.screen(view), name)
+        return name
+
+    async def on_unmount(self) -> None:
+        for manager in self.tenants.managers.values():
+            manager.disconnect()
+        if self.chatbot_screen is not None:
+            await self.chatbot_screen.chat_api.close()
 
     def action_users(self):
-        self.switch_screen("user_screen")
+        self.view = "user_screen"
+        self.switch_screen(self.install_view(self.view))
 
     def action_objects(self):
-        self.switch_screen("object_screen")
+        self.view = "object_screen"
+        self.switch_screen(self.install_view(self.view))
 
     def action_chatbot(self):
+        if self.chatbot_screen is None:
+            from eye.views.chatbot_screen import ChatBotScreen
+
+            self.chatbot_screen = ChatBotScreen(self.manager)
+            self.install_screen(self.chatbot_screen, "chatbot_screen")
+        # keeps `view` so switching tenant returns to the chat
         self.switch_screen("chatbot_screen")
 
+    def action_tenants(self):
+        def switch(profile):
+            if profile and profile != self.manager.profile:
+                self.activate(profile)
+
+        self.push_screen(
+            TenantScreen(
+                self.tenants.profiles, self.manager.profile, set(self.sessions)
+            ),
+            switch,
+        )
+
+    def action_metrics(self):
+        if not isinstance(self.screen, MetricsScreen):
+            self.push_screen(MetricsScreen(self.manager))
+
+    def action_refresh(self):
+        self.data_service.refresh()
+
     def action_help(self) -> None:
         print("Need some help!")
 
 
 if __name__ == "__main__":
-    app = TUI()
+    parser = argparse.ArgumentParser(description="Cosmo Tech platform TUI")
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="browse the cached snapshot without connecting to the platform",
+    )
+    parser.add_argument(
+        "--lazy",
+        action="store_true",
+        default=None,
+        help="only list organizations upfront and load children on expand",
+    )
+    parser.add_argument(
+        "--profile",
+        default=DEFAULT_PROFILE,
+        metavar="NAME",
+        help="start on the tenant of the .env.NAME file, switch with t",
+    )
+    args = parser.parse_args()
+    app = TUI(offline=args.offline, lazy=args.lazy, profile=args.profile)
     app.run()
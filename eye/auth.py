@@ -0,0 +1,122 @@
+import json
+import logging
+import threading
+import time
+
+from cosmotech_api.exceptions import UnauthorizedException
+from keycloak import KeycloakOpenID
+from keycloak.exceptions import KeycloakError
+
+logger = logging.getLogger("back.auth")
+
+# Seconds before expiry at which the access token is refreshed
+REFRESH_MARGIN = 60.0
+# Seconds before retrying a failed background refresh
+RETRY_DELAY = 10.0
+
+
+class TokenManager:
+    """Keep the access token of an API configuration valid.
+
+    The token is refreshed in a background timer shortly before it expires,
+    using the refresh token when Keycloak issued one and the client
+    credentials grant otherwise. API calls only wait for a refresh when the
+    token already expired, e.g. after the machine slept, or once after a 401.
+    Token requests are timed by `metrics`, an eye.metrics.Metrics, if given.
+    """
+
+    def __init__(self, configuration, config, margin=REFRESH_MARGIN, metrics=None):
+        self.configuration = configuration
+        self.margin = margin
+        self.metrics = metrics
+        self.keycloak_openid = KeycloakOpenID(
+            server_url=config["server_url"],
+            client_id=config.get("client_id"),
+            realm_name=config["realm_name"],
+            client_secret_key=config["client_secret"],
+        )
+        self.expiry = 0.0
+        self._refresh_token = None
+        self._refresh_expiry = 0.0
+        self._lock = threading.Lock()
+        self._timer = None
+        self._stopped = False
+
+    @property
+    def access_token(self):
+        return self.configuration.access_token
+
+    def _keycloak(self, name, *args, **kwargs):
+        if self.metrics is None:
+            return getattr(self.keycloak_openid, name)(*args, **kwargs)
+        with self.metrics.timed(f"Keycloak.{name}") as call:
+            token = getattr(self.keycloak_openid, name)(*args, **kwargs)
+            # python-keycloak only returns the decoded answer
+            call.size = len(json.dumps(token))
+            return token
+
+    def _request_token(self):
+        if self._refresh_token and time.time() < self._refresh_expiry - self.margin:
+            try:
+                return self._keycloak("refresh_token", self._refresh_token)
+            except KeycloakError as e:
+                logger.warning(f"Refresh token rejected, requesting a new one: {e}")
+        return self._keycloak("token", grant_type="client_credentials")
+
+    def refresh(self, stale_token=None):
+        """Fetch a new access token.
+
+        When `stale_token` is given, nothing is done if another thread
+        already replaced it, so concurrent 401s only trigger one refresh.
+        """
+        with self._lock:
+            if stale_token is not None and self.access_token != stale_token:
+                return
+            try:
+                token = self._request_token()
+            except KeycloakError as e:
+                raise RuntimeError(f"Failed to refresh token: {e}")
+            now = time.time()
+            self.configuration.access_token = token["access_token"]
+            self.expiry = now + token["expires_in"]
+            self._refresh_token = token.get("refresh_token")
+            self._refresh_expiry = now + token.get("refresh_expires_in", 0)
+            logger.debug(f"Token refreshed, expires in {token['expires_in']}s")
+        self._schedule(max(self.expiry - self.margin - now, 0))
+
+    def ensure_valid(self):
+        if time.time() >= self.expiry:
+            self.refresh(stale_token=self.access_token)
+
+    def _schedule(self, delay):
+        if self._stopped:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        # the timer thread has to schedule a retry whatever failed
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Background token refresh failed: {e}")
+            self._schedule(RETRY_DELAY)
+
+    def stop(self):
+        self._stopped = True
+        if self._timer is not None:
+            self._timer.cancel()
+
+    def hook(self, call, endpoint, *args, **kwargs):
+        """ApiProxy hook retrying a call once with a new token after a 401"""
+        self.ensure_valid()
+        token = self.access_token
+        try:
+            return call(*args, **kwargs)
+        except UnauthorizedException:
+            logger.warning(f"{endpoint} unauthorized, refreshing token")
+            self.refresh(stale_token=token)
+            return call(*args, **kwargs)
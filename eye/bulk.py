@@ -0,0 +1,341 @@
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from cosmotech_api.models.organization_create_request import (
+    OrganizationCreateRequest,
+)
+from cosmotech_api.models.organization_update_request import (
+    OrganizationUpdateRequest,
+)
+from cosmotech_api.models.runner_create_request import RunnerCreateRequest
+from cosmotech_api.models.runner_update_request import RunnerUpdateRequest
+from cosmotech_api.models.workspace_create_request import WorkspaceCreateRequest
+from cosmotech_api.models.workspace_update_request import WorkspaceUpdateRequest
+
+from eye.crawler import DEFAULT_CONCURRENCY
+from eye.metrics import error_name
+
+logger = logging.getLogger("back.bulk")
+
+CREATE = "create"
+UPDATE = "update"
+DELETE = "delete"
+UNCHANGED = "unchanged"
+
+PLANNED = "planned"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+# Manifest keys of the children of each kind
+CHILDREN = {"organizations": "workspaces", "workspaces": "runners", "runners": None}
+# Manifest keys that are not fields of the create and update requests
+STRUCTURE = {"id", "state", "workspaces", "runners"}
+REQUESTS = {
+    "organizations": (OrganizationCreateRequest, OrganizationUpdateRequest),
+    "workspaces": (WorkspaceCreateRequest, WorkspaceUpdateRequest),
+    "runners": (RunnerCreateRequest, RunnerUpdateRequest),
+}
+# Fields identifying an object of the manifest among its siblings, after `id`
+IDENTITY = {
+    "organizations": ("name",),
+    "workspaces": ("key", "name"),
+    "runners": ("name",),
+}
+
+
+class ManifestError(ValueError):
+    """Raised for a manifest that cannot be planned"""
+
+
+def load_manifest(path) -> dict:
+    """Read a JSON or YAML manifest, YAML requiring PyYAML"""
+    path = Path(path)
+    with open(path, encoding="utf-8") as f:
+        if path.suffix in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError("YAML manifests require PyYAML: pip install pyyaml")
+            manifest = yaml.safe_load(f)
+        else:
+            manifest = json.load(f)
+    if not isinstance(manifest, dict):
+        raise ManifestError(f"{path} does not hold a mapping of organizations")
+    return manifest
+
+
+@dataclass(eq=False)
+class Operation:
+    """Creation, update or deletion of one object of the manifest.
+
+    Objects left as they are get an UNCHANGED operation too, so their
+    children can find their ids. `depends` holds the operations that must
+    succeed first: the creation of the parent, or the deletion of the
+    children.
+    """
+
+    action: str
+    kind: str
+    label: str
+    fields: dict = field(default_factory=dict)
+    # id of the existing object, or of the created one once done
+    object_id: str | None = None
+    parent: "Operation | None" = None
+    # ids of the ancestors when there is no parent operation
+    parent_key: tuple = ()
+    depends: list = field(default_factory=list)
+    status: str = PLANNED
+    error: str | None = None
+    duration: float | None = None
+
+    @property
+    def key(self) -> tuple:
+        parent = self.parent.key if self.parent else self.parent_key
+        return (*parent, self.object_id)
+
+    @property
+    def depth(self) -> int:
+        return len(self.key) - 1
+
+    @property
+    def path(self) -> str:
+        parent = self.parent.path if self.parent else "/".join(self.parent_key)
+        name = self.object_id or self.label
+        return f"{parent}/{name}" if parent else name
+
+    def to_dict(self) -> dict:
+        return {
+            "action": self.action,
+            "kind": self.kind,
+            "path": self.path,
+            "id": self.object_id,
+            "status": self.status,
+            "error": self.error,
+            "duration": self.duration,
+        }
+
+
+def find(kind, item, objects):
+    """Existing object matching a manifest item, by id or identity fields"""
+    if item.get("id"):
+        return next((obj for obj in objects if obj.id == item["id"]), None)
+    for name in IDENTITY[kind]:
+        if item.get(name) is None:
+            continue
+        matches = [obj for obj in objects if getattr(obj, name) == item[name]]
+        if len(matches) > 1:
+            raise ManifestError(
+                f"{len(matches)} {kind} have the {name} {item[name]!r}, give its id"
+            )
+        return matches[0] if matches else None
+    raise ManifestError(f"{kind} item without id nor {' or '.join(IDENTITY[kind])}")
+
+
+def error_message(error) -> str:
+    """One line describing a failed call, the reason of HTTP errors included"""
+    reason = getattr(error, "reason", None)
+    if reason:
+        return f"{error_name(error)} {reason}"
+    lines = str(error).strip().splitlines()
+    return lines[0] if lines else repr(error)
+
+
+def covers(current, value) -> bool:
+    """Whether `current` holds `value`, dictionaries possibly having more keys"""
+    if isinstance(value, dict) and isinstance(current, dict):
+        return all(covers(current.get(k), v) for k, v in value.items())
+    return current == value
+
+
+def changed_fields(kind, fields, obj) -> dict:
+    """Fields of the manifest that the update request can change and that
+    differ from the existing object
+    """
+    _, update_request = REQUESTS[kind]
+    request = update_request.from_dict(fields).to_dict()
+    current = obj.to_dict()
+    return {
+        name: value
+        for name, value in request.items()
+        if not covers(current.get(name), value)
+    }
+
+
+class BulkPlan:
+    """Operations applying a manifest to the platform, in dependency order.
+
+    A manifest lists organizations, each with its `workspaces` and these
+    with their `runners`. Items are matched with the existing objects by
+    `id`, or by name (and key for workspaces); their other keys are the
+    fields of the create and update requests of the API, in its camelCase.
+    Items with `state: absent` are deleted, with the children listed under
+    them. Children of existing objects not listed in the manifest are left
+    untouched.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.operations: list[Operation] = []
+
+    @classmethod
+    def from_manifest(cls, manager, manifest) -> "BulkPlan":
+        plan = cls(manager)
+        for item in manifest.get("organizations") or []:
+            plan._plan("organizations", item, None, manager.organizations)
+        return plan
+
+    @classmethod
+    def deletions(cls, manager, targets) -> "BulkPlan":
+        """Plan the deletion of existing objects given as (kind, key)"""
+        plan = cls(manager)
+        operations = {
+            key: Operation(
+                DELETE, kind, key[-1], object_id=key[-1], parent_key=key[:-1]
+            )
+            for kind, key in targets
+        }
+        for key, operation in operations.items():
+            # children are deleted before their selected ancestors
+            for depth in range(1, len(key)):
+                ancestor = operations.get(key[:depth])
+                if ancestor is not None:
+                    ancestor.depends.append(operation)
+        plan.operations = list(operations.values())
+        return plan
+
+    def _children(self, kind, key):
+        manager = self.manager
+        if kind == "workspaces":
+            return manager.workspaces.get(key[0], [])
+        return manager.runners.get(key, [])
+
+    def _plan(self, kind, item, parent, existing, absent=False):
+        fields = {k: v for k, v in item.items() if k not in STRUCTURE}
+        state = "absent" if absent else item.get("state", "present")
+        if state not in ("present", "absent"):
+            raise ManifestError(f"Unknown state {state!r}, present or absent")
+        obj = find(kind, item, existing)
+        label = item.get("id") or item.get("name") or item.get("key")
+        operation = Operation(UNCHANGED, kind, label, parent=parent)
+        if obj is not None:
+            operation.object_id = obj.id
+        if parent is not None and parent.action == CREATE:
+            operation.depends.append(parent)
+        if state == "absent":
+            operation.action = DELETE if obj is not None else UNCHANGED
+        elif obj is None:
+            if "id" in item:
+                raise ManifestError(
+                    f"No {kind[:-1]} {item['id']}, ids are given on creation"
+                )
+            create_request, _ = REQUESTS[kind]
+            # fail at planning time rather than half way through
+            create_request.from_dict(fields)
+            operation.action = CREATE
+            operation.fields = fields
+        else:
+            operation.fields = changed_fields(kind, fields, obj)
+            operation.action = UPDATE if operation.fields else UNCHANGED
+        if operation.action in (CREATE, UPDATE, DELETE):
+            self.operations.append(operation)
+
+        child_kind = CHILDREN[kind]
+        children = (item.get(child_kind) or []) if child_kind else []
+        if children:
+            existing = [] if obj is None else self._children(child_kind, operation.key)
+            deleted = state == "absent"
+            for child in children:
+                child_operation = self._plan(
+                    child_kind, child, operation, existing, absent=deleted
+                )
+                if operation.action == DELETE and child_operation.action == DELETE:
+                    operation.depends.append(child_operation)
+        return operation
+
+    @property
+    def phases(self) -> list[list[Operation]]:
+        """Deletions deepest first, then creations and updates shallowest first"""
+        order = {}
+        for operation in self.operations:
+            if operation.action == DELETE:
+                rank = (0, -operation.depth)
+            else:
+                rank = (1, operation.depth)
+            order.setdefault(rank, []).append(operation)
+        return [order[rank] for rank in sorted(order)]
+
+    def counts(self) -> dict:
+        counts = {}
+        for operation in self.operations:
+            counts[operation.action] = counts.get(operation.action, 0) + 1
+        return counts
+
+    def _run(self, operation):
+        for dependency in operation.depends:
+            if dependency.status != DONE:
+                operation.status = SKIPPED
+                operation.error = f"{dependency.action} of {dependency.path} failed"
+                return operation
+        manager = self.manager
+        create_request, update_request = REQUESTS[operation.kind]
+        parent = operation.key[:-1]
+        start_time = time.perf_counter()
+        try:
+            if operation.action == CREATE:
+                request = create_request.from_dict(operation.fields)
+                created = getattr(manager, f"create_{operation.kind[:-1]}")(
+                    *parent, request
+                )
+                operation.object_id = created.id
+            elif operation.action == UPDATE:
+                request = update_request.from_dict(operation.fields)
+                getattr(manager, f"update_{operation.kind[:-1]}")(
+                    *operation.key, request
+                )
+            else:
+                getattr(manager, f"delete_{operation.kind[:-1]}")(*operation.key)
+        # recorded on the operation, a failure does not stop the others
+        except Exception as e:  # noqa: BLE001
+            operation.status = FAILED
+            operation.error = error_message(e)
+        else:
+            operation.status = DONE
+        operation.duration = time.perf_counter() - start_time
+        return operation
+
+    def execute(self, max_workers=DEFAULT_CONCURRENCY, on_result=None):
+        """Run the operations, concurrently within each phase.
+
+        Operations whose dependency failed are skipped. `on_result` is
+        called with each operation once it is over.
+        """
+        start_time = time.time()
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="bulk"
+        ) as executor:
+            for phase in self.phases:
+                for operation in executor.map(self._run, phase):
+                    if on_result:
+                        on_result(operation)
+        counts = {}
+        for operation in self.operations:
+            counts[operation.status] = counts.get(operation.status, 0) + 1
+        logger.info(
+            f"[green]✓[/] {len(self.operations)} operations in "
+            f"{time.time() - start_time:.2f}s: "
+            + ", ".join(f"{count} {status}" for status, count in counts.items())
+        )
+        return self.operations
+
+    def touched(self) -> set:
+        """Keys of the listings changed by the operations that succeeded"""
+        return {
+            operation.key[:-1]
+            for operation in self.operations
+            if operation.status == DONE
+        }
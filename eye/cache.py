@@ -0,0 +1,116 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from cosmotech_api.models.organization import Organization
+from cosmotech_api.models.runner import Runner
+from cosmotech_api.models.solution import Solution
+from cosmotech_api.models.workspace import Workspace
+
+logger = logging.getLogger("back.cache")
+
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "eye"
+DEFAULT_TTL = 300.0
+FORMAT_VERSION = 1
+
+
+def dump(model) -> dict:
+    """Serialize a generated model, including the read-only fields to_dict drops"""
+    return model.model_dump(mode="json", by_alias=True, exclude_none=True)
+
+
+@dataclass
+class Snapshot:
+    """Platform collections as saved on disk, shaped like the RUON attributes"""
+
+    saved_at: float
+    organizations: list = field(default_factory=list)
+    workspaces: dict = field(default_factory=dict)
+    solutions: dict = field(default_factory=dict)
+    runners: dict = field(default_factory=dict)
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.saved_at
+
+
+class SnapshotCache:
+    """Gzipped JSON snapshot of the object tree, one file per host and realm"""
+
+    def __init__(self, host, realm, directory=None, ttl=DEFAULT_TTL):
+        self.host = host
+        self.realm = realm
+        self.ttl = ttl
+        key = hashlib.sha1(f"{host}|{realm}".encode()).hexdigest()[:16]
+        self.path = Path(directory or CACHE_DIR).expanduser() / f"{key}.json.gz"
+
+    def is_fresh(self, snapshot: Snapshot | None) -> bool:
+        return snapshot is not None and snapshot.age < self.ttl
+
+    def save(self, organizations, workspaces, solutions, runners):
+        data = {
+            "version": FORMAT_VERSION,
+            "host": self.host,
+            "realm": self.realm,
+            "saved_at": time.time(),
+            "organizations": [dump(o) for o in organizations],
+            "workspaces": {
+                org_id: [dump(w) for w in items] for org_id, items in workspaces.items()
+            },
+            "solutions": {
+                org_id: [dump(s) for s in items] for org_id, items in solutions.items()
+            },
+            "runners": [
+                [org_id, workspace_id, [dump(r) for r in items]]
+                for (org_id, workspace_id), items in runners.items()
+            ],
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        logger.info(f"[green]✓[/] Saved snapshot to {self.path}")
+
+    def load(self) -> Snapshot | None:
+        if not self.path.exists():
+            return None
+        start_time = time.time()
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != FORMAT_VERSION:
+                logger.warning(f"Ignoring snapshot with old format {self.path}")
+                return None
+            snapshot = Snapshot(
+                saved_at=data["saved_at"],
+                organizations=[
+                    Organization.from_dict(o) for o in data["organizations"]
+                ],
+                workspaces={
+                    org_id: [Workspace.from_dict(w) for w in items]
+                    for org_id, items in data["workspaces"].items()
+                },
+                solutions={
+                    org_id: [Solution.from_dict(s) for s in items]
+                    for org_id, items in data["solutions"].items()
+                },
+                runners={
+                    (org_id, workspace_id): [Runner.from_dict(r) for r in items]
+                    for org_id, workspace_id, items in data["runners"]
+                },
+            )
+        # unreadable, truncated, or written by another version of the models
+        except (OSError, EOFError, ValueError, LookupError, TypeError) as e:
+            logger.warning(f"Unable to read snapshot {self.path}: {e}")
+            return None
+        logger.info(
+            f"[green]✓[/] Loaded snapshot from {snapshot.age:.0f}s ago "
+            f"in {time.time() - start_time:.2f}s"
+        )
+        return snapshot
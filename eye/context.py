@@ -0,0 +1,159 @@
+import json
+import logging
+import math
+import os
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Rough size of a token for English text and code
+CHARS_PER_TOKEN = 4
+# Tokens of the role and separators around each message
+MESSAGE_OVERHEAD = 4
+DEFAULT_BUDGET = 8000
+# Share of the budget left to the recent turns after a compaction, so the
+# next ones fit without summarizing again at every message
+KEEP_RATIO = 0.5
+SUMMARY_TOKENS = 500
+FORMAT_VERSION = 1
+
+SUMMARY_PROMPT = (
+    "Summarize the conversation below for your own later use. Keep the facts, "
+    "identifiers, names, decisions and open questions, drop the small talk. "
+    f"Answer with the summary only, in less than {SUMMARY_TOKENS} tokens."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN) + MESSAGE_OVERHEAD
+
+
+def transcript(messages: list[dict[str, str]]) -> str:
+    return "\n\n".join(
+        f"{msg['role']}: {msg['content']}" for msg in messages if msg["content"]
+    )
+
+
+class ChatContext:
+    """Conversation kept whole, sent to the model under a token budget.
+
+    `history` holds every message for display and persistence. Requests only
+    carry a summary of the older turns followed by the turns since
+    `summarized`. Once those exceed `budget` tokens, `compaction` tells
+    which turns to fold into the summary so the recent ones fill at most
+    `KEEP_RATIO` of the budget; tokens are estimated from the text length.
+    """
+
+    def __init__(self, budget=DEFAULT_BUDGET):
+        self.budget = budget
+        self.history: list[dict[str, str]] = []
+        self.summary: str | None = None
+        # number of messages of `history` covered by the summary
+        self.summarized = 0
+        self._tokens: list[int] = []
+
+    def append(self, role: str, content: str | None, **fields):
+        """Add a message, `fields` being e.g. the `tool_calls` of an answer"""
+        self.history.append({"role": role, "content": content, **fields})
+        text = content or ""
+        if fields:
+            text += json.dumps(fields)
+        self._tokens.append(estimate_tokens(text))
+
+    def clear(self):
+        self.history.clear()
+        self._tokens.clear()
+        self.summary = None
+        self.summarized = 0
+
+    @property
+    def tokens(self) -> int:
+        """Estimated size of the messages sent with the next request"""
+        summary = estimate_tokens(self.summary) if self.summary else 0
+        return summary + sum(self._tokens[self.summarized :])
+
+    def messages(self) -> list[dict[str, str]]:
+        messages = self.history[self.summarized :]
+        if self.summary:
+            summary = f"Summary of the earlier conversation:\n{self.summary}"
+            messages = [{"role": "system", "content": summary}, *messages]
+        return messages
+
+    def compaction(self) -> int | None:
+        """Index up to which messages should be summarized, None if they fit.
+
+        The kept turns start on a user message and always include the last
+        one, even if it does not fit on its own.
+        """
+        if self.tokens <= self.budget:
+            return None
+        keep = self.budget * KEEP_RATIO
+        start = len(self.history) - 1
+        size = self._tokens[start]
+        for index in range(len(self.history) - 2, self.summarized - 1, -1):
+            size += self._tokens[index]
+            if size > keep:
+                break
+            if self.history[index]["role"] == "user":
+                start = index
+        while start > self.summarized and self.history[start]["role"] != "user":
+            start -= 1
+        return start if start > self.summarized else None
+
+    def summary_request(self, upto: int) -> list[dict[str, str]]:
+        """Messages asking the model to fold the turns before `upto` into the
+        current summary
+        """
+        text = transcript(self.history[self.summarized : upto])
+        if self.summary:
+            text = f"Summary so far:\n{self.summary}\n\nFollowed by:\n{text}"
+        return [
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": text},
+        ]
+
+    def compact(self, upto: int, summary: str | None):
+        """Replace the turns before `upto` by `summary`.
+
+        Without a summary, e.g. when the model failed to produce one, the
+        turns are only dropped from the window.
+        """
+        if summary:
+            self.summary = summary
+        self.summarized = upto
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": FORMAT_VERSION,
+            "summary": self.summary,
+            "summarized": self.summarized,
+            "history": self.history,
+        }
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load(self, path) -> bool:
+        """Restore a saved conversation, returning whether there was one"""
+        path = Path(path)
+        if not path.exists():
+            return False
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != FORMAT_VERSION:
+                logger.warning(f"Ignoring conversation with old format {path}")
+                return False
+            self.clear()
+            for msg in data["history"]:
+                self.append(**msg)
+            self.summary = data.get("summary")
+            self.summarized = min(data.get("summarized", 0), len(self.history))
+        except (OSError, ValueError, LookupError, TypeError, AttributeError) as e:
+            logger.warning(f"Unable to load conversation {path}: {e}")
+            self.clear()
+            return False
+        return True
@@ -0,0 +1,210 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from eye.paging import DEFAULT_PAGE_SIZE, iter_pages, paginate
+
+logger = logging.getLogger("back.crawler")
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 30.0
+
+
+@dataclass
+class CrawlError:
+    """A listing call that failed during a crawl"""
+
+    kind: str
+    key: tuple
+    error: str
+
+
+@dataclass
+class CrawlResult:
+    """Collections gathered by a crawl, shaped like the RUON attributes"""
+
+    organizations: list = field(default_factory=list)
+    workspaces: dict = field(default_factory=dict)
+    solutions: dict = field(default_factory=dict)
+    runners: dict = field(default_factory=dict)
+    errors: list[CrawlError] = field(default_factory=list)
+    requests: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def complete(self) -> bool:
+        return not self.errors
+
+
+class Crawler:
+    """Walk organizations -> workspaces/solutions -> runners concurrently.
+
+    Organizations are listed page by page, and every per-organization and
+    per-workspace listing call is submitted to a bounded thread pool as soon
+    as its parent is known. Listings are paged with `page_size` objects per
+    request. A failing call is recorded in `CrawlResult.errors` and does not
+    stop the rest of the crawl.
+    """
+
+    def __init__(
+        self,
+        manager,
+        max_workers=DEFAULT_CONCURRENCY,
+        timeout=DEFAULT_TIMEOUT,
+        page_size=DEFAULT_PAGE_SIZE,
+    ):
+        self.manager = manager
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.page_size = page_size
+
+    def _list(self, list_call, *args):
+        return list(
+            paginate(
+                list_call, *args, size=self.page_size, _request_timeout=self.timeout
+            )
+        )
+
+    def _list_workspaces(self, organization_id):
+        return self._list(
+            self.manager.workspace_api_instance.list_workspaces, organization_id
+        )
+
+    def _list_solutions(self, organization_id):
+        return self._list(
+            self.manager.solution_api_instance.list_solutions, organization_id
+        )
+
+    def _list_runners(self, organization_id, workspace_id):
+        return self._list(
+            self.manager.runner_api_instance.list_runners,
+            organization_id,
+            workspace_id,
+        )
+
+    def _organization_pages(self):
+        # the SDK is kept off the startup of the app
+        from eye.scheduler import API_ERRORS
+
+        try:
+            yield from iter_pages(
+                self.manager.organization_api_instance.list_organizations,
+                size=self.page_size,
+                _request_timeout=self.timeout,
+            )
+        except API_ERRORS as e:
+            logger.error(f"error {e}")
+            raise RuntimeError(f"Error getting organizations {e}")
+
+    def list_organizations(self):
+        return [
+            organization for page in self._organization_pages() for organization in page
+        ]
+
+    def _submit(self, executor, kind, key):
+        listing = {
+            "workspaces": self._list_workspaces,
+            "solutions": self._list_solutions,
+            "runners": self._list_runners,
+        }[kind]
+        return executor.submit(listing, *key)
+
+    def fetch(self, requests, on_result=None) -> CrawlResult:
+        """Run the given `(kind, key)` listing calls concurrently.
+
+        Unlike `crawl`, nothing is discovered: only the requested listings
+        are fetched, e.g. `("runners", (organization_id, workspace_id))`.
+        """
+        start_time = time.time()
+        result = CrawlResult()
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="crawl"
+        ) as executor:
+            pending = {
+                self._submit(executor, kind, key): (kind, key) for kind, key in requests
+            }
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, key = pending.pop(future)
+                    self._collect(result, kind, key, future, on_result)
+        result.elapsed = time.time() - start_time
+        return result
+
+    def _collect(self, result, kind, key, future, on_result, keep=True):
+        """Store the outcome of a listing call, returning its value or None"""
+        result.requests += 1
+        try:
+            value = future.result()
+        # whatever failed, one listing is recorded as an error, not the crawl
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"[red]{kind} {'/'.join(key)} failed:[/] {e}")
+            result.errors.append(CrawlError(kind, key, str(e)))
+            return None
+        if keep and kind == "runners":
+            result.runners[key] = value
+        elif keep:
+            getattr(result, kind)[key[0]] = value
+        if on_result:
+            on_result(kind, key, value)
+        return value
+
+    def crawl(self, on_progress=None, on_result=None, keep=True) -> CrawlResult:
+        """Crawl the platform and return the gathered collections.
+
+        `on_progress(done, total)` is called from the crawling thread after
+        each completed call; `total` grows as workspaces are discovered.
+        `on_result(kind, key, value)` is called with every listing as soon as
+        it arrives, so callers can expose partial data while crawling; the
+        organization list is reported again after each of its pages. With
+        `keep=False` the listings below organizations are only passed to
+        `on_result`, e.g. to stream them to disk without holding the tenant.
+        """
+        start_time = time.time()
+        result = CrawlResult()
+        pending = {}
+        progress = [0, 0]
+
+        def drain(timeout):
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, key = pending.pop(future)
+                progress[0] += 1
+                value = self._collect(result, kind, key, future, on_result, keep)
+                if kind == "workspaces" and value is not None:
+                    for workspace in value:
+                        runner_key = (key[0], workspace.id)
+                        future = self._submit(executor, "runners", runner_key)
+                        pending[future] = ("runners", runner_key)
+                        progress[1] += 1
+                if on_progress:
+                    on_progress(*progress)
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="crawl"
+        ) as executor:
+            # children of the first organizations are fetched while the next
+            # pages are listed
+            for page in self._organization_pages():
+                result.requests += 1
+                result.organizations.extend(page)
+                if on_result:
+                    on_result("organizations", (), result.organizations)
+                for organization in page:
+                    for kind in ("workspaces", "solutions"):
+                        key = (organization.id,)
+                        pending[self._submit(executor, kind, key)] = (kind, key)
+                        progress[1] += 1
+                if pending:
+                    drain(0)
+            while pending:
+                drain(None)
+
+        result.elapsed = time.time() - start_time
+        logger.info(
+            f"[green]✓[/] Crawled {len(result.organizations)} organizations with "
+            f"{result.requests} requests in {result.elapsed:.2f}s "
+            f"({len(result.errors)} failed)"
+        )
+        return result
@@ -0,0 +1,188 @@
+import logging
+import time
+
+from textual.worker import Worker, WorkerState
+
+logger = logging.getLogger("back.front.data")
+
+# Minimum delay between two UI notifications while a crawl streams in
+NOTIFY_INTERVAL = 0.5
+
+
+class DataService:
+    """Refresh the manager data in a Textual worker thread.
+
+    A single refresh runs at a time and its results are shared by every
+    screen through the app reactives: `data_version` is bumped whenever the
+    manager collections change (throttled while the crawl is streaming),
+    `refresh_progress` tracks `(done, total)` calls and `data_refreshed`
+    turns True once a full crawl completed, or a snapshot that needs no
+    refresh was loaded.
+
+    Once data is loaded, refreshes are incremental: only the listings that
+    may have changed are fetched again and the resulting changes are
+    published on the app `data_changed` signal instead of bumping
+    `data_version`.
+
+    With several profiles, each tenant has its own service. A refresh goes
+    on when its tenant is hidden, but only the service of the displayed
+    tenant updates the app reactives; the others keep their state in
+    `connected` and `refreshed`. Hidden tenants are not refreshed again
+    until displayed and refreshed.
+    """
+
+    def __init__(self, app, manager, offline=False, lazy=False):
+        self.app = app
+        self.manager = manager
+        self.offline = offline
+        # only list organizations, children are fetched as nodes get expanded
+        self.lazy = lazy
+        self.worker: Worker | None = None
+        self._last_notify = 0.0
+        # keys of the tree nodes whose children are displayed
+        self.expanded = set()
+        self.connected = False
+        self.refreshed = False
+
+    @property
+    def active(self) -> bool:
+        return self.app.manager is self.manager
+
+    @property
+    def running(self) -> bool:
+        return self.worker is not None and self.worker.state in (
+            WorkerState.PENDING,
+            WorkerState.RUNNING,
+        )
+
+    def start(self):
+        """Render the cached snapshot, then revalidate it if it is stale"""
+        self.app.run_worker(
+            self._warm_start, name="warm-start", group="cache", thread=True
+        )
+
+    def _warm_start(self):
+        snapshot = self.manager.load_snapshot()
+        if snapshot is not None:
+            self.app.call_from_thread(self._bump)
+        if not self.offline and self.manager.auth is None:
+            # tenants switched to are connected once their snapshot is shown
+            try:
+                self.manager.connect()
+            # Keycloak, network or configuration, reported like a failed refresh
+            except Exception as e:  # noqa: BLE001
+                self.app.call_from_thread(self._failed, e)
+                return
+        if self.offline:
+            if snapshot is None:
+                self.app.call_from_thread(
+                    self.app.notify, "No cached snapshot available", severity="error"
+                )
+            else:
+                self.app.call_from_thread(self._set_refreshed, True)
+        elif self.manager.cache.is_fresh(snapshot):
+            self.app.call_from_thread(self._set_refreshed, True)
+        else:
+            self.app.call_from_thread(self.refresh)
+
+    def refresh(self, expanded=()) -> Worker | None:
+        """Start a background refresh unless one is already running.
+
+        `expanded` adds keys whose children must be refetched to the ones of
+        the expanded nodes, e.g. the parents of objects just deleted.
+        """
+        if self.offline:
+            self.app.notify("Offline mode, showing the cached snapshot")
+            return None
+        if self.running:
+            return self.worker
+        self._set_refreshed(False)
+        expanded = frozenset(self.expanded) | frozenset(expanded)
+        self.worker = self.app.run_worker(
+            lambda: self._refresh(expanded),
+            name="refresh",
+            group=f"data:{self.manager.profile}",
+            thread=True,
+            exclusive=True,
+        )
+        return self.worker
+
+    def _refresh(self, expanded):
+        start_time = time.time()
+        try:
+            if self.manager.organizations:
+                changes = self.manager.refresh_changes(expanded, lazy=self.lazy)
+                self.app.call_from_thread(self._changed, changes)
+            elif self.lazy:
+                self.manager.update_organizations()
+                self.manager.save_snapshot()
+                self.app.call_from_thread(self._completed, None)
+            else:
+                result = self.manager.update_summary_data(
+                    on_progress=self._on_progress, on_result=self._on_result
+                )
+                self.app.call_from_thread(self._completed, result)
+        # API, auth or cache, any failure is reported instead of ending the worker
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Refresh failed: {e}")
+            self.app.call_from_thread(self._failed, e)
+            return
+        logger.info(f"Refresh done in {time.time() - start_time:.2f}s")
+
+    def _throttled(self) -> bool:
+        now = time.monotonic()
+        if now - self._last_notify < NOTIFY_INTERVAL:
+            return True
+        self._last_notify = now
+        return False
+
+    def _on_progress(self, done, total):
+        self.app.call_from_thread(self._set_progress, (done, total))
+
+    def _set_progress(self, progress):
+        if self.active:
+            self.app.refresh_progress = progress
+
+    def _set_connected(self, connected):
+        self.connected = connected
+        if self.active:
+            self.app.connection_status = connected
+
+    def _set_refreshed(self, refreshed):
+        self.refreshed = refreshed
+        if self.active:
+            self.app.data_refreshed = refreshed
+
+    def _on_result(self, kind, key, value):
+        if not self._throttled():
+            self.app.call_from_thread(self._bump)
+
+    def _bump(self):
+        if self.active:
+            self.app.data_version += 1
+
+    def _report_errors(self):
+        if self.manager.crawl_errors and self.active:
+            self.app.notify(
+                f"{len(self.manager.crawl_errors)} listing calls failed during refresh",
+                severity="warning",
+            )
+
+    def _completed(self, result):
+        self._set_connected(True)
+        self._bump()
+        self._set_refreshed(True)
+        self._report_errors()
+
+    def _changed(self, changes):
+        self._set_connected(True)
+        if changes and self.active:
+            self.app.data_changed.publish(changes)
+        self._set_refreshed(True)
+        self._report_errors()
+
+    def _failed(self, error):
+        self._set_connected(False)
+        self.app.notify(
+            f"Refresh of {self.manager.profile} failed: {error}", severity="error"
+        )
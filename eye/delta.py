@@ -0,0 +1,146 @@
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+
+from eye.cache import dump
+
+logger = logging.getLogger("back.delta")
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+
+@dataclass
+class Change:
+    """An object added, removed or changed between two refreshes.
+
+    `parent` is the key of the collection holding the object: `()` for
+    organizations, `(organization_id,)` for workspaces and solutions and
+    `(organization_id, workspace_id)` for runners.
+    """
+
+    action: str
+    kind: str
+    parent: tuple
+    obj: object
+
+    @property
+    def key(self) -> tuple:
+        return (*self.parent, self.obj.id)
+
+
+def content_hash(obj) -> str:
+    data = json.dumps(dump(obj), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+def diff(kind, parent, old_items, new_items) -> list[Change]:
+    """Compare two listings by id, then by content hash"""
+    old = {item.id: item for item in old_items or []}
+    new = {item.id: item for item in new_items or []}
+    changes = [Change(REMOVED, kind, parent, old[i]) for i in old.keys() - new.keys()]
+    for item_id, item in new.items():
+        if item_id not in old:
+            changes.append(Change(ADDED, kind, parent, item))
+        elif content_hash(item) != content_hash(old[item_id]):
+            changes.append(Change(CHANGED, kind, parent, item))
+    return changes
+
+
+class DeltaRefresher:
+    """Refresh the manager collections, refetching only what may have changed.
+
+    The organization list is always fetched. Workspaces and solutions are
+    only listed again for organizations that were added or changed, are
+    expanded in the UI or have never been listed; runners likewise for
+    workspaces. Every other collection is kept from the previous refresh.
+    In lazy mode, collections that were never listed are left to be fetched
+    on demand.
+    """
+
+    def __init__(self, manager, crawler):
+        self.manager = manager
+        self.crawler = crawler
+        self.errors = []
+
+    def _fetch(self, requests):
+        result = self.crawler.fetch(requests)
+        self.errors.extend(result.errors)
+        return result
+
+    def refresh(self, expanded=(), lazy=False) -> list[Change]:
+        """Return the changes applied to the manager collections.
+
+        `expanded` holds the `(organization_id,)` and
+        `(organization_id, workspace_id)` keys whose children are displayed
+        and must be refetched even if their parent did not change.
+        """
+        start_time = time.time()
+        manager = self.manager
+        expanded = set(expanded)
+        self.errors = []
+
+        organizations = self.crawler.list_organizations()
+        requests_count = 1
+        changes = diff("organizations", (), manager.organizations, organizations)
+        dirty = {c.key for c in changes if c.action != REMOVED}
+        removed = {c.obj.id for c in changes if c.action == REMOVED}
+
+        def stale(key, listed):
+            if key in expanded:
+                return True
+            return key in dirty if listed else not lazy
+
+        organization_requests = [
+            (kind, (organization.id,))
+            for organization in organizations
+            if stale((organization.id,), organization.id in manager.workspaces)
+            for kind in ("workspaces", "solutions")
+        ]
+        result = self._fetch(organization_requests)
+        requests_count += result.requests
+        workspaces = {
+            org_id: items
+            for org_id, items in manager.workspaces.items()
+            if org_id not in removed
+        }
+        solutions = {
+            org_id: items
+            for org_id, items in manager.solutions.items()
+            if org_id not in removed
+        }
+        for org_id, items in result.workspaces.items():
+            changes += diff("workspaces", (org_id,), workspaces.get(org_id), items)
+            workspaces[org_id] = items
+        for org_id, items in result.solutions.items():
+            changes += diff("solutions", (org_id,), solutions.get(org_id), items)
+            solutions[org_id] = items
+
+        dirty = {c.key for c in changes if c.kind == "workspaces"}
+        runner_requests = [
+            ("runners", (org_id, workspace.id))
+            for org_id, items in workspaces.items()
+            for workspace in items
+            if stale((org_id, workspace.id), (org_id, workspace.id) in manager.runners)
+        ]
+        result = self._fetch(runner_requests)
+        requests_count += result.requests
+        live = {(org_id, w.id) for org_id, items in workspaces.items() for w in items}
+        runners = {key: items for key, items in manager.runners.items() if key in live}
+        for key, items in result.runners.items():
+            changes += diff("runners", key, runners.get(key), items)
+            runners[key] = items
+
+        manager.organizations = organizations
+        manager.workspaces = workspaces
+        manager.solutions = solutions
+        manager.runners = runners
+        manager.crawl_errors = self.errors
+        logger.info(
+            f"[green]✓[/] Delta refresh: {len(changes)} changes with "
+            f"{requests_count} requests in {time.time() - start_time:.2f}s"
+        )
+        return changes
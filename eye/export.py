@@ -0,0 +1,292 @@
+import csv
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from eye.crawler import CrawlError
+
+logger = logging.getLogger("back.export")
+
+FORMATS = ("csv", "jsonl", "parquet")
+# Rows buffered before a write, also the size of the Parquet row groups
+BATCH_SIZE = 1000
+
+COLUMNS = {
+    "organizations": ["id", "name", "owner", "created_at"],
+    "workspaces": [
+        "organization_id",
+        "id",
+        "key",
+        "name",
+        "solution_id",
+        "owner",
+        "created_at",
+    ],
+    "solutions": [
+        "organization_id",
+        "id",
+        "key",
+        "name",
+        "repository",
+        "version",
+        "owner",
+        "created_at",
+    ],
+    "runners": [
+        "organization_id",
+        "workspace_id",
+        "id",
+        "name",
+        "solution_id",
+        "run_template_id",
+        "owner",
+        "last_run_id",
+        "last_run_status",
+        "created_at",
+    ],
+    # one line per (object, user), workspace_id is empty for organization ACLs
+    "acl": ["organization_id", "workspace_id", "user", "role"],
+}
+
+
+def inventory_row(kind, key, obj) -> dict:
+    """Flatten a listed object into the columns of its entity"""
+    info = obj.create_info
+    row = {
+        "id": obj.id,
+        "name": obj.name,
+        "owner": getattr(obj, "owner_name", None) or (info.user_id if info else None),
+        "created_at": info.timestamp if info else None,
+    }
+    if kind != "organizations":
+        row["organization_id"] = key[0]
+    if kind == "workspaces":
+        row["key"] = obj.key
+        row["solution_id"] = obj.solution.solution_id if obj.solution else None
+    elif kind == "solutions":
+        row.update(key=obj.key, repository=obj.repository, version=obj.version)
+    elif kind == "runners":
+        last_run = obj.last_run_info
+        row.update(
+            workspace_id=key[1],
+            solution_id=obj.solution_id,
+            run_template_id=obj.run_template_id,
+            last_run_id=last_run.last_run_id if last_run else None,
+            last_run_status=last_run.last_run_status if last_run else None,
+        )
+    return row
+
+
+class CsvWriter:
+    def __init__(self, path, columns):
+        # written as listings arrive, closed by close()
+        self.file = open(path, "w", newline="", encoding="utf-8")  # noqa: SIM115
+        self.writer = csv.DictWriter(self.file, fieldnames=columns)
+        self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class JsonlWriter:
+    def __init__(self, path, columns):
+        # written as listings arrive, closed by close()
+        self.file = open(path, "w", encoding="utf-8")  # noqa: SIM115
+        self.columns = columns
+
+    def write(self, rows):
+        for row in rows:
+            line = {column: row.get(column) for column in self.columns}
+            self.file.write(json.dumps(line, separators=(",", ":")) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """Write each batch as a row group, every column being a string"""
+
+    def __init__(self, path, columns):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow: pip install pyarrow")
+        self.pa = pa
+        self.columns = columns
+        self.schema = pa.schema([(column, pa.string()) for column in columns])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        data = {
+            column: [
+                None if row.get(column) is None else str(row[column]) for row in rows
+            ]
+            for column in self.columns
+        }
+        self.writer.write_table(self.pa.table(data, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {"csv": CsvWriter, "jsonl": JsonlWriter, "parquet": ParquetWriter}
+
+
+class Exporter:
+    """Stream the tenant inventory and ACLs to one file per entity.
+
+    Rows are buffered by `BATCH_SIZE` and written as listings arrive. Files
+    are written under a temporary name and renamed on `close`, so a reader
+    never sees a partial export.
+    """
+
+    def __init__(self, directory, fmt="csv", entities=tuple(COLUMNS)):
+        if fmt not in WRITERS:
+            raise RuntimeError(f"Unknown export format {fmt}, use one of {FORMATS}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.paths = {entity: self.directory / f"{entity}.{fmt}" for entity in entities}
+        self.writers = {
+            entity: WRITERS[fmt](path.with_suffix(".part"), COLUMNS[entity])
+            for entity, path in self.paths.items()
+        }
+        self.buffers = {entity: [] for entity in entities}
+        self.counts = dict.fromkeys(entities, 0)
+        self._lock = threading.Lock()
+
+    def write(self, entity, rows):
+        with self._lock:
+            buffer = self.buffers[entity]
+            buffer.extend(rows)
+            self.counts[entity] += len(rows)
+            if len(buffer) >= BATCH_SIZE:
+                self.writers[entity].write(buffer)
+                buffer.clear()
+
+    def close(self, commit=True):
+        """Flush and close every file, renaming them in place if `commit`"""
+        with self._lock:
+            for entity, writer in self.writers.items():
+                if self.buffers[entity] and commit:
+                    writer.write(self.buffers[entity])
+                writer.close()
+                part = self.paths[entity].with_suffix(".part")
+                if commit:
+                    os.replace(part, self.paths[entity])
+                else:
+                    part.unlink(missing_ok=True)
+
+
+def acl_rows(organization_id, workspace_id, security) -> list[dict]:
+    """Long format rows of a security Series indexed by user"""
+    return [
+        {
+            "organization_id": organization_id,
+            "workspace_id": workspace_id,
+            "user": user,
+            "role": role,
+        }
+        for user, role in security.items()
+    ]
+
+
+class InventoryExport:
+    """Feed an `Exporter` from crawl results, fetching ACLs alongside.
+
+    `add` has the signature of the crawl `on_result` callback. The ACL of
+    every organization and workspace is fetched concurrently as soon as the
+    object is listed, with the calls `get_security_dataframe` is built from.
+    """
+
+    def __init__(self, manager, exporter, acl=True, max_workers=None):
+        self.manager = manager
+        self.exporter = exporter
+        self.organization_count = 0
+        self.errors = []
+        # ACL fetches, whose writer failures are raised by `wait`
+        self.futures = []
+        self.executor = (
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="acl")
+            if acl
+            else None
+        )
+
+    def _fetch_acl(self, organization_id, workspace_id=None):
+        key = (
+            (organization_id,)
+            if workspace_id is None
+            else (organization_id, workspace_id)
+        )
+        try:
+            if workspace_id is None:
+                security = self.manager.get_organization_security(organization_id)
+            else:
+                security = self.manager.get_workspace_security(*key)
+        # every failure of the security getters is wrapped in a RuntimeError
+        except RuntimeError as e:
+            logger.error(f"[red]ACL of {key[-1]} failed:[/] {e}")
+            self.errors.append(CrawlError("acl", key, str(e)))
+            return
+        self.exporter.write("acl", acl_rows(organization_id, workspace_id, security))
+
+    def add(self, kind, key, value):
+        if kind == "organizations":
+            # the organization list grows page by page
+            value = value[self.organization_count :]
+            self.organization_count += len(value)
+        self.exporter.write(kind, [inventory_row(kind, key, obj) for obj in value])
+        if self.executor is None:
+            return
+        if kind == "organizations":
+            for organization in value:
+                self.futures.append(
+                    self.executor.submit(self._fetch_acl, organization.id)
+                )
+        elif kind == "workspaces":
+            for workspace in value:
+                self.futures.append(
+                    self.executor.submit(self._fetch_acl, key[0], workspace.id)
+                )
+
+    def wait(self):
+        """Wait for the ACLs, raising the first error of the exporter"""
+        if self.executor is None:
+            return
+        self.executor.shutdown(wait=True)
+        for future in self.futures:
+            future.result()
+
+
+def export_snapshot(manager, exporter):
+    """Export the collections currently held by the manager, without ACLs"""
+    export = InventoryExport(manager, exporter, acl=False)
+    export.add("organizations", (), manager.organizations)
+    for kind in ("workspaces", "solutions"):
+        for organization_id, items in getattr(manager, kind).items():
+            export.add(kind, (organization_id,), items)
+    for key, items in manager.runners.items():
+        export.add("runners", key, items)
+
+
+def export_tenant(manager, exporter, acl=True):
+    """Crawl the platform straight to the exporter, returning the errors"""
+    start_time = time.time()
+    crawler = manager.crawler()
+    export = InventoryExport(
+        manager, exporter, acl=acl, max_workers=crawler.max_workers
+    )
+    try:
+        result = crawler.crawl(on_result=export.add, keep=False)
+    finally:
+        export.wait()
+    counts = ", ".join(f"{n} {entity}" for entity, n in exporter.counts.items())
+    logger.info(f"[green]✓[/] Exported {counts} in {time.time() - start_time:.2f}s")
+    return result.errors + export.errors
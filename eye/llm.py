@@ -1,61 +1,275 @@
+import asyncio
+import json
 import logging
 import os
-from typing import Dict, List
+from collections.abc import AsyncIterator
+from contextlib import aclosing
 
 import aiohttp
 
+from eye.context import DEFAULT_BUDGET, SUMMARY_TOKENS, ChatContext
+
 logger = logging.getLogger(__name__)
 
+# Completions asking for tools before the model has to answer
+MAX_TOOL_ROUNDS = 4
+# Result recorded for the tool calls left unanswered by an interrupted chat
+TOOL_INTERRUPTED = "Interrupted before the tool returned"
+# Connections kept alive to the completion endpoint
+CONNECTION_LIMIT = 4
+KEEPALIVE_TIMEOUT = 60
+REQUEST_TIMEOUT = 120
+
+
+class ChatError(Exception):
+    """Raised for a completion request that failed"""
+
+
+def format_message(role: str, content: str) -> str:
+    return f"**{role}**:\n{content}\n"
+
+
+async def iter_deltas(stream) -> AsyncIterator[dict]:
+    """Yield the choice deltas of a server-sent events completion stream"""
+    async for line in stream:
+        line = line.decode("utf-8").strip()
+        # skip the blank lines between events and the ": comment" keep-alives
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:") :].strip()
+        if data == "[DONE]":
+            return
+        chunk = json.loads(data)
+        if "error" in chunk:
+            error = chunk["error"]
+            message = error.get("message", error) if isinstance(error, dict) else error
+            raise ChatError(f"API request failed: {message}")
+        for choice in chunk.get("choices", []):
+            yield choice.get("delta") or {}
+
+
+def merge_tool_call(calls: dict, delta: dict):
+    """Accumulate a streamed tool call fragment into `calls`, by index"""
+    call = calls.setdefault(
+        delta.get("index", 0),
+        {"id": None, "type": "function", "function": {"name": "", "arguments": ""}},
+    )
+    if delta.get("id"):
+        call["id"] = delta["id"]
+    function = delta.get("function") or {}
+    call["function"]["name"] += function.get("name") or ""
+    call["function"]["arguments"] += function.get("arguments") or ""
+
 
 class ChatAPI:
-    def __init__(self, api_key: str):
+    """Chat completions client keeping the conversation in a `ChatContext`.
+
+    Requests carry the context window rather than the whole history, older
+    turns being summarized by the model when it outgrows `budget` tokens.
+    With a `history_path` the conversation is restored from that file and
+    saved back after every answer. With `tools`, e.g. eye.tools.PlatformTools,
+    the model may call them before answering.
+    """
+
+    def __init__(
+        self, api_key: str, budget=DEFAULT_BUDGET, history_path=None, tools=None
+    ):
         self.api_url = "https://openrouter.ai/api/v1/chat/completions"
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json",
         }
-        self.chat_history: List[Dict[str, str]] = []
+        self.context = ChatContext(budget)
+        self.history_path = history_path
+        self.tools = tools
+        if history_path is not None:
+            self.context.load(history_path)
+        self._session: aiohttp.ClientSession | None = None
+
+    @property
+    def chat_history(self) -> list[dict[str, str]]:
+        return self.context.history
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """Return the long-lived session, reusing its kept-alive connections"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(
+                    limit=CONNECTION_LIMIT, keepalive_timeout=KEEPALIVE_TIMEOUT
+                ),
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def complete(self, messages, **options) -> str:
+        """Answer of the model to `messages`, without touching the history"""
+        payload = {"messages": messages, **options}
+        try:
+            async with self.get_session().post(self.api_url, json=payload) as response:
+                result = await response.json()
+                return result["choices"][0]["message"]["content"]
+        except (TimeoutError, aiohttp.ClientError, LookupError, ValueError) as e:
+            raise ChatError(f"API request failed: {e}") from e
+
+    async def compact(self):
+        """Summarize the turns falling out of the token budget, if any"""
+        upto = self.context.compaction()
+        if upto is None:
+            return
+        logger.info(
+            f"Summarizing {upto - self.context.summarized} messages, "
+            f"context of ~{self.context.tokens} tokens"
+        )
+        try:
+            summary = await self.complete(
+                self.context.summary_request(upto), max_tokens=SUMMARY_TOKENS
+            )
+        except ChatError as e:
+            logger.warning(f"Dropping older messages, summary failed: {e}")
+            summary = None
+        self.context.compact(upto, summary)
+
+    def save(self):
+        if self.history_path is None:
+            return
+        try:
+            self.context.save(self.history_path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Unable to save conversation: {e}")
+
+    def clear(self):
+        self.context.clear()
+        self.save()
+
+    def request_messages(self) -> list[dict[str, str]]:
+        messages = self.context.messages()
+        if self.tools is not None:
+            system = {"role": "system", "content": self.tools.system_prompt()}
+            messages = [system, *messages]
+        return messages
 
     async def send_message(self, message_content: str) -> str:
-        # Add user message to history
-        logger.info(f"Sending message {message_content}")
-        self.chat_history.append({"role": "user", "content": message_content})
+        return "".join([delta async for delta in self.stream_message(message_content)])
 
-        payload = {"messages": self.chat_history}
+    async def stream_message(self, message_content: str) -> AsyncIterator[str]:
+        """Send a message and yield the answer as it is generated.
+
+        The completion is requested with `stream: true` and read as
+        server-sent events. Tool calls of the model are run and their
+        results sent back until it answers, for at most `MAX_TOOL_ROUNDS`.
+        The answer is added to the history once complete, or as far as it
+        went if the stream is interrupted.
+        """
+        logger.info(f"Streaming message {message_content}")
+        self.context.append("user", message_content)
+        await self.compact()
+        try:
+            for tool_round in range(MAX_TOOL_ROUNDS + 1):
+                # tools are left out of the last round to get an answer
+                tools = self.tools is not None and tool_round < MAX_TOOL_ROUNDS
+                calls = {}
+                async with aclosing(self._stream(tools, calls)) as deltas:
+                    async for delta in deltas:
+                        yield delta
+                if not calls:
+                    break
+                # the answer holding the calls, recorded by _stream
+                answer = self.context.history[-1]
+                answered = set()
+                try:
+                    for call in calls.values():
+                        name = call["function"]["name"]
+                        arguments = call["function"]["arguments"]
+                        logger.info(f"Tool call {name}({arguments})")
+                        result = await asyncio.to_thread(
+                            self.tools.call, name, arguments
+                        )
+                        self.context.append("tool", result, tool_call_id=call["id"])
+                        answered.add(call["id"])
+                finally:
+                    # the API rejects a history with calls left without result,
+                    # e.g. when the chat worker is cancelled while a tool runs,
+                    # unless the conversation was cleared meanwhile
+                    cleared = all(msg is not answer for msg in self.context.history)
+                    for call in calls.values():
+                        if call["id"] not in answered and not cleared:
+                            self.context.append(
+                                "tool", TOOL_INTERRUPTED, tool_call_id=call["id"]
+                            )
+        finally:
+            self.save()
 
+    async def _stream(self, tools, calls) -> AsyncIterator[str]:
+        """Stream one completion into the history, collecting its tool calls"""
+        payload = {"messages": self.request_messages(), "stream": True}
+        if tools:
+            payload["tools"] = self.tools.definitions
+        # only the wait between two chunks is bounded, not the whole answer
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=REQUEST_TIMEOUT)
+        parts = []
+        complete = False
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.api_url, headers=self.headers, json=payload
-                ) as response:
-                    result = await response.json()
-                    assistant_message = result["choices"][0]["message"]["content"]
-
-                    # Add assistant response to history
-                    self.chat_history.append(
-                        {"role": "assistant", "content": assistant_message}
+            async with self.get_session().post(
+                self.api_url, json=payload, timeout=timeout
+            ) as response:
+                if response.status >= 400:
+                    text = await response.text()
+                    raise ChatError(
+                        f"API request failed: HTTP {response.status}: {text}"
                     )
-                    return assistant_message
-        except Exception as e:
-            raise Exception(f"API request failed: {str(e)}")
+                async for delta in iter_deltas(response.content):
+                    if delta.get("content"):
+                        parts.append(delta["content"])
+                        yield delta["content"]
+                    for call in delta.get("tool_calls") or []:
+                        merge_tool_call(calls, call)
+            complete = True
+        except (TimeoutError, aiohttp.ClientError, ValueError) as e:
+            raise ChatError(f"API request failed: {e}") from e
+        finally:
+            # every recorded tool call must be followed by its result
+            if not complete:
+                calls.clear()
+            fields = {"tool_calls": list(calls.values())} if calls else {}
+            if parts or calls:
+                self.context.append("assistant", "".join(parts) or None, **fields)
 
-    def get_chat_history(self) -> List[Dict[str, str]]:
+    def get_chat_history(self) -> list[dict[str, str]]:
         return self.chat_history
 
+    def displayed_messages(self) -> list[dict[str, str]]:
+        """User and assistant messages with text, without the tool calls"""
+        return [
+            msg
+            for msg in self.chat_history
+            if msg["role"] in ("user", "assistant") and msg["content"]
+        ]
+
     def get_chat_history_markup(self) -> str:
         """Convert chat history to markdown formatted text."""
         markup = []
-        for msg in self.chat_history:
-            role = msg["role"]
-            content = msg["content"]
-            markup.append(f"**{role}**:\n{content}\n")
+        for msg in self.displayed_messages():
+            markup.append(format_message(msg["role"], msg["content"]))
         return "\n".join(markup)
 
 
+async def ask(chat: ChatAPI, prompt: str) -> str:
+    try:
+        return await chat.send_message(prompt)
+    finally:
+        await chat.close()
+
+
 def main():
     chat = ChatAPI(os.getenv("OPEN_ROUTER_KEY"))
-    response = chat.send_prompt(
-        "What is the answer to life the universe and everything?"
+    response = asyncio.run(
+        ask(chat, "What is the answer to life the universe and everything?")
     )
     print("Response:", response)
     print("\nChat history:", chat.get_chat_history())
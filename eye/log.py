@@ -0,0 +1,13 @@
+import logging
+
+from rich.logging import RichHandler
+
+
+def configure_logging():
+    """Send the logs to a Rich handler, the first call only has an effect"""
+    logging.basicConfig(
+        level=logging.DEBUG,
+        format="%(message)s",
+        datefmt="[%X]",
+        handlers=[RichHandler(rich_tracebacks=True, markup=True)],
+    )
@@ -1,55 +1,109 @@
+import argparse
 import logging
+import sys
 import time
+from pathlib import Path
 
-import pandas as pd
-from cosmotech_api import ApiClient, Configuration
+from cosmotech_api import Configuration
 from cosmotech_api.api.organization_api import OrganizationApi
 from cosmotech_api.api.run_api import RunApi
 from cosmotech_api.api.runner_api import RunnerApi
 from cosmotech_api.api.solution_api import SolutionApi
 from cosmotech_api.api.workspace_api import WorkspaceApi
-from dotenv import dotenv_values
-from keycloak import KeycloakOpenID
 from rich.console import Console
-from rich.logging import RichHandler
+from rich.live import Live
+from rich.table import Table
+from rich.text import Text
 from rich.tree import Tree
 
+from eye.api_proxy import ApiProxy
+from eye.auth import TokenManager
+from eye.bulk import DELETE, DONE, FAILED, BulkPlan, load_manifest
+from eye.cache import DEFAULT_TTL, SnapshotCache
+from eye.crawler import DEFAULT_CONCURRENCY, DEFAULT_TIMEOUT, Crawler
+from eye.delta import DeltaRefresher
+from eye.export import FORMATS, Exporter, export_snapshot, export_tenant
+from eye.log import configure_logging
+from eye.metrics import Metrics, export_metrics
+from eye.paging import DEFAULT_PAGE_SIZE, iter_pages, paginate
+from eye.runs import DEFAULT_CAPACITY, DEFAULT_RUN_LIMIT, RunStore
+from eye.scheduler import get_scheduler
+from eye.search import SearchIndex
+from eye.security import DEFAULT_TTL as SECURITY_TTL
+from eye.security import SecurityMatrixService
+from eye.store import ObjectStore
+from eye.tenants import DEFAULT_PROFILE, TenantManager, list_profiles, load_config
+from eye.transport import build_api_client
+from eye.watch import DEFAULT_INTERVAL, DEFAULT_RESYNC, watch
+
 # feature flag
 refactored = False
 
-# Configure Rich logger
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(message)s",
-    datefmt="[%X]",
-    handlers=[RichHandler(rich_tracebacks=True, markup=True)],
-)
+configure_logging()
 logger = logging.getLogger("back")
 
 
 class RUON:
-    def __init__(self):
-        logger.info("[bold blue]Initializing RUON[/]")
+    def __init__(self, profile=DEFAULT_PROFILE):
+        logger.info(f"[bold blue]Initializing RUON[/] ({profile})")
         start_time = time.time()
 
         try:
-            self.config = dotenv_values(".env")
+            self.profile = profile
+            self.config = load_config(profile)
+            self.config.setdefault("client_id", "cosmotech-api-client")
             self.configuration = Configuration(self.config["host"])
+            self.security = SecurityMatrixService(
+                self,
+                max_workers=int(
+                    self.config.get("crawl_concurrency", DEFAULT_CONCURRENCY)
+                ),
+                ttl=float(self.config.get("security_ttl", SECURITY_TTL)),
+            )
+            self.page_size = int(self.config.get("page_size", DEFAULT_PAGE_SIZE))
+            # concurrent writes of the bulk operations of eye.bulk
+            self.bulk_concurrency = int(
+                self.config.get(
+                    "bulk_concurrency",
+                    self.config.get("crawl_concurrency", DEFAULT_CONCURRENCY),
+                )
+            )
+            self.cache = SnapshotCache(
+                self.config["host"],
+                self.config.get("realm_name"),
+                directory=self.config.get("cache_dir"),
+                ttl=float(self.config.get("cache_ttl", DEFAULT_TTL)),
+            )
 
-            # Initialize empty collections
-            self.workspaces = {}
-            self.organizations = {}
-            self.solutions = {}
-            self.runners = {}
-            self.run = {}
-
-            # Create API client and instances
-            api_client = ApiClient(self.configuration)
-            self.organization_api_instance = OrganizationApi(api_client)
-            self.solution_api_instance = SolutionApi(api_client)
-            self.workspace_api_instance = WorkspaceApi(api_client)
-            self.runner_api_instance = RunnerApi(api_client)
-            self.run_api_instance = RunApi(api_client)
+            # Listed objects, exposed through the collection properties below
+            self.store = ObjectStore()
+            self.search = SearchIndex(self.store)
+            self.runs = RunStore(
+                self,
+                limit=int(self.config.get("run_limit", DEFAULT_RUN_LIMIT)),
+                capacity=int(self.config.get("run_cache_size", DEFAULT_CAPACITY)),
+            )
+            self.crawl_errors = []
+
+            # Create API client and instances, every call goes through api_hooks
+            self.auth = None
+            self.scheduler = get_scheduler(self.config["host"], self.config)
+            # innermost, so each attempt is timed apart from the rate limit
+            self.metrics = Metrics(profile)
+            self.api_hooks = [self.scheduler.hook, self.metrics.hook]
+            api_client = build_api_client(self.configuration, self.config)
+            self.metrics.instrument(api_client)
+            self.organization_api_instance = ApiProxy(
+                OrganizationApi(api_client), self.api_hooks
+            )
+            self.solution_api_instance = ApiProxy(
+                SolutionApi(api_client), self.api_hooks
+            )
+            self.workspace_api_instance = ApiProxy(
+                WorkspaceApi(api_client), self.api_hooks
+            )
+            self.runner_api_instance = ApiProxy(RunnerApi(api_client), self.api_hooks)
+            self.run_api_instance = ApiProxy(RunApi(api_client), self.api_hooks)
 
             elapsed = time.time() - start_time
             logger.info(f"[green]✓[/] RUON initialized in {elapsed:.2f}s")
@@ -58,6 +112,38 @@ class RUON:
             logger.error(f"[red]Failed to initialize RUON:[/] {str(e)}")
             raise
 
+    @property
+    def organizations(self):
+        return self.store.organizations
+
+    @organizations.setter
+    def organizations(self, organizations):
+        self.store.set_listing("organizations", (), organizations)
+
+    @property
+    def workspaces(self):
+        return self.store.workspaces
+
+    @workspaces.setter
+    def workspaces(self, workspaces):
+        self.store.replace("workspaces", workspaces)
+
+    @property
+    def solutions(self):
+        return self.store.solutions
+
+    @solutions.setter
+    def solutions(self, solutions):
+        self.store.replace("solutions", solutions)
+
+    @property
+    def runners(self):
+        return self.store.runners
+
+    @runners.setter
+    def runners(self, runners):
+        self.store.replace("runners", runners)
+
     def connect(self):
         logger.info("[yellow]Attempting connection...[/]")
         try:
@@ -67,28 +153,71 @@ class RUON:
             logger.error(f"[red]Connection failed:[/] {str(e)}")
             raise
 
+    @property
+    def token_expiry(self):
+        return self.auth.expiry if self.auth else 0.0
+
     def refresh_token(self):
-        try:
-            token = self.keycloak_openid.token(grant_type="client_credentials")
-            self.configuration.access_token = token["access_token"]
-            self.token_expiry = time.time() + token["expires_in"]
-        except Exception as e:
-            raise RuntimeError(f"Failed to refresh token: {e}")
+        self.auth.refresh()
 
     def load_token(self):
-        self.config = dotenv_values(".env")  # refresh
-        self.config.setdefault("client_id", "cosmotech-api-client")
-        self.keycloak_openid = KeycloakOpenID(
-            server_url=self.config["server_url"],
-            client_id=self.config.get("client_id"),
-            realm_name=self.config["realm_name"],
-            client_secret_key=self.config["client_secret"],
-        )
+        """Set up the token manager once, later calls only refresh the token"""
+        if self.auth is None:
+            self.auth = TokenManager(
+                self.configuration, self.config, metrics=self.metrics
+            )
+            self.api_hooks.insert(0, self.auth.hook)
         self.refresh_token()
 
+    def disconnect(self):
+        if self.auth is not None:
+            self.auth.stop()
+
+    def iter_organizations(self, **kwargs):
+        return paginate(
+            self.organization_api_instance.list_organizations,
+            size=self.page_size,
+            **kwargs,
+        )
+
+    def iter_workspaces(self, organization_id, **kwargs):
+        return paginate(
+            self.workspace_api_instance.list_workspaces,
+            organization_id,
+            size=self.page_size,
+            **kwargs,
+        )
+
+    def iter_solutions(self, organization_id, **kwargs):
+        return paginate(
+            self.solution_api_instance.list_solutions,
+            organization_id,
+            size=self.page_size,
+            **kwargs,
+        )
+
+    def iter_runners(self, organization_id, workspace_id, **kwargs):
+        return paginate(
+            self.runner_api_instance.list_runners,
+            organization_id,
+            workspace_id,
+            size=self.page_size,
+            **kwargs,
+        )
+
+    def iter_run_pages(self, organization_id, workspace_id, runner_id, **kwargs):
+        return iter_pages(
+            self.run_api_instance.list_runs,
+            organization_id,
+            workspace_id,
+            runner_id,
+            size=self.page_size,
+            **kwargs,
+        )
+
     def update_organizations(self):
         try:
-            self.organizations = self.organization_api_instance.list_organizations()
+            self.organizations = list(self.iter_organizations())
         except Exception as e:
             logger.error(f"error {e}")
             raise RuntimeError(f"Error getting organizations {e}")
@@ -113,38 +242,35 @@ class RUON:
 
     def update_solutions(self, organization_id):
         try:
-            self.solutions[organization_id] = self.solution_api_instance.list_solutions(
-                organization_id
-            )
+            self.solutions[organization_id] = list(self.iter_solutions(organization_id))
         except Exception as e:
             logger.error(f"error {e}")
 
     def update_workspaces(self, organization_id):
         try:
-            self.workspaces[organization_id] = (
-                self.workspace_api_instance.list_workspaces(organization_id)
+            self.workspaces[organization_id] = list(
+                self.iter_workspaces(organization_id)
             )
         except Exception as e:
             logger.error(f"error {e}")
 
     def update_runners(self, organization_id, workspace_id):
         try:
-            self.runners[organization_id, workspace_id] = (
-                self.runner_api_instance.list_runners(organization_id, workspace_id)
+            self.runners[organization_id, workspace_id] = list(
+                self.iter_runners(organization_id, workspace_id)
             )
         except Exception as e:
             logger.error(f"error {e}")
 
     def update_runs(self, organization_id, workspace_id, runner_id):
         try:
-            self.runs[organization_id, workspace_id, runner_id] = (
-                self.run_api_instance.list_runs(
-                    organization_id, workspace_id, runner_id
-                )
-            )
+            self.runs.load((organization_id, workspace_id, runner_id))
         except Exception as e:
             logger.error(f"error {e}")
 
+    def get_runs(self, organization_id, workspace_id, runner_id):
+        return self.runs.get((organization_id, workspace_id, runner_id)) or []
+
     def get_organization_security(self, org_id):
         data = {}
         try:
@@ -154,6 +280,9 @@ class RUON:
             for acl in org_security.access_control_list:
                 role = acl.role or org_security.default
                 data[acl.id] = role
+            # pandas is only imported once a security matrix is built
+            import pandas as pd
+
             return pd.Series(data)
         except Exception as e:
             raise RuntimeError(f"Error getting organization security for {org_id}: {e}")
@@ -167,73 +296,459 @@ class RUON:
             for acl in ws_security.access_control_list:
                 role = acl.role or ws_security.default
                 data[acl.id] = role
+            import pandas as pd
+
             return pd.Series(data)
         except Exception as e:
             raise RuntimeError(
                 f"Error getting workspace security for {workspace_id}: {e}"
             )
 
-    def get_security_dataframe(self, organization_id):
-        df = pd.DataFrame()
-        organization_security = self.get_organization_security(organization_id)
-        df["organization"] = organization_security
-        for workspace_id in self.get_workspace_list(organization_id):
-            workspace_security = self.get_workspace_security(
-                organization_id, workspace_id
+    def get_security_dataframe(self, organization_id, refresh=False):
+        return self.security.get(organization_id, refresh=refresh)
+
+    def crawler(self):
+        return Crawler(
+            self,
+            max_workers=int(self.config.get("crawl_concurrency", DEFAULT_CONCURRENCY)),
+            timeout=float(self.config.get("crawl_timeout", DEFAULT_TIMEOUT)),
+            page_size=self.page_size,
+        )
+
+    def _store_crawl_result(self, kind, key, value):
+        if kind == "organizations":
+            self.organizations = value
+        elif kind == "runners":
+            self.runners[key] = value
+        else:
+            getattr(self, kind)[key[0]] = value
+
+    def update_summary_data(self, on_progress=None, on_result=None):
+        """Crawl the platform, exposing each listing as soon as it arrives"""
+
+        def store(kind, key, value):
+            self._store_crawl_result(kind, key, value)
+            if on_result:
+                on_result(kind, key, value)
+
+        crawler = self.crawler()
+        previous = {
+            "workspaces": dict(self.workspaces),
+            "solutions": dict(self.solutions),
+            "runners": dict(self.runners),
+        }
+        result = crawler.crawl(on_progress=on_progress, on_result=store)
+        # keep the last known children of listings that failed this time
+        for error in result.errors:
+            collection = getattr(result, error.kind)
+            key = error.key if error.kind == "runners" else error.key[0]
+            if key in previous[error.kind]:
+                collection[key] = previous[error.kind][key]
+        # replace wholesale so objects removed on the platform disappear
+        self.organizations = result.organizations
+        self.workspaces = result.workspaces
+        self.solutions = result.solutions
+        self.runners = result.runners
+        self.crawl_errors = result.errors
+        self.security.invalidate()
+        self.runs.invalidate()
+        self.save_snapshot()
+        return result
+
+    def refresh_changes(self, expanded=(), lazy=False):
+        """Refetch only what may have changed, returning the list of changes"""
+        changes = DeltaRefresher(self, self.crawler()).refresh(expanded, lazy=lazy)
+        self.security.invalidate(
+            {
+                change.key[0]
+                for change in changes
+                if change.kind in ("organizations", "workspaces")
+            }
+        )
+        self.runs.invalidate(
+            {change.key for change in changes if change.kind == "runners"}
+        )
+        self.save_snapshot()
+        return changes
+
+    def load_snapshot(self):
+        """Load the cached collections, returning the snapshot or None"""
+        snapshot = self.cache.load()
+        if snapshot is not None:
+            self.organizations = snapshot.organizations
+            self.workspaces = snapshot.workspaces
+            self.solutions = snapshot.solutions
+            self.runners = snapshot.runners
+        return snapshot
+
+    def save_snapshot(self):
+        try:
+            self.cache.save(
+                self.organizations, self.workspaces, self.solutions, self.runners
             )
-            df[workspace_id] = workspace_security
-        return df
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Unable to save snapshot: {e}")
 
-    def update_summary_data(self):
-        self.update_organizations()
-        for organization in self.organizations:
-            self.update_workspaces(organization.id)
-            self.update_solutions(organization.id)
-            for workspace in self.workspaces[organization.id]:
-                self.update_runners(organization.id, workspace.id)
+    # Writes take the create and update requests of cosmotech_api and raise
+    # on failure, see eye.bulk to apply many of them
 
     def create_organization(self, organization):
-        try:
-            self.organization_api_instance.register_organization(organization)
-        except Exception as e:
-            logger.error(f"kati pige strava {e}")
+        return self.organization_api_instance.create_organization(organization)
+
+    def update_organization(self, organization_id, organization):
+        return self.organization_api_instance.update_organization(
+            organization_id, organization
+        )
 
     def delete_organization(self, organization_id):
-        try:
-            self.organization_api_instance.unregister_organization(organization_id)
-        except Exception as e:
-            logger.error(f"Unable to delete {organization_id}: {e}")
+        self.organization_api_instance.delete_organization(organization_id)
 
     def create_workspace(self, organization_id, workspace):
-        self.workspace_api_instance.create_workspace(organization_id, workspace)
-        pass
+        return self.workspace_api_instance.create_workspace(organization_id, workspace)
+
+    def update_workspace(self, organization_id, workspace_id, workspace):
+        return self.workspace_api_instance.update_workspace(
+            organization_id, workspace_id, workspace
+        )
 
+    def delete_workspace(self, organization_id, workspace_id):
+        self.workspace_api_instance.delete_workspace(organization_id, workspace_id)
 
-def build_tree(manager):
+    def create_runner(self, organization_id, workspace_id, runner):
+        return self.runner_api_instance.create_runner(
+            organization_id, workspace_id, runner
+        )
+
+    def update_runner(self, organization_id, workspace_id, runner_id, runner):
+        return self.runner_api_instance.update_runner(
+            organization_id, workspace_id, runner_id, runner
+        )
+
+    def delete_runner(self, organization_id, workspace_id, runner_id):
+        self.runner_api_instance.delete_runner(organization_id, workspace_id, runner_id)
+
+
+class SummaryTree:
+    """Rich tree of the object collections, grown as listings arrive.
+
+    `add` has the signature of the crawl `on_result` callback; the
+    organization list may be passed again with more organizations.
+    """
+
+    def __init__(self, label="Organizations"):
+        self.tree = Tree(label)
+        self.nodes = {}
+        self.organization_count = 0
+
+    def add(self, kind, key, value):
+        if kind == "organizations":
+            for organization in value[self.organization_count :]:
+                self.nodes[(organization.id,)] = self.tree.add(
+                    f"{organization.id} {organization.name}"
+                )
+            self.organization_count = len(value)
+            return
+        parent = self.nodes.get(key if kind == "runners" else key[:1])
+        if parent is None:
+            return
+        for obj in value:
+            node = parent.add(f"{obj.id} {obj.name}")
+            if kind == "workspaces":
+                self.nodes[key[0], obj.id] = node
+
+
+def build_tree(manager, label="Organizations"):
     console = Console()
-    tree = Tree("Organizations")
+    summary = SummaryTree(label)
+    summary.add("organizations", (), manager.organizations)
     for organization in manager.organizations:
-        org_node = tree.add(f"{organization.id} {organization.name}")
-        for workspace in manager.workspaces.get(organization.id, []):
-            workspace_node = org_node.add(f"{workspace.id} {workspace.name}")
-            for runner in manager.runners.get((organization.id, workspace.id), []):
-                workspace_node.add(f"{runner.id} {runner.name}")
-        for solution in manager.solutions.get(organization.id, []):
-            org_node.add(f"{solution.id} {solution.name}")
-    return console, tree
-
-
-def main():
-    manager = RUON()
+        key = (organization.id,)
+        workspaces = manager.workspaces.get(organization.id, [])
+        summary.add("workspaces", key, workspaces)
+        for workspace in workspaces:
+            runner_key = (organization.id, workspace.id)
+            summary.add("runners", runner_key, manager.runners.get(runner_key, []))
+        summary.add("solutions", key, manager.solutions.get(organization.id, []))
+    return console, summary.tree
+
+
+def print_crawl_errors(errors, console=None, profile=None):
+    """Print the failed listing calls of a crawl, logged if no console is given"""
+    prefix = f"{profile} " if profile else ""
+    for error in errors:
+        line = f"[red]✗[/] {prefix}{error.kind} {'/'.join(error.key)}: {error.error}"
+        if console is None:
+            logger.error(line)
+        else:
+            console.print(line)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Summary of the object tree")
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="render the cached snapshot without connecting to the platform",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="crawl the platform even if the cached snapshot is still fresh",
+    )
+    parser.add_argument(
+        "--export",
+        metavar="DIRECTORY",
+        help="crawl the platform into one file per entity instead of printing it",
+    )
+    parser.add_argument(
+        "--format", choices=FORMATS, default="csv", help="format of the exported files"
+    )
+    parser.add_argument(
+        "--no-acl",
+        action="store_true",
+        help="do not export the organization and workspace ACLs",
+    )
+    parser.add_argument(
+        "--profile",
+        action="append",
+        dest="profiles",
+        metavar="NAME",
+        help="settings of the .env.NAME file, repeat to crawl tenants in parallel",
+    )
+    parser.add_argument(
+        "--all-profiles",
+        action="store_true",
+        help="crawl the tenants of every .env.NAME file in parallel",
+    )
+    parser.add_argument(
+        "--watch",
+        nargs="?",
+        type=float,
+        const=DEFAULT_INTERVAL,
+        metavar="SECONDS",
+        help="keep the tree displayed, refreshed every SECONDS "
+        f"({DEFAULT_INTERVAL:.0f} by default) with the changes highlighted",
+    )
+    parser.add_argument(
+        "--resync",
+        type=int,
+        default=DEFAULT_RESYNC,
+        metavar="N",
+        help="with --watch, refetch every listing every N refreshes, only the "
+        "organizations, what changed and the runners of workspaces with runs "
+        "in progress otherwise",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="FILE",
+        help="write the timings of the API calls, as Prometheus text for .prom "
+        "and .txt files and as JSON otherwise",
+    )
+    parser.add_argument(
+        "--apply",
+        metavar="MANIFEST",
+        help="create, update and delete the organizations, workspaces and "
+        "runners of a YAML or JSON manifest",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="with --apply, print the planned operations without running them",
+    )
+    args = parser.parse_args(argv)
+    if args.dry_run and not args.apply:
+        parser.error("--dry-run is only used with --apply")
+    if args.apply:
+        if args.offline or args.export or args.watch is not None:
+            parser.error("--apply cannot be used with --offline, --export or --watch")
+        if args.all_profiles or len(args.profiles or ()) > 1:
+            parser.error("--apply changes a single profile")
+    if args.watch is not None:
+        if args.offline or args.export:
+            parser.error("--watch cannot be used with --offline or --export")
+        if args.all_profiles or len(args.profiles or ()) > 1:
+            parser.error("--watch displays a single profile")
+    return args
+
+
+def crawl_live(manager):
+    """Crawl while rendering the tree as it grows, returning the crawl errors"""
+    summary = SummaryTree()
+    # transient: the complete tree is printed once the crawl is over
+    with Live(summary.tree, refresh_per_second=4, transient=True):
+        return manager.update_summary_data(on_result=summary.add).errors
+
+
+def export(manager, args, directory=None):
+    """Export the tenant, or the cached snapshot if offline, returning an exit code"""
+    acl = not (args.offline or args.no_acl)
+    entities = ["organizations", "workspaces", "solutions", "runners"]
+    if acl:
+        entities.append("acl")
+    exporter = Exporter(directory or args.export, args.format, entities)
+    try:
+        if args.offline:
+            if manager.load_snapshot() is None:
+                logger.error(f"[red]No cached snapshot in {manager.cache.path}[/]")
+                exporter.close(commit=False)
+                return 1
+            export_snapshot(manager, exporter)
+            errors = []
+        else:
+            manager.connect()
+            errors = export_tenant(manager, exporter, acl=acl)
+    except Exception:
+        exporter.close(commit=False)
+        raise
+    exporter.close()
+    print_crawl_errors(errors)
+    return 1 if errors else 0
+
+
+def operations_table(operations, title, results=False) -> Table:
+    table = Table(title=title)
+    table.add_column("Action")
+    table.add_column("Kind")
+    table.add_column("Path")
+    if results:
+        table.add_column("Status")
+        table.add_column("Duration", justify="right")
+        table.add_column("Error")
+    else:
+        table.add_column("Fields")
+    styles = {DELETE: "red", FAILED: "red"}
+    for operation in operations:
+        row = [
+            Text(operation.action, style=styles.get(operation.action, "")),
+            operation.kind[:-1],
+            operation.path,
+        ]
+        if results:
+            duration = operation.duration
+            row += [
+                Text(operation.status, style=styles.get(operation.status, "")),
+                "" if duration is None else f"{duration * 1000:.0f} ms",
+                operation.error or "",
+            ]
+        else:
+            row.append(", ".join(sorted(operation.fields)))
+        table.add_row(*row)
+    return table
+
+
+def apply_manifest(manager, args):
+    """Plan the manifest against the live tenant and run it unless dry-run,
+    returning an exit code
+    """
+    console = Console()
+    try:
+        manifest = load_manifest(args.apply)
+    except (OSError, ValueError, RuntimeError) as e:
+        logger.error(f"[red]Unable to read {args.apply}: {e}[/]")
+        return 1
     manager.connect()
-    manager.update_organizations()
-    for organization in manager.organizations:
-        manager.update_workspaces(organization.id)
-        manager.update_solutions(organization.id)
-        for workspace in manager.workspaces[organization.id]:
-            manager.update_runners(organization.id, workspace.id)
-    console, tree = build_tree(manager)
-    console.print(tree)
+    # planned against the current objects, never the cached snapshot
+    errors = crawl_live(manager)
+    if errors:
+        print_crawl_errors(errors)
+        logger.error("[red]Not planning against a partial crawl[/]")
+        return 1
+    try:
+        plan = BulkPlan.from_manifest(manager, manifest)
+    except ValueError as e:
+        logger.error(f"[red]Invalid manifest {args.apply}: {e}[/]")
+        return 1
+    if not plan.operations:
+        console.print("Nothing to do, the tenant matches the manifest")
+        return 0
+    counts = ", ".join(f"{count} {action}" for action, count in plan.counts().items())
+    ordered = [operation for phase in plan.phases for operation in phase]
+    console.print(operations_table(ordered, f"Plan: {counts}"))
+    if args.dry_run:
+        return 0
+    plan.execute(max_workers=manager.bulk_concurrency)
+    console.print(operations_table(ordered, "Results", results=True))
+    manager.refresh_changes(plan.touched())
+    return 0 if all(operation.status == DONE for operation in ordered) else 1
+
+
+def summarize_tenants(tenants, args):
+    """Print the trees of several tenants crawled in parallel, or export
+    each one to a sub-directory named after its profile, returning an exit code
+    """
+    if args.export:
+        codes = tenants.map(
+            lambda manager: export(manager, args, Path(args.export) / manager.profile)
+        )
+        return max(code if isinstance(code, int) else 1 for code in codes.values())
+    root = Tree("Tenants")
+    summaries = {}
+    for profile in tenants.profiles:
+        summaries[profile] = SummaryTree(profile)
+        root.children.append(summaries[profile].tree)
+    with Live(root, refresh_per_second=4, transient=True):
+        results = tenants.crawl_all(
+            refresh=args.refresh,
+            offline=args.offline,
+            on_result=lambda profile, *result: summaries[profile].add(*result),
+        )
+    console = Console()
+    root = Tree("Tenants")
+    for profile in tenants.profiles:
+        if isinstance(results[profile], Exception):
+            root.add(f"[red]✗ {profile}: {results[profile]}[/]")
+        else:
+            root.children.append(build_tree(tenants.get(profile), profile)[1])
+    console.print(root)
+    failed = False
+    for profile, errors in results.items():
+        if isinstance(errors, Exception):
+            failed = True
+            continue
+        print_crawl_errors(errors, console, profile)
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    profiles = list_profiles() if args.all_profiles else args.profiles
+    if profiles and len(profiles) > 1:
+        tenants = TenantManager(RUON, profiles)
+        try:
+            sys.exit(summarize_tenants(tenants, args))
+        finally:
+            if args.metrics:
+                managers = tenants.managers.values()
+                export_metrics(args.metrics, [m.metrics for m in managers])
+    manager = RUON(profiles[0] if profiles else DEFAULT_PROFILE)
+    try:
+        if args.export:
+            sys.exit(export(manager, args))
+        if args.apply:
+            sys.exit(apply_manifest(manager, args))
+        snapshot = manager.load_snapshot()
+        errors = []
+        if args.watch is not None:
+            # the refresh and HTTP logs would scroll the live display away
+            logging.getLogger().setLevel(logging.WARNING)
+            manager.connect()
+            if snapshot is None:
+                crawl_live(manager)
+            watch(manager, args.watch, args.resync)
+            return
+        if args.offline:
+            if snapshot is None:
+                logger.error(f"[red]No cached snapshot in {manager.cache.path}[/]")
+                sys.exit(1)
+        elif args.refresh or not manager.cache.is_fresh(snapshot):
+            manager.connect()
+            errors = crawl_live(manager)
+        console, tree = build_tree(manager)
+        console.print(tree)
+        print_crawl_errors(errors, console)
+    finally:
+        if args.metrics:
+            export_metrics(args.metrics, [manager.metrics])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,308 @@
+import heapq
+import itertools
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+logger = logging.getLogger("back.metrics")
+
+# Upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Latest latencies kept per endpoint to compute the percentiles
+SAMPLE_SIZE = 1000
+PERCENTILES = (50, 90, 99)
+# Slowest calls remembered with their arguments
+SLOWEST = 20
+FORMAT_VERSION = 1
+PROMETHEUS_SUFFIXES = (".prom", ".txt")
+
+
+@dataclass
+class Call:
+    endpoint: str
+    args: tuple
+    # wall clock start, the duration is measured with perf_counter
+    started: float = field(default_factory=time.time)
+    duration: float | None = None
+    size: int = 0
+    error: str | None = None
+
+    @property
+    def target(self) -> str:
+        """Identifiers the call was made with, models left out"""
+        return "/".join(str(arg) for arg in self.args if isinstance(arg, (str, int)))
+
+    def to_dict(self) -> dict:
+        return {
+            "endpoint": self.endpoint,
+            "target": self.target,
+            "started": self.started,
+            "duration": self.duration,
+            "bytes": self.size,
+            "error": self.error,
+        }
+
+
+def error_name(error) -> str:
+    # cosmotech_api.ApiException, not imported to keep the SDK off startup
+    status = getattr(error, "status", None)
+    if isinstance(status, int):
+        return f"HTTP {status}"
+    return type(error).__name__
+
+
+def percentile(samples, p) -> float | None:
+    """Nearest-rank percentile of the samples, None without any"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+class EndpointStats:
+    """Counts, sizes and latency histogram of the calls of one endpoint"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = Counter()
+        self.size = 0
+        self.total = 0.0
+        self.max = 0.0
+        # per bucket of BUCKETS, the last one for calls above all bounds
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def add(self, call: Call):
+        self.count += 1
+        if call.error:
+            self.errors[call.error] += 1
+        self.size += call.size
+        self.total += call.duration
+        self.max = max(self.max, call.duration)
+        index = next(
+            (i for i, bound in enumerate(BUCKETS) if call.duration <= bound),
+            len(BUCKETS),
+        )
+        self.buckets[index] += 1
+        self.samples.append(call.duration)
+
+    @property
+    def error_count(self) -> int:
+        return sum(self.errors.values())
+
+    def percentiles(self) -> dict:
+        return {f"p{p}": percentile(self.samples, p) for p in PERCENTILES}
+
+    def to_dict(self) -> dict:
+        cumulative = list(itertools.accumulate(self.buckets))
+        return {
+            "count": self.count,
+            "errors": dict(self.errors),
+            "error_rate": self.error_count / self.count if self.count else 0.0,
+            "bytes": self.size,
+            "total_seconds": self.total,
+            "mean": self.total / self.count if self.count else None,
+            "max": self.max,
+            **self.percentiles(),
+            "buckets": {
+                **{str(bound): cumulative[i] for i, bound in enumerate(BUCKETS)},
+                "+Inf": cumulative[-1],
+            },
+        }
+
+
+class Metrics:
+    """Timings, counts, errors and payload sizes of the calls of a tenant.
+
+    `hook` is an ApiProxy hook timing every cosmotech_api call, `instrument`
+    counts the response bytes of an ApiClient and `timed` measures any other
+    call, e.g. the Keycloak token requests of eye.auth. Calls are also
+    tracked while in flight, and the slowest ones are kept with their
+    arguments.
+    """
+
+    def __init__(self, profile=None):
+        self.profile = profile
+        self.started = time.time()
+        self.endpoints: dict[str, EndpointStats] = {}
+        self.in_flight: dict[int, Call] = {}
+        self._slowest = []
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        # calls in progress in the current thread, innermost last
+        self._local = threading.local()
+
+    @contextmanager
+    def timed(self, endpoint, *args):
+        call = Call(endpoint, args)
+        call_id = next(self._ids)
+        stack = self._local.__dict__.setdefault("calls", [])
+        stack.append(call)
+        with self._lock:
+            self.in_flight[call_id] = call
+        start = time.perf_counter()
+        try:
+            yield call
+        except BaseException as e:
+            call.error = error_name(e)
+            raise
+        finally:
+            call.duration = time.perf_counter() - start
+            stack.pop()
+            self._record(call_id, call)
+
+    def _record(self, call_id, call):
+        with self._lock:
+            del self.in_flight[call_id]
+            if call.endpoint not in self.endpoints:
+                self.endpoints[call.endpoint] = EndpointStats()
+            self.endpoints[call.endpoint].add(call)
+            entry = (call.duration, call_id, call)
+            if len(self._slowest) < SLOWEST:
+                heapq.heappush(self._slowest, entry)
+            elif call.duration > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def hook(self, call, endpoint, *args, **kwargs):
+        """ApiProxy hook timing a call"""
+        with self.timed(endpoint, *args):
+            return call(*args, **kwargs)
+
+    def add_size(self, size):
+        """Count `size` response bytes for the call of the current thread"""
+        stack = getattr(self._local, "calls", None)
+        if stack:
+            stack[-1].size += size
+
+    def instrument(self, api_client):
+        """Count the response bytes of every request of an ApiClient.
+
+        The generated API methods read the whole response anyway, it is only
+        read here a bit earlier. Sizes are the ones after decompression.
+        """
+        rest_client = api_client.rest_client
+        request = rest_client.request
+
+        def counted_request(*args, **kwargs):
+            response = request(*args, **kwargs)
+            self.add_size(len(response.read() or b""))
+            return response
+
+        rest_client.request = counted_request
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.endpoints = {}
+            self._slowest = []
+
+    @property
+    def calls(self) -> int:
+        """Number of calls made since the start or the last reset"""
+        with self._lock:
+            return sum(stats.count for stats in self.endpoints.values())
+
+    def slowest(self) -> list[Call]:
+        with self._lock:
+            return [call for _, _, call in sorted(self._slowest, reverse=True)]
+
+    def running(self) -> list[Call]:
+        """Calls in flight, the oldest first"""
+        with self._lock:
+            return sorted(self.in_flight.values(), key=lambda call: call.started)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            endpoints = {
+                name: stats.to_dict() for name, stats in sorted(self.endpoints.items())
+            }
+        return {
+            "profile": self.profile,
+            "started": self.started,
+            "endpoints": endpoints,
+            "slowest": [call.to_dict() for call in self.slowest()],
+            "in_flight": [call.to_dict() for call in self.running()],
+        }
+
+
+def label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def labels(**values) -> str:
+    return ",".join(f'{name}="{label_value(value)}"' for name, value in values.items())
+
+
+def prometheus_text(registries) -> str:
+    """Metrics of several tenants in the Prometheus text exposition format"""
+    registries = list(registries)
+    lines = []
+
+    def header(name, kind, description):
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    snapshots = []
+    for metrics in registries:
+        with metrics._lock:
+            snapshots.append((metrics.profile or "", sorted(metrics.endpoints.items())))
+    name = "eye_api_request_duration_seconds"
+    header(name, "histogram", "Duration of the API and Keycloak calls")
+    for profile, endpoints in snapshots:
+        for endpoint, stats in endpoints:
+            cumulative = list(itertools.accumulate(stats.buckets))
+            for bound, count in zip((*BUCKETS, "+Inf"), cumulative):
+                tags = labels(profile=profile, endpoint=endpoint, le=bound)
+                lines.append(f"{name}_bucket{{{tags}}} {count}")
+            tags = labels(profile=profile, endpoint=endpoint)
+            lines.append(f"{name}_sum{{{tags}}} {stats.total}")
+            lines.append(f"{name}_count{{{tags}}} {stats.count}")
+    name = "eye_api_errors_total"
+    header(name, "counter", "Failed API and Keycloak calls")
+    for profile, endpoints in snapshots:
+        for endpoint, stats in endpoints:
+            for error, count in sorted(stats.errors.items()):
+                tags = labels(profile=profile, endpoint=endpoint, error=error)
+                lines.append(f"{name}{{{tags}}} {count}")
+    name = "eye_api_response_bytes_total"
+    header(name, "counter", "Bytes of the API responses, after decompression")
+    for profile, endpoints in snapshots:
+        for endpoint, stats in endpoints:
+            tags = labels(profile=profile, endpoint=endpoint)
+            lines.append(f"{name}{{{tags}}} {stats.size}")
+    name = "eye_api_in_flight"
+    header(name, "gauge", "API and Keycloak calls in progress")
+    for metrics in registries:
+        tags = labels(profile=metrics.profile or "")
+        lines.append(f"{name}{{{tags}}} {len(metrics.running())}")
+    return "\n".join(lines) + "\n"
+
+
+def export_metrics(path, registries):
+    """Write the metrics of several tenants to `path`, in the Prometheus text
+    format for `.prom` and `.txt` files and as JSON otherwise
+    """
+    registries = list(registries)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix in PROMETHEUS_SUFFIXES:
+        text = prometheus_text(registries)
+    else:
+        data = {
+            "version": FORMAT_VERSION,
+            "exported": time.time(),
+            "tenants": [metrics.to_dict() for metrics in registries],
+        }
+        text = json.dumps(data, indent=2)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    logger.info(f"[green]✓[/] Metrics written to {path}")
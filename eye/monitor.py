@@ -0,0 +1,194 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime
+
+from textual.worker import get_current_worker
+
+from eye.crawler import DEFAULT_CONCURRENCY, DEFAULT_TIMEOUT
+
+logger = logging.getLogger("back.monitor")
+
+# Unknown is not polled forever, the API does not tell when it ends
+TERMINAL_STATES = {"Successful", "Failed", "Unknown"}
+# Rich styles of the run states, in the TUI and the CLI alike
+STATE_STYLES = {"Successful": "green", "Failed": "red", "Running": "yellow"}
+# Seconds between two looks for due runs
+TICK = 1.0
+MIN_INTERVAL = 2.0
+MAX_INTERVAL = 60.0
+# A run is polled again after this fraction of its age
+AGE_FACTOR = 0.1
+
+
+def state_name(state) -> str | None:
+    return getattr(state, "value", state)
+
+
+def parse_time(value) -> float | None:
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class WatchedRun:
+    """A run in a non-terminal state and when to poll it next"""
+
+    key: tuple
+    started_at: float
+    next_poll: float = 0.0
+    failures: int = 0
+    status: object = None
+
+
+class RunMonitor:
+    """Poll the status of the runs in progress in a background worker.
+
+    Runs are discovered from the last run of every known runner and from the
+    runs loaded in the run store. Due runs are polled concurrently; each run
+    is polled again after a delay growing with its age, between
+    `min_interval` and `max_interval`, and dropped once it reached a terminal
+    state. Updates are published on `app.run_status_changed` as a list of
+    `(key, RunStatus)`, the status being None for newly watched runs.
+    """
+
+    def __init__(
+        self,
+        app,
+        manager,
+        max_workers=DEFAULT_CONCURRENCY,
+        min_interval=MIN_INTERVAL,
+        max_interval=MAX_INTERVAL,
+        timeout=DEFAULT_TIMEOUT,
+    ):
+        self.app = app
+        self.manager = manager
+        self.max_workers = max_workers
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.timeout = timeout
+        # changed by the worker thread, read with `watched_runs`
+        self.watched = {}
+        self._lock = threading.Lock()
+        # runs seen in a terminal state, not to be picked up again from
+        # listings fetched before they ended
+        self.finished = set()
+        self.worker = None
+
+    def start(self):
+        self.worker = self.app.run_worker(
+            self._run, thread=True, group="monitor", exclusive=True
+        )
+
+    def watched_runs(self) -> list[WatchedRun]:
+        with self._lock:
+            return list(self.watched.values())
+
+    def interval(self, run: WatchedRun, now) -> float:
+        age = max(now - run.started_at, 0.0)
+        interval = min(max(age * AGE_FACTOR, self.min_interval), self.max_interval)
+        return min(interval * 2**run.failures, self.max_interval)
+
+    def _candidates(self):
+        """Keys and start times of the known runs that are not over"""
+        for runner_key, runners in list(self.manager.runners.items()):
+            for runner in runners:
+                info = runner.last_run_info
+                if (
+                    info
+                    and info.last_run_id
+                    and info.last_run_status
+                    and info.last_run_status not in TERMINAL_STATES
+                ):
+                    yield (*runner_key, runner.id, info.last_run_id), None
+        for runner_key, runs in self.manager.runs.items():
+            for run in runs:
+                if state_name(run.state) not in TERMINAL_STATES:
+                    info = getattr(run, "create_info", None)
+                    timestamp = info.timestamp if info else None
+                    yield (*runner_key, run.id), timestamp and timestamp / 1000
+
+    def discover(self) -> list:
+        now = time.time()
+        added = []
+        for key, started_at in self._candidates():
+            if key in self.watched or key in self.finished:
+                continue
+            with self._lock:
+                self.watched[key] = WatchedRun(key, started_at or now)
+            added.append((key, None))
+        return added
+
+    def _get_status(self, key):
+        return self.manager.run_api_instance.get_run_status(
+            *key, _request_timeout=self.timeout
+        )
+
+    def poll(self) -> list:
+        """Poll the due runs concurrently, returning their updated statuses"""
+        # the SDK is kept off the startup of the app
+        from eye.scheduler import API_ERRORS
+
+        now = time.time()
+        due = [run for run in self.watched_runs() if run.next_poll <= now]
+        if not due:
+            return []
+        updates = []
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="monitor"
+        ) as executor:
+            futures = {executor.submit(self._get_status, run.key): run for run in due}
+            wait(futures)
+        now = time.time()
+        for future, run in futures.items():
+            try:
+                status = future.result()
+            except API_ERRORS as e:
+                run.failures += 1
+                logger.warning(f"Status of run {run.key[-1]} unavailable: {e}")
+            else:
+                run.failures = 0
+                run.started_at = parse_time(status.start_time) or run.started_at
+                if status != run.status:
+                    run.status = status
+                    updates.append((run.key, status))
+                if state_name(status.state) in TERMINAL_STATES:
+                    with self._lock:
+                        del self.watched[run.key]
+                    self.finished.add(run.key)
+                    continue
+            run.next_poll = now + self.interval(run, now)
+        return updates
+
+    def apply(self, updates):
+        """Store the polled statuses in the cached runners and runs"""
+        for key, status in updates:
+            state = state_name(status.state) if status else None
+            if state is None:
+                continue
+            runner = self.manager.store.get(key[2])
+            info = runner.last_run_info if runner else None
+            if info and info.last_run_id == key[3]:
+                info.last_run_status = state
+                self.manager.store.reindex(runner.id)
+            for run in self.manager.runs.get(key[:3]) or []:
+                if run.id == key[3]:
+                    run.state = status.state
+        self.app.run_status_changed.publish(updates)
+
+    def _run(self):
+        worker = get_current_worker()
+        while not worker.is_cancelled:
+            try:
+                updates = self.discover() + self.poll()
+            # logged and tried again next tick rather than ending the monitor
+            except Exception as e:  # noqa: BLE001
+                logger.error(f"Run monitor failed: {e}")
+                updates = []
+            if updates and not worker.is_cancelled:
+                self.app.call_from_thread(self.apply, updates)
+            time.sleep(TICK)
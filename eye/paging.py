@@ -0,0 +1,27 @@
+DEFAULT_PAGE_SIZE = 100
+
+
+def iter_pages(list_call, *args, size=DEFAULT_PAGE_SIZE, **kwargs):
+    """Yield the pages of a paged listing call, e.g. `list_organizations`.
+
+    Pages are requested one at a time, from index 0, until a page shorter
+    than `size` comes back. A server ignoring the paging parameters returns
+    the same page again, which also ends the iteration.
+    """
+    page = 0
+    first = None
+    while True:
+        items = list_call(*args, page=page, size=size, **kwargs)
+        if not items or (page and getattr(items[0], "id", None) == first):
+            return
+        first = getattr(items[0], "id", None)
+        yield items
+        if len(items) < size:
+            return
+        page += 1
+
+
+def paginate(list_call, *args, size=DEFAULT_PAGE_SIZE, **kwargs):
+    """Yield the objects of a paged listing call as their page arrives"""
+    for items in iter_pages(list_call, *args, size=size, **kwargs):
+        yield from items
@@ -0,0 +1,97 @@
+import heapq
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger("back.runs")
+
+DEFAULT_RUN_LIMIT = 50
+DEFAULT_CAPACITY = 200
+
+
+def created_at(run) -> int:
+    return run.create_info.timestamp if run.create_info else 0
+
+
+def latest_runs(pages, limit) -> list:
+    """The `limit` most recent runs of a paged listing, most recent first.
+
+    Paging stops at the first page holding no run more recent than the
+    `limit`-th most recent one so far: as runs are listed by creation date,
+    the following pages only hold older ones.
+    """
+    newest = []
+    count = 0
+    if limit <= 0:
+        return newest
+    for page in pages:
+        if len(newest) == limit and max(map(created_at, page)) < newest[0][0]:
+            break
+        for run in page:
+            count += 1
+            # the count keeps the listing order of runs created together
+            item = (created_at(run), -count, run)
+            if len(newest) < limit:
+                heapq.heappush(newest, item)
+            else:
+                heapq.heappushpop(newest, item)
+    return [run for *_, run in sorted(newest, reverse=True)]
+
+
+class RunStore:
+    """Cache the latest runs of the runners that were looked at.
+
+    Runs are streamed page by page and only the `limit` most recent ones of
+    a runner are kept, so runners with thousands of runs cost one bounded
+    list, and the pages older than these are not fetched. At most
+    `capacity` runners are cached, the least recently used one being
+    evicted first. Keys are `(organization_id, workspace_id, runner_id)`.
+    """
+
+    def __init__(self, manager, limit=DEFAULT_RUN_LIMIT, capacity=DEFAULT_CAPACITY):
+        self.manager = manager
+        self.limit = limit
+        self.capacity = capacity
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._cache
+
+    def get(self, key) -> list | None:
+        """Cached runs of a runner, most recent first, None if not loaded"""
+        with self._lock:
+            runs = self._cache.get(key)
+            if runs is not None:
+                self._cache.move_to_end(key)
+            return runs
+
+    def items(self) -> list:
+        with self._lock:
+            return list(self._cache.items())
+
+    def load(self, key) -> list:
+        """Fetch and cache the latest runs of a runner"""
+        start_time = time.time()
+        runs = latest_runs(self.manager.iter_run_pages(*key), self.limit)
+        with self._lock:
+            self._cache[key] = runs
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.capacity:
+                evicted, _ = self._cache.popitem(last=False)
+                logger.debug(f"Evicted runs of {'/'.join(evicted)}")
+        logger.debug(
+            f"Loaded {len(runs)} runs of {key[-1]} in {time.time() - start_time:.2f}s"
+        )
+        return runs
+
+    def invalidate(self, keys=None):
+        """Drop the cached runs of the given runners, or all of them"""
+        with self._lock:
+            if keys is None:
+                self._cache.clear()
+            else:
+                for key in keys:
+                    self._cache.pop(key, None)
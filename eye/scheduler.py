@@ -0,0 +1,239 @@
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+from cosmotech_api.exceptions import ApiException
+from urllib3.exceptions import HTTPError
+
+logger = logging.getLogger("back.scheduler")
+
+# Statuses worth retrying, anything else is returned to the caller at once
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+# Prefixes of the API methods that can be sent again without side effects
+IDEMPOTENT_PREFIXES = ("list_", "get_", "find_", "update_", "delete_")
+# Statuses telling, along with a Retry-After header, that the server did not
+# process the request, the only failures of other calls that are retried
+REJECTED_STATUSES = {429, 503}
+
+DEFAULT_RATE = 20.0
+DEFAULT_BURST = 20
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 30.0
+DEFAULT_FAILURE_THRESHOLD = 10
+DEFAULT_RESET_TIMEOUT = 30.0
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a host that keeps failing"""
+
+
+# Errors of an API call made through a scheduler, once retries are over
+API_ERRORS = (ApiException, HTTPError, CircuitOpenError)
+
+
+class TokenBucket:
+    """Allow `rate` calls per second on average with bursts of `burst` calls"""
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, sleeping until one is available"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            # reserve the token now so concurrent callers queue up behind it
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Fail fast after `failure_threshold` consecutive failures.
+
+    Once open, calls are rejected for `reset_timeout` seconds, then a single
+    trial call is let through: its success closes the circuit again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout=DEFAULT_RESET_TIMEOUT,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def before(self, endpoint):
+        with self._lock:
+            state = self.state
+            if state == "open" or (state == "half-open" and self._trial):
+                raise CircuitOpenError(f"Circuit open, not calling {endpoint}")
+            if state == "half-open":
+                self._trial = True
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def release(self):
+        """End a trial call that says nothing of the host, e.g. a response
+        that does not parse, so that the next call is tried instead
+        """
+        with self._lock:
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                if self.opened_at is None:
+                    logger.warning(
+                        f"[red]Circuit opened after {self.failures} failures"
+                    )
+                self.opened_at = time.monotonic()
+
+
+def is_idempotent(endpoint) -> bool:
+    """Whether the method of an `Api.method` endpoint can safely be retried"""
+    return endpoint.rpartition(".")[2].startswith(IDEMPOTENT_PREFIXES)
+
+
+def retry_after(error) -> float | None:
+    """Delay requested by a Retry-After header, in seconds"""
+    headers = getattr(error, "headers", None) or {}
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestScheduler:
+    """Rate limit, retry and circuit-break the API calls made to one host.
+
+    Transient failures (see `RETRY_STATUSES` and connection errors) are
+    retried with exponential backoff and full jitter, or after the delay of
+    a `Retry-After` header. Calls creating objects are only retried when the
+    server rejected them with a `Retry-After` header: one that timed out may
+    have been processed, and sending it again would create a duplicate.
+    """
+
+    def __init__(
+        self,
+        rate=DEFAULT_RATE,
+        burst=DEFAULT_BURST,
+        max_retries=DEFAULT_MAX_RETRIES,
+        base_delay=DEFAULT_BASE_DELAY,
+        max_delay=DEFAULT_MAX_DELAY,
+        failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout=DEFAULT_RESET_TIMEOUT,
+    ):
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            rate=float(config.get("rate_limit", DEFAULT_RATE)),
+            burst=int(config.get("rate_burst", DEFAULT_BURST)),
+            max_retries=int(config.get("max_retries", DEFAULT_MAX_RETRIES)),
+            base_delay=float(config.get("retry_base_delay", DEFAULT_BASE_DELAY)),
+            max_delay=float(config.get("retry_max_delay", DEFAULT_MAX_DELAY)),
+            failure_threshold=int(
+                config.get("breaker_threshold", DEFAULT_FAILURE_THRESHOLD)
+            ),
+            reset_timeout=float(config.get("breaker_reset", DEFAULT_RESET_TIMEOUT)),
+        )
+
+    def backoff(self, attempt) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def hook(self, call, endpoint, *args, **kwargs):
+        """ApiProxy hook scheduling a call"""
+        idempotent = is_idempotent(endpoint)
+        attempt = 0
+        while True:
+            self.breaker.before(endpoint)
+            self.bucket.acquire()
+            try:
+                result = call(*args, **kwargs)
+            except ApiException as e:
+                if e.status not in RETRY_STATUSES:
+                    # the server answered, it is not the host that is failing
+                    self.breaker.success()
+                    raise
+                error, delay = e, retry_after(e)
+                retryable = idempotent or (
+                    e.status in REJECTED_STATUSES and delay is not None
+                )
+            except HTTPError as e:
+                error, delay, retryable = e, None, idempotent
+            except BaseException:
+                self.breaker.release()
+                raise
+            else:
+                self.breaker.success()
+                return result
+            self.breaker.failure()
+            if (
+                not retryable
+                or attempt >= self.max_retries
+                or self.breaker.state == "open"
+            ):
+                raise error
+            delay = min(self.max_delay, delay) if delay else self.backoff(attempt)
+            attempt += 1
+            logger.warning(
+                f"{endpoint} failed ({error.__class__.__name__}), "
+                f"retry {attempt}/{self.max_retries} in {delay:.1f}s"
+            )
+            time.sleep(delay)
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(url, config) -> RequestScheduler:
+    """Return the scheduler shared by every client of the host of `url`"""
+    host = urlparse(url).netloc or url
+    with _schedulers_lock:
+        if host not in _schedulers:
+            _schedulers[host] = RequestScheduler.from_config(config)
+        return _schedulers[host]
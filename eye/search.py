@@ -0,0 +1,115 @@
+import bisect
+import heapq
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+
+logger = logging.getLogger("back.search")
+
+DEFAULT_LIMIT = 20
+# Share of the query trigrams a candidate must contain
+MIN_TRIGRAM_RATIO = 0.5
+
+
+def trigrams(text) -> set:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """Fuzzy search over the ids and names of the objects of a store.
+
+    Queries shorter than three characters are matched as prefixes of the
+    ids, names and name words; longer ones through a trigram index, so typos
+    and partial ids still match. Matches are ranked exact, then prefix, then
+    substring, then by share of common trigrams. The index is rebuilt on the
+    first search after the store changed.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.version = None
+        self._records = {}
+        self._trigrams = defaultdict(set)
+        self._terms = []
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        with self._lock:
+            if self.version == self.store.version:
+                return
+            start_time = time.time()
+            version = self.store.version
+            records = {record.id: record for record in self.store.find()}
+            index = defaultdict(set)
+            terms = []
+            for object_id, record in records.items():
+                texts = {object_id.lower(), (record.name or "").lower()}
+                texts.update((record.name or "").lower().split())
+                for text in texts:
+                    terms.append((text, object_id))
+                    for trigram in trigrams(text):
+                        index[trigram].add(object_id)
+            terms.sort()
+            self._records, self._trigrams, self._terms = records, index, terms
+            self.version = version
+            logger.debug(
+                f"Indexed {len(records)} objects in {time.time() - start_time:.2f}s"
+            )
+
+    def _prefixed(self, query) -> set:
+        start = bisect.bisect_left(self._terms, (query, ""))
+        ids = set()
+        for text, object_id in self._terms[start:]:
+            if not text.startswith(query):
+                break
+            ids.add(object_id)
+        return ids
+
+    def _fuzzy(self, grams, limit) -> dict:
+        """Ids sharing enough trigrams with the query, with the share shared"""
+        postings = sorted((self._trigrams.get(g, set()) for g in grams), key=len)
+        # objects holding every trigram outrank the others, which are only
+        # looked for when there are not enough of them
+        full = postings[0].intersection(*postings[1:])
+        if len(full) >= limit:
+            return dict.fromkeys(full, 1.0)
+        needed = math.ceil(len(grams) * MIN_TRIGRAM_RATIO)
+        # a candidate holds at least one of the rarest trigrams left over
+        # once `needed - 1` of them are missing
+        candidates = set().union(*postings[: len(postings) - needed + 1])
+        shares = {}
+        for object_id in candidates:
+            count = sum(object_id in posting for posting in postings)
+            if count >= needed:
+                shares[object_id] = count / len(grams)
+        return shares
+
+    def _score(self, query, record, common) -> float:
+        texts = (record.id.lower(), (record.name or "").lower())
+        if query in texts:
+            return 1.0
+        if any(text.startswith(query) for text in texts):
+            return 0.9
+        if any(query in text for text in texts):
+            return 0.8
+        return 0.7 * common
+
+    def search(self, query, limit=DEFAULT_LIMIT) -> list:
+        """Best `(score, Record)` matches of a query, best first"""
+        self.refresh()
+        query = query.strip().lower()
+        if not query:
+            return []
+        grams = trigrams(query)
+        if not grams:
+            candidates = {object_id: 1.0 for object_id in self._prefixed(query)}
+        else:
+            candidates = self._fuzzy(grams, limit)
+        matches = [
+            (self._score(query, self._records[object_id], common), object_id)
+            for object_id, common in candidates.items()
+        ]
+        best = heapq.nsmallest(limit, matches, key=lambda match: (-match[0], match[1]))
+        return [(score, self._records[object_id]) for score, object_id in best]
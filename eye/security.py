@@ -0,0 +1,86 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from eye.crawler import DEFAULT_CONCURRENCY
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger("back.security")
+
+DEFAULT_TTL = 300.0
+
+
+class SecurityMatrixService:
+    """Build and cache the user x (organization, workspaces) role matrices.
+
+    The organization and workspace ACLs of a matrix are fetched concurrently
+    and the frame is built in one shot. Matrices are cached per organization
+    until they expire or are invalidated by a refresh. pandas is imported
+    with the first matrix, keeping it off the startup of the app.
+    """
+
+    def __init__(self, manager, max_workers=DEFAULT_CONCURRENCY, ttl=DEFAULT_TTL):
+        self.manager = manager
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self, organization_ids=None):
+        """Drop the cached matrices of the given organizations, or all of them"""
+        with self._lock:
+            if organization_ids is None:
+                self._cache.clear()
+            else:
+                for organization_id in organization_ids:
+                    self._cache.pop(organization_id, None)
+
+    def cached(self, organization_id) -> "pd.DataFrame | None":
+        with self._lock:
+            saved_at, df = self._cache.get(organization_id, (0.0, None))
+        if df is not None and time.time() - saved_at < self.ttl:
+            return df
+        return None
+
+    def get(self, organization_id, refresh=False) -> "pd.DataFrame":
+        df = None if refresh else self.cached(organization_id)
+        if df is None:
+            df = self.build(organization_id)
+            with self._lock:
+                self._cache[organization_id] = (time.time(), df)
+        return df
+
+    def build(self, organization_id) -> "pd.DataFrame":
+        start_time = time.time()
+        manager = self.manager
+        if organization_id not in manager.workspaces:
+            manager.update_workspaces(organization_id)
+        workspace_ids = manager.get_workspace_list(organization_id)
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="security"
+        ) as executor:
+            organization_future = executor.submit(
+                manager.get_organization_security, organization_id
+            )
+            workspace_futures = [
+                executor.submit(
+                    manager.get_workspace_security, organization_id, workspace_id
+                )
+                for workspace_id in workspace_ids
+            ]
+            columns = {"organization": organization_future.result()}
+            for workspace_id, future in zip(workspace_ids, workspace_futures):
+                columns[workspace_id] = future.result()
+        import pandas as pd
+
+        # rows are the organization users, as workspace ACLs are aligned on them
+        df = pd.DataFrame(columns, index=columns["organization"].index)
+        logger.info(
+            f"[green]✓[/] Security matrix of {organization_id} "
+            f"({len(workspace_ids) + 1} requests) in {time.time() - start_time:.2f}s"
+        )
+        return df
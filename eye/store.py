@@ -0,0 +1,257 @@
+import threading
+from collections import defaultdict
+from collections.abc import MutableMapping
+
+KINDS = ("organizations", "workspaces", "solutions", "runners")
+INDEXES = ("kind", "solution_id", "owner", "status")
+CHILD_KINDS = {
+    "organizations": ("workspaces", "solutions"),
+    "workspaces": ("runners",),
+}
+
+
+class Record:
+    """Compact index entry of a platform object.
+
+    `key` is the path of the object, e.g. `(organization_id, workspace_id,
+    runner_id)`, so the parent of an object is `key[:-1]`.
+    """
+
+    __slots__ = ("key", "kind", "name", "owner", "solution_id", "status")
+
+    def __init__(self, kind, key, name, solution_id=None, owner=None, status=None):
+        self.kind = kind
+        self.key = key
+        self.name = name
+        self.solution_id = solution_id
+        self.owner = owner
+        self.status = status
+
+    @property
+    def id(self):
+        return self.key[-1]
+
+    @property
+    def parent(self):
+        return self.key[:-1]
+
+    def __repr__(self):
+        return f"Record({self.kind}, {'/'.join(self.key)})"
+
+
+def make_record(kind, parent, obj) -> Record:
+    owner = getattr(obj, "owner_name", None)
+    if owner is None and getattr(obj, "create_info", None):
+        owner = obj.create_info.user_id
+    solution_id = getattr(obj, "solution_id", None)
+    if kind == "workspaces" and getattr(obj, "solution", None):
+        solution_id = obj.solution.solution_id
+    elif kind == "solutions":
+        solution_id = obj.id
+    info = getattr(obj, "last_run_info", None)
+    status = info.last_run_status if info else None
+    return Record(kind, (*parent, obj.id), obj.name, solution_id, owner, status)
+
+
+def listing_key(kind, path):
+    """Key of the listing holding the children of `kind` of the object at `path`.
+
+    As in the RUON collections, workspaces and solutions are listed by
+    organization id and runners by `(organization_id, workspace_id)`.
+    """
+    if kind == "organizations":
+        return ()
+    if kind == "runners":
+        return path
+    return path[0]
+
+
+class Listings(MutableMapping):
+    """The listings of one kind by parent key, indexed on assignment"""
+
+    def __init__(self, store, kind):
+        self.store = store
+        self.kind = kind
+
+    def __getitem__(self, parent):
+        return self.store._listings[self.kind][parent]
+
+    def __setitem__(self, parent, items):
+        self.store.set_listing(self.kind, parent, items)
+
+    def __delitem__(self, parent):
+        if parent not in self.store._listings[self.kind]:
+            raise KeyError(parent)
+        self.store.set_listing(self.kind, parent, None)
+
+    def __iter__(self):
+        with self.store._lock:
+            return iter(list(self.store._listings[self.kind]))
+
+    def __len__(self):
+        return len(self.store._listings[self.kind])
+
+
+class ObjectStore:
+    """Platform objects as listed, with id, parent and secondary indexes.
+
+    Listings are kept per kind and parent key as returned by the API, which
+    is what the tree, the snapshot cache and delta refreshes consume. Every
+    listed object also gets a `Record` indexed by id and by kind, solution
+    id, owner and last run status, so "which workspace holds runner r-x"
+    or "which runners use solution sol-y" are answered without scanning.
+
+    Writes hold the lock. Readers of the listings do not: a listing or a
+    kind of listings is replaced by a single assignment, so they see it
+    either before or after the change.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._listings = {kind: {} for kind in KINDS}
+        self._records = {}
+        self._models = {}
+        # (kind, parent) -> number of items indexed, see set_listing
+        self._indexed = {}
+        self._indexes = {name: defaultdict(set) for name in INDEXES}
+        # bumped on every change, for derived indexes to know when to rebuild
+        self.version = 0
+        self.workspaces = Listings(self, "workspaces")
+        self.solutions = Listings(self, "solutions")
+        self.runners = Listings(self, "runners")
+
+    @property
+    def organizations(self) -> list:
+        return self._listings["organizations"].get((), [])
+
+    def __len__(self):
+        return len(self._records)
+
+    def _index(self, kind, parent, obj):
+        # the previous record is replaced rather than removed first, so
+        # lookups by id never miss an object being indexed again
+        self._drop_values(self._records.get(obj.id))
+        record = make_record(kind, parent, obj)
+        self._records[obj.id] = record
+        self._models[obj.id] = obj
+        for name in INDEXES:
+            value = getattr(record, name)
+            if value is not None:
+                self._indexes[name][value].add(obj.id)
+
+    def _unindex(self, object_id):
+        self._models.pop(object_id, None)
+        self._drop_values(self._records.pop(object_id, None))
+
+    def _drop_values(self, record):
+        if record is None:
+            return
+        for name in INDEXES:
+            value = getattr(record, name)
+            ids = self._indexes[name].get(value)
+            if ids is not None:
+                ids.discard(record.id)
+                if not ids:
+                    del self._indexes[name][value]
+
+    def set_listing(self, kind, parent, items):
+        """Replace a listing, None to drop it.
+
+        `parent` is the key of the listing in the RUON collections, see
+        `listing_key`. A listing set again after growing in place, as the
+        organization list of a crawl page by page, only gets its new items
+        indexed.
+        """
+        path = parent if isinstance(parent, tuple) else (parent,)
+        with self._lock:
+            self.version += 1
+            listings = self._listings[kind]
+            if items is not None and listings.get(parent) is items:
+                for obj in items[self._indexed[kind, parent] :]:
+                    self._index(kind, path, obj)
+                self._indexed[kind, parent] = len(items)
+                return
+            kept = {obj.id for obj in items or []}
+            for obj in listings.get(parent) or []:
+                record = self._records.get(obj.id)
+                if obj.id not in kept and record and record.parent == path:
+                    self._unindex(obj.id)
+            if items is None:
+                listings.pop(parent, None)
+                self._indexed.pop((kind, parent), None)
+                return
+            listings[parent] = items
+            for obj in items:
+                self._index(kind, path, obj)
+            self._indexed[kind, parent] = len(items)
+
+    def replace(self, kind, listings):
+        """Replace every listing of a kind, e.g. with a crawl result"""
+        listings = {
+            parent: items for parent, items in listings.items() if items is not None
+        }
+        with self._lock:
+            self.version += 1
+            kept = {obj.id for items in listings.values() for obj in items}
+            for items in self._listings[kind].values():
+                for obj in items:
+                    record = self._records.get(obj.id)
+                    if obj.id not in kept and record and record.kind == kind:
+                        self._unindex(obj.id)
+            self._listings[kind] = listings
+            for key in [key for key in self._indexed if key[0] == kind]:
+                del self._indexed[key]
+            for parent, items in listings.items():
+                path = parent if isinstance(parent, tuple) else (parent,)
+                for obj in items:
+                    self._index(kind, path, obj)
+                self._indexed[kind, parent] = len(items)
+
+    def reindex(self, object_id):
+        """Refresh the record of an object modified in place"""
+        with self._lock:
+            record = self._records.get(object_id)
+            obj = self.get(object_id)
+            if obj is not None:
+                self.version += 1
+                self._index(record.kind, record.parent, obj)
+
+    def record(self, object_id) -> Record | None:
+        return self._records.get(object_id)
+
+    def get(self, object_id):
+        """The listed model of an object, None if unknown"""
+        return self._models.get(object_id)
+
+    def parent(self, object_id) -> Record | None:
+        record = self._records.get(object_id)
+        if record is None or not record.parent:
+            return None
+        return self._records.get(record.parent[-1])
+
+    def children(self, object_id) -> list[Record]:
+        record = self._records.get(object_id)
+        if record is None:
+            return []
+        return [
+            self._records[obj.id]
+            for kind in CHILD_KINDS.get(record.kind, ())
+            for obj in self._listings[kind].get(listing_key(kind, record.key), [])
+            if obj.id in self._records
+        ]
+
+    def find(self, **criteria) -> list[Record]:
+        """Records matching all the given index values.
+
+        e.g. `find(kind="runners", solution_id="sol-x")`
+        """
+        with self._lock:
+            ids = None
+            for name, value in criteria.items():
+                if name not in INDEXES:
+                    raise ValueError(f"No index on {name}")
+                matches = self._indexes[name].get(value, set())
+                ids = set(matches) if ids is None else ids & matches
+            if ids is None:
+                ids = self._records.keys()
+            return [self._records[object_id] for object_id in ids]
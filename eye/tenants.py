@@ -0,0 +1,120 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from dotenv import dotenv_values
+
+logger = logging.getLogger("back.tenants")
+
+# Profiles are `.env.<profile>` files overriding the settings of `.env`
+PROFILE_PREFIX = ".env."
+DEFAULT_PROFILE = "default"
+
+
+def list_profiles(directory=".") -> list[str]:
+    """Names of the profiles defined in `directory`, the default one first"""
+    names = {
+        path.name[len(PROFILE_PREFIX) :]
+        for path in Path(directory).glob(f"{PROFILE_PREFIX}*")
+        if path.is_file()
+    }
+    return [DEFAULT_PROFILE, *sorted(names - {DEFAULT_PROFILE})]
+
+
+def load_config(profile=DEFAULT_PROFILE, directory=".") -> dict:
+    """Settings of a profile, the `.env` file alone for the default one"""
+    config = dotenv_values(Path(directory) / ".env")
+    if profile != DEFAULT_PROFILE:
+        path = Path(directory) / f"{PROFILE_PREFIX}{profile}"
+        if not path.is_file():
+            raise RuntimeError(f"Unknown profile {profile}, no {path} file")
+        config.update(dotenv_values(path))
+    return config
+
+
+class TenantManager:
+    """RUON instances of several profiles, connected and crawled in parallel.
+
+    Instances are created on first use with `factory(profile)` and kept, so
+    switching back to a tenant finds its collections in memory. They share
+    the pooled connections of eye.transport and the per-host schedulers of
+    eye.scheduler, and their snapshots live side by side in the cache
+    directory, one file per host and realm.
+    """
+
+    def __init__(self, factory, profiles=None, max_workers=None):
+        self.factory = factory
+        self.profiles = list(profiles or list_profiles())
+        self.max_workers = max_workers
+        self.managers = {}
+        self._lock = threading.Lock()
+
+    def get(self, profile):
+        with self._lock:
+            if profile not in self.managers:
+                self.managers[profile] = self.factory(profile)
+            return self.managers[profile]
+
+    def map(self, call, profiles=None) -> dict:
+        """Run `call(manager)` for every profile concurrently.
+
+        Returns the result of each profile, or the exception it raised.
+        """
+        profiles = self.profiles if profiles is None else list(profiles)
+        results = {}
+        if not profiles:
+            return results
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers or len(profiles),
+            thread_name_prefix="tenant",
+        ) as executor:
+            futures = {
+                executor.submit(lambda p: call(self.get(p)), profile): profile
+                for profile in profiles
+            }
+            for future in as_completed(futures):
+                profile = futures[future]
+                try:
+                    results[profile] = future.result()
+                # the error of a tenant is its result, the others go on
+                except Exception as e:  # noqa: BLE001
+                    logger.error(f"[red]Profile {profile} failed:[/] {e}")
+                    results[profile] = e
+        return results
+
+    def connect_all(self, profiles=None) -> dict:
+        return self.map(lambda manager: manager.connect(), profiles)
+
+    def crawl_all(self, profiles=None, refresh=False, offline=False, on_result=None):
+        """Load the snapshot of every profile and crawl the stale ones.
+
+        `on_result(profile, kind, key, value)` is called as listings arrive.
+        Returns the crawl errors of each profile, or the exception it raised.
+        """
+        start_time = time.time()
+
+        def crawl(manager):
+            snapshot = manager.load_snapshot()
+            if offline:
+                if snapshot is None:
+                    raise RuntimeError(f"No cached snapshot in {manager.cache.path}")
+                return []
+            if not refresh and manager.cache.is_fresh(snapshot):
+                return []
+            manager.connect()
+            callback = None
+            if on_result:
+
+                def callback(kind, key, value):
+                    on_result(manager.profile, kind, key, value)
+
+            return manager.update_summary_data(on_result=callback).errors
+
+        results = self.map(crawl, profiles)
+        logger.info(
+            f"[green]✓[/] {len(results)} tenants loaded in "
+            f"{time.time() - start_time:.2f}s"
+        )
+        return results
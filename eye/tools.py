@@ -0,0 +1,237 @@
+import json
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+
+from eye.monitor import state_name
+from eye.runs import created_at
+
+logger = logging.getLogger("back.tools")
+
+# Items returned by a tool unless the model asks for fewer
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+# Size of a tool result in the conversation, items are dropped beyond it
+MAX_RESULT_CHARS = 4000
+
+
+def function(name, description, properties, required=()):
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": description,
+            "parameters": {
+                "type": "object",
+                "properties": properties,
+                "required": list(required),
+            },
+        },
+    }
+
+
+LIMIT = {"type": "integer", "description": f"Maximum items, {DEFAULT_LIMIT} by default"}
+
+DEFINITIONS = [
+    function(
+        "list_organizations",
+        "List the organizations of the tenant with their number of workspaces, "
+        "solutions and runners.",
+        {
+            "query": {"type": "string", "description": "Filter on id or name"},
+            "limit": LIMIT,
+        },
+    ),
+    function(
+        "find_runner",
+        "Find runners (scenarios) by id or name, fuzzy matched, optionally "
+        "restricted to a solution or a last run status.",
+        {
+            "query": {"type": "string", "description": "Id or name to look for"},
+            "solution_id": {"type": "string"},
+            "status": {
+                "type": "string",
+                "description": "Last run status, e.g. Successful, Failed, Running",
+            },
+            "limit": LIMIT,
+        },
+    ),
+    function(
+        "user_acls",
+        "Roles of a user in the organizations and workspaces. Without "
+        "organization_id only the ACLs already loaded are searched.",
+        {
+            "user": {"type": "string", "description": "User id, usually an email"},
+            "organization_id": {"type": "string"},
+        },
+        required=("user",),
+    ),
+    function(
+        "recent_runs",
+        "Most recent runs of a runner with their state, newest first.",
+        {"runner_id": {"type": "string"}, "limit": LIMIT},
+        required=("runner_id",),
+    ),
+]
+
+
+def timestamp(milliseconds) -> str | None:
+    if not milliseconds:
+        return None
+    moment = datetime.fromtimestamp(milliseconds / 1000, tz=timezone.utc)
+    return moment.isoformat(timespec="seconds")
+
+
+def truncated(items, limit=DEFAULT_LIMIT, **extra) -> str:
+    """JSON result of a list of items, cut to `limit` items and to the
+    maximum result size, telling the model how many there were
+    """
+    limit = min(max(int(limit or DEFAULT_LIMIT), 1), MAX_LIMIT)
+    count = len(items)
+    items = items[:limit]
+    while True:
+        result = {**extra, "count": count, "items": items}
+        if len(items) < count:
+            result["truncated"] = True
+        text = json.dumps(result, default=str, separators=(",", ":"))
+        if len(text) <= MAX_RESULT_CHARS or not items:
+            return text
+        items = items[: len(items) // 2]
+
+
+class PlatformTools:
+    """Tools letting the chat model look up the tenant inventory.
+
+    Answers come from the collections and caches of the RUON manager: the
+    object store and its search index, the cached security matrices and run
+    lists. The API is only called for the ACLs of an organization asked for
+    by id and for the runs of a runner that were never listed.
+    """
+
+    definitions = DEFINITIONS
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    def system_prompt(self) -> str:
+        config = self.manager.config
+        return (
+            "You help operating the Cosmo Tech platform tenant "
+            f"{config.get('realm_name')} ({config.get('host')}). It holds "
+            f"{len(self.manager.organizations)} organizations. Use the tools to "
+            "look up organizations, runners, ACLs and runs instead of guessing, "
+            "and mention when a result was truncated."
+        )
+
+    def call(self, name, arguments) -> str:
+        """Run a tool with the JSON arguments given by the model"""
+        try:
+            kwargs = json.loads(arguments or "{}")
+            method = getattr(self, name) if name in self.names else None
+            if method is None:
+                raise ValueError(f"Unknown tool {name}")
+            return method(**kwargs)
+        # the model reads the error and may call again, nothing is raised
+        except Exception as e:  # noqa: BLE001
+            logger.warning(f"Tool {name} failed: {e}")
+            return json.dumps({"error": str(e)})
+
+    @property
+    def names(self):
+        return {definition["function"]["name"] for definition in self.definitions}
+
+    def list_organizations(self, query=None, limit=DEFAULT_LIMIT) -> str:
+        store = self.manager.store
+        children = Counter(
+            (record.kind, record.key[0]) for record in store.find() if record.parent
+        )
+        items = []
+        for organization in self.manager.organizations:
+            text = f"{organization.id} {organization.name}".lower()
+            if query and query.lower() not in text:
+                continue
+            items.append(
+                {
+                    "id": organization.id,
+                    "name": organization.name,
+                    "workspaces": children["workspaces", organization.id],
+                    "solutions": children["solutions", organization.id],
+                    "runners": children["runners", organization.id],
+                }
+            )
+        return truncated(items, limit)
+
+    def _runner(self, record) -> dict:
+        return {
+            "id": record.id,
+            "name": record.name,
+            "organization_id": record.key[0],
+            "workspace_id": record.key[1],
+            "solution_id": record.solution_id,
+            "owner": record.owner,
+            "last_run_status": record.status,
+        }
+
+    def find_runner(
+        self, query=None, solution_id=None, status=None, limit=DEFAULT_LIMIT
+    ) -> str:
+        criteria = {"kind": "runners"}
+        if solution_id:
+            criteria["solution_id"] = solution_id
+        if status:
+            criteria["status"] = status
+        if query:
+            allowed = {record.id for record in self.manager.store.find(**criteria)}
+            matches = self.manager.search.search(query, limit=MAX_LIMIT * 4)
+            records = [record for _, record in matches if record.id in allowed]
+        else:
+            records = sorted(
+                self.manager.store.find(**criteria), key=lambda r: r.name or ""
+            )
+        return truncated([self._runner(record) for record in records], limit)
+
+    def user_acls(self, user, organization_id=None) -> str:
+        security = self.manager.security
+        if organization_id:
+            frames = {organization_id: security.get(organization_id)}
+        else:
+            frames = {}
+            for organization in self.manager.organizations:
+                df = security.cached(organization.id)
+                if df is not None:
+                    frames[organization.id] = df
+        items = []
+        for org_id, df in frames.items():
+            if user not in df.index:
+                continue
+            for column, role in df.loc[user].dropna().items():
+                items.append(
+                    {
+                        "organization_id": org_id,
+                        "workspace_id": None if column == "organization" else column,
+                        "role": role,
+                    }
+                )
+        not_loaded = len(self.manager.organizations) - len(frames)
+        extra = {"user": user}
+        if not organization_id and not_loaded:
+            # pass organization_id to load the ACLs of one of them
+            extra["organizations_not_loaded"] = not_loaded
+        return truncated(items, MAX_LIMIT, **extra)
+
+    def recent_runs(self, runner_id, limit=DEFAULT_LIMIT) -> str:
+        record = self.manager.store.record(runner_id)
+        if record is None or record.kind != "runners":
+            raise ValueError(f"Unknown runner {runner_id}")
+        runs = self.manager.runs.get(record.key)
+        if runs is None:
+            runs = self.manager.runs.load(record.key)
+        items = [
+            {
+                "id": run.id,
+                "state": state_name(run.state),
+                "created_at": timestamp(created_at(run)),
+            }
+            for run in runs
+        ]
+        return truncated(items, limit, runner_id=runner_id)
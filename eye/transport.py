@@ -0,0 +1,88 @@
+import logging
+import socket
+import threading
+
+from cosmotech_api import ApiClient
+from urllib3.connection import HTTPConnection
+
+from eye.crawler import DEFAULT_CONCURRENCY
+
+logger = logging.getLogger("back.transport")
+
+# Connections kept on top of the crawl concurrency for UI-driven calls
+POOL_HEADROOM = 4
+# TCP keep-alive probes so idle pooled connections survive NAT and proxies
+KEEPALIVE_IDLE = 60
+KEEPALIVE_INTERVAL = 15
+
+# urllib3 pool managers shared by the API clients of every profile
+_pool_managers = {}
+_pool_managers_lock = threading.Lock()
+
+
+def keepalive_socket_options():
+    options = [*HTTPConnection.default_socket_options]
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, KEEPALIVE_IDLE))
+    if hasattr(socket, "TCP_KEEPINTVL"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, KEEPALIVE_INTERVAL))
+    return options
+
+
+def shared_pool_manager(configuration, pool_manager):
+    """Return the pool manager shared by the clients with the TLS settings of
+    `configuration`, registering `pool_manager` if it is the first one.
+
+    Tenants of the same host then reuse each other's kept-alive connections.
+    The shared pools grow by the size asked for by every client joining, so
+    tenants crawled in parallel do not starve each other.
+    """
+    if configuration.proxy:
+        return pool_manager
+    key = (
+        configuration.verify_ssl,
+        configuration.ssl_ca_cert,
+        configuration.ca_cert_data,
+        configuration.cert_file,
+        configuration.key_file,
+        configuration.assert_hostname,
+        configuration.tls_server_name,
+    )
+    with _pool_managers_lock:
+        shared = _pool_managers.setdefault(key, pool_manager)
+        if shared is not pool_manager:
+            # only affects the pools of hosts not connected to yet
+            shared.connection_pool_kw["maxsize"] += (
+                configuration.connection_pool_maxsize
+            )
+        return shared
+
+
+def build_api_client(configuration, config) -> ApiClient:
+    """Create the ApiClient shared by all API instances.
+
+    The urllib3 pool is sized after the crawl concurrency so parallel calls
+    reuse kept-alive connections instead of opening and discarding extra
+    ones, and responses are requested compressed unless
+    `http_compression=false`. The pool manager itself is shared with the
+    clients of the other profiles, see `shared_pool_manager`.
+    """
+    concurrency = int(config.get("crawl_concurrency", DEFAULT_CONCURRENCY))
+    configuration.connection_pool_maxsize = int(
+        config.get("pool_maxsize", concurrency + POOL_HEADROOM)
+    )
+    configuration.socket_options = keepalive_socket_options()
+    # connection errors are retried with backoff by eye.scheduler
+    configuration.retries = 0
+    api_client = ApiClient(configuration)
+    rest_client = api_client.rest_client
+    rest_client.pool_manager = shared_pool_manager(
+        configuration, rest_client.pool_manager
+    )
+    if (config.get("http_compression") or "true").lower() in ("1", "true"):
+        api_client.set_default_header("Accept-Encoding", "gzip, deflate")
+    logger.debug(
+        f"API connection pool of {configuration.connection_pool_maxsize} connections"
+    )
+    return api_client
@@ -1,12 +1,20 @@
 import logging
 import os
+from contextlib import aclosing
+from pathlib import Path
+from typing import ClassVar
 
 from textual import events, on, work
+from textual.binding import BindingType
 from textual.containers import Container, VerticalScroll
 from textual.screen import Screen
 from textual.widgets import Footer, Header, Input, Markdown
+from textual.worker import WorkerCancelled, WorkerFailed
 
-from ..llm import ChatAPI
+from ..cache import CACHE_DIR
+from ..context import DEFAULT_BUDGET
+from ..llm import ChatAPI, format_message
+from ..tools import PlatformTools
 
 logger = logging.getLogger(__name__)
 
@@ -14,24 +22,59 @@ logger = logging.getLogger(__name__)
 class ChatBotScreen(Screen):
     """Chat interface screen"""
 
+    BINDINGS: ClassVar[list[BindingType]] = [("ctrl+n", "new_chat", "New chat")]
+
     def __init__(self, manager, **kwargs):
         super().__init__(**kwargs)
-        self.manager = manager
         api_key = os.getenv("OPEN_ROUTER_KEY")
         if not api_key:
             logger.warning(ValueError("OPEN_ROUTER_KEY environment variable not set"))
-        chat_api = ChatAPI(api_key)
+        config = manager.config
+        # the conversation is restored from the previous session
+        history_path = config.get("chat_history") or (
+            Path(config.get("cache_dir") or CACHE_DIR) / "chat.json"
+        )
+        chat_api = ChatAPI(
+            api_key,
+            budget=int(config.get("chat_context_tokens", DEFAULT_BUDGET)),
+            history_path=Path(history_path).expanduser(),
+            tools=PlatformTools(manager),
+        )
         self.chat_api = chat_api
 
+    @property
+    def manager(self):
+        return self.chat_api.tools.manager
+
+    @manager.setter
+    def manager(self, manager):
+        """The tools answer about the tenant displayed by the app"""
+        self.chat_api.tools.manager = manager
+
+    def on_mount(self):
+        self.show_context_size()
+
+    def show_context_size(self):
+        self.sub_title = f"~{self.chat_api.context.tokens} tokens of context"
+
     def compose(self):
         container = Container(
             Header(),
             Input(id="user-input", placeholder="Type your message..."),
-            VerticalScroll(Markdown(id="chat-container"), id="answerbox"),
+            VerticalScroll(
+                *(
+                    self.message_widget(msg["role"], msg["content"])
+                    for msg in self.chat_api.displayed_messages()
+                ),
+                id="answerbox",
+            ),
             Footer(),
         )
         yield container
 
+    def message_widget(self, role, content="") -> Markdown:
+        return Markdown(format_message(role, content), classes="chat-message")
+
     def key_escape(self, event: events.Key):
         self.set_focus(None)
 
@@ -42,22 +85,40 @@ class ChatBotScreen(Screen):
         user_message = input_widget.value
         input_widget.value = ""
 
-        self.update_chat_display()
+        # previous messages are left untouched, only the answer gets updated
+        answerbox = self.query_one("#answerbox", VerticalScroll)
+        answer = self.message_widget("assistant")
+        answerbox.mount(self.message_widget("user", user_message), answer)
+        answerbox.anchor()
 
         # Start async processing
-        self.get_bot_response(user_message)
+        self.get_bot_response(user_message, answer)
 
-    @work
-    async def get_bot_response(self, message: str) -> None:
-        """Worker to get bot response asynchronously"""
+    @work(exclusive=True, group="chat")
+    async def get_bot_response(self, message: str, answer: Markdown) -> None:
+        """Worker streaming the bot response into its message widget"""
+        stream = Markdown.get_stream(answer)
         try:
-            await self.chat_api.send_message(message)
-            self.update_chat_display()
-        except Exception as e:
+            # closed at once if cancelled, so the partial answer is recorded
+            # before the next message
+            async with aclosing(self.chat_api.stream_message(message)) as deltas:
+                async for delta in deltas:
+                    await stream.write(delta)
+        # shown in the conversation, a worker error would exit the app
+        except Exception as e:  # noqa: BLE001
             logger.error(f"Error getting bot response: {e}")
-            self.update_chat_display()
+            await stream.write(f"\n*{e}*\n")
+        finally:
+            await stream.stop()
+            self.show_context_size()
 
-    def update_chat_display(self) -> None:
-        """Update the markdown display with the conversation"""
-        chat_container = self.query_one("#chat-container", Markdown)
-        chat_container.update(self.chat_api.get_chat_history_markup())
+    async def action_new_chat(self):
+        # let a streamed answer record its partial content before clearing
+        for worker in self.workers.cancel_group(self, "chat"):
+            try:
+                await worker.wait()
+            except (WorkerCancelled, WorkerFailed):
+                pass
+        self.chat_api.clear()
+        self.query_one("#answerbox", VerticalScroll).remove_children()
+        self.show_context_size()
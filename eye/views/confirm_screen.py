@@ -0,0 +1,30 @@
+from typing import ClassVar
+
+from textual.binding import BindingType
+from textual.containers import Vertical
+from textual.screen import ModalScreen
+from textual.widgets import Static
+
+
+class ConfirmScreen(ModalScreen):
+    """Ask to confirm an action, dismissed with True or False"""
+
+    BINDINGS: ClassVar[list[BindingType]] = [
+        ("y", "dismiss(True)", "Yes"),
+        ("n", "dismiss(False)", "No"),
+        ("escape", "dismiss(False)", "Cancel"),
+    ]
+
+    def __init__(self, question, details=(), **kwargs):
+        super().__init__(**kwargs)
+        self.question = question
+        # lines listed below the question, e.g. the objects affected
+        self.details = details
+
+    def compose(self):
+        with Vertical(id="confirm-dialog") as dialog:
+            dialog.border_title = "Confirm"
+            yield Static(self.question)
+            if self.details:
+                yield Static("\n".join(self.details), id="confirm-details")
+            yield Static("[b]y[/b] yes  [b]n[/b] no", id="confirm-keys")
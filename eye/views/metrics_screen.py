@@ -0,0 +1,133 @@
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import ClassVar
+
+from textual.binding import BindingType
+from textual.containers import Vertical
+from textual.screen import Screen
+from textual.widgets import DataTable, Footer, Header
+
+from eye.metrics import PERCENTILES, export_metrics
+
+# Seconds between two refreshes of the tables
+REFRESH_INTERVAL = 1.0
+
+
+def milliseconds(seconds) -> str:
+    return "" if seconds is None else f"{seconds * 1000:.0f} ms"
+
+
+def size(count) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if count < 1024:
+            return f"{count:.0f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GiB"
+
+
+class MetricsScreen(Screen):
+    """Latency percentiles per endpoint, slowest and in-flight calls of the
+    displayed tenant, refreshed every second
+    """
+
+    BINDINGS: ClassVar[list[BindingType]] = [
+        ("escape", "app.pop_screen", "Close"),
+        ("e", "export", "Export"),
+        ("c", "reset", "Reset"),
+    ]
+
+    def __init__(self, manager, **kwargs):
+        super().__init__(**kwargs)
+        self.manager = manager
+
+    @property
+    def metrics(self):
+        return self.manager.metrics
+
+    def compose(self):
+        yield Header(icon="⏿", show_clock=True)
+        with Vertical():
+            endpoints = DataTable(id="metrics-endpoints", cursor_type="row")
+            endpoints.border_title = "Endpoints"
+            yield endpoints
+            slowest = DataTable(id="metrics-slowest", cursor_type="row")
+            slowest.border_title = "Slowest calls"
+            yield slowest
+            in_flight = DataTable(id="metrics-in-flight", cursor_type="row")
+            in_flight.border_title = "In flight"
+            yield in_flight
+        yield Footer()
+
+    def on_mount(self):
+        self.sub_title = f"API calls - {self.manager.profile}"
+        self.query_one("#metrics-endpoints", DataTable).add_columns(
+            "Endpoint",
+            "Calls",
+            "Errors",
+            *(f"p{p}" for p in PERCENTILES),
+            "Max",
+            "Bytes",
+        )
+        self.query_one("#metrics-slowest", DataTable).add_columns(
+            "Duration", "Endpoint", "Target", "Started", "Error"
+        )
+        self.query_one("#metrics-in-flight", DataTable).add_columns(
+            "Running for", "Endpoint", "Target"
+        )
+        self.update_tables()
+        self.set_interval(REFRESH_INTERVAL, self.update_tables)
+
+    def update_tables(self):
+        data = self.metrics.to_dict()
+        endpoints = self.query_one("#metrics-endpoints", DataTable)
+        endpoints.clear()
+        stats = sorted(
+            data["endpoints"].items(), key=lambda item: -item[1]["total_seconds"]
+        )
+        for endpoint, stat in stats:
+            errors = sum(stat["errors"].values())
+            endpoints.add_row(
+                endpoint,
+                str(stat["count"]),
+                f"[red]{errors} ({stat['error_rate']:.0%})[/]" if errors else "0",
+                *(milliseconds(stat[f"p{p}"]) for p in PERCENTILES),
+                milliseconds(stat["max"]),
+                size(stat["bytes"]),
+            )
+
+        slowest = self.query_one("#metrics-slowest", DataTable)
+        slowest.clear()
+        for call in self.metrics.slowest():
+            started = datetime.fromtimestamp(call.started).strftime("%X")
+            slowest.add_row(
+                milliseconds(call.duration),
+                call.endpoint,
+                call.target,
+                started,
+                f"[red]{call.error}[/]" if call.error else "",
+            )
+
+        in_flight = self.query_one("#metrics-in-flight", DataTable)
+        in_flight.clear()
+        now = time.time()
+        for call in self.metrics.running():
+            in_flight.add_row(
+                milliseconds(now - call.started), call.endpoint, call.target
+            )
+
+    def action_export(self):
+        directory = Path(self.manager.config.get("metrics_dir") or ".").expanduser()
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        name = f"metrics-{self.manager.profile}-{stamp}"
+        try:
+            for suffix in (".json", ".prom"):
+                export_metrics(directory / f"{name}{suffix}", [self.metrics])
+        except OSError as e:
+            self.notify(f"Unable to export metrics: {e}", severity="error")
+            return
+        self.notify(f"Metrics written to {directory / name}.json and .prom")
+
+    def action_reset(self):
+        self.metrics.reset()
+        self.update_tables()
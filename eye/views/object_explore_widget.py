@@ -7,10 +7,10 @@ from eye.views.object_viewer_widget import ObjectViewerWidget
 
 
 class ObjectExplorerWidget(Widget):
-    def __init__(self, manager, **kwargs):
+    def __init__(self, manager, lazy=False, **kwargs):
         super().__init__(**kwargs)
         self.manager = manager
-        self.object_tree = ObjectTreeWidget(self.manager, id="tree-view")
+        self.object_tree = ObjectTreeWidget(self.manager, lazy=lazy, id="tree-view")
         self.viewer = ObjectViewerWidget(id="detail-view")
 
     def compose(self):
@@ -1,30 +1,79 @@
 import logging
+from typing import ClassVar
 
+from textual.binding import BindingType
 from textual.screen import Screen
 from textual.widgets import Footer, Header
 
 from eye.views.object_explore_widget import ObjectExplorerWidget
+from eye.views.run_monitor_widget import RunMonitorWidget
+from eye.views.search_provider import ObjectSearchProvider
 
 logger = logging.getLogger("back.front")
 
 
 class ObjectScreen(Screen):
-    def __init__(self, manager, **kwargs):
+    BINDINGS: ClassVar[list[BindingType]] = [
+        ("m", "toggle_monitor", "Run monitor"),
+        ("/", "search", "Search"),
+    ]
+    COMMANDS: ClassVar[set] = {ObjectSearchProvider}
+
+    def __init__(self, manager, lazy=False, **kwargs):
         super().__init__(**kwargs)
         self.manager = manager
+        self.lazy = lazy
 
     def compose(self):
-        self.objects_widget = ObjectExplorerWidget(self.manager)
+        self.objects_widget = ObjectExplorerWidget(self.manager, lazy=self.lazy)
         yield Header(icon="⏿", show_clock=True)
         yield self.objects_widget
+        self.run_monitor = RunMonitorWidget(id="run-monitor")
+        yield self.run_monitor
         yield Footer()
 
     def on_mount(self):
+        self.app.data_service.expanded = self.objects_widget.object_tree.expanded
+        self.watch(self.app, "data_version", self.refresh_data)
+        self.app.data_changed.subscribe(self, self.apply_changes)
+        self.app.run_status_changed.subscribe(self, self.apply_run_status)
+        watched = self.app.run_monitor.watched_runs()
+        self.run_monitor.apply_updates([(run.key, run.status) for run in watched])
+
+    def action_search(self):
+        self.app.action_command_palette()
+
+    def action_toggle_monitor(self):
+        self.run_monitor.display = not self.run_monitor.display
+
+    @property
+    def active(self) -> bool:
+        """Whether the screen belongs to the displayed tenant"""
+        return self.manager is self.app.manager
+
+    def apply_run_status(self, updates):
+        if not self.active:
+            return
         try:
-            self.manager.update_summary_data()
-            self.refresh_data()
-        except Exception as e:
+            self.objects_widget.object_tree.apply_run_status(updates)
+            self.run_monitor.apply_updates(updates)
+        # a failed update is logged rather than closing the app
+        except Exception as e:  # noqa: BLE001
             logger.error(e)
 
-    def refresh_data(self):
-        self.objects_widget.reload()
+    def apply_changes(self, changes):
+        if not self.active:
+            return
+        try:
+            self.objects_widget.object_tree.apply_changes(changes)
+        # a failed patch is logged rather than closing the app
+        except Exception as e:  # noqa: BLE001
+            logger.error(e)
+
+    def refresh_data(self, data=None):
+        if not self.active:
+            return
+        try:
+            self.objects_widget.reload()
+        except Exception as e:
+            logger.error(e)
@@ -1,14 +1,38 @@
 import logging
 
 from cosmotech_api.models.organization import Organization
+from cosmotech_api.models.organization_create_request import (
+    OrganizationCreateRequest,
+)
 from cosmotech_api.models.workspace import Workspace
+from textual import on, work
 from textual.widgets import Tree
 
+from eye.bulk import DONE, BulkPlan
+from eye.delta import ADDED, CHANGED, REMOVED
+from eye.monitor import state_name
+from eye.views.confirm_screen import ConfirmScreen
+
 logger = logging.getLogger(__name__)
 
+PARENT_KIND = {
+    "organizations": None,
+    "workspaces": "organizations",
+    "solutions": "organizations",
+    "runners": "workspaces",
+    "runs": "runners",
+}
+EXPANDABLE = ("organizations", "workspaces", "runners")
+# Kinds that can be marked and deleted in bulk
+BULK_KINDS = ("organizations", "workspaces", "runners")
+
 
 class ObjectTreeWidget(Tree):
-    BINDINGS = [("n", "new", "New Item"), ("d", "delete", "Delete")]
+    BINDINGS = [
+        ("n", "new", "New Item"),
+        ("x", "mark", "Mark"),
+        ("d", "delete", "Delete"),
+    ]
 
     def action_new(self):
         if not self.cursor_node:
@@ -19,22 +43,13 @@ class ObjectTreeWidget(Tree):
         new_node = None
         try:
             if self.cursor_node.parent is None:
-                # Create organization template at root
-                org_template = Organization.from_dict(
-                    {
-                        "name": "New Organization",
-                        "id": "o-tyxaio",
-                        "ownerId": "new-org",
-                        "security": {
-                            "default": "reader",
-                            "accessControlList": [
-                                {"id": "edo@here.fr", "role": "editor"}
-                            ],
-                        },
-                    }
+                # Create an organization at root
+                organization = self.manager.create_organization(
+                    OrganizationCreateRequest(name="New Organization")
+                )
+                new_node = self._add_object_node(
+                    self.root, "organizations", (organization.id,), organization
                 )
-                self.manager.create_organization(org_template)
-                new_node = self.cursor_node.add("New Organization", data=org_template)
 
             elif isinstance(parent_data, Organization):
                 # Create a workspace template under organization
@@ -70,35 +85,314 @@ class ObjectTreeWidget(Tree):
         except Exception as e:
             self.notify(f"Error creating new item: {str(e)}", severity="error")
 
+    def action_mark(self):
+        """Add the node under the cursor to the selection, or remove it"""
+        kind, key = self.node_keys.get(
+            getattr(self.cursor_node, "id", None), (None,) * 2
+        )
+        if kind not in BULK_KINDS:
+            self.notify("Only organizations, workspaces and runners can be marked")
+            return
+        self.selected ^= {(kind, key)}
+        self.cursor_node.set_label(self._node_label(kind, key, self.cursor_node.data))
+
     def action_delete(self):
-        try:
-            organization_id = self.cursor_node.data.id
-            self.manager.delete_organization(organization_id)
-            self.cursor_node.remove()
-            self.notify(f"Deleted {organization_id}", severity="warning")
-        except Exception as e:
-            self.notify(f"Error: {e}")
+        """Delete the marked objects, or the one under the cursor, with their
+        children, once confirmed
+        """
+        targets = sorted(self.selected)
+        if not targets:
+            node = self.cursor_node
+            kind, key = self.node_keys.get(getattr(node, "id", None), (None,) * 2)
+            if kind not in BULK_KINDS:
+                self.notify(
+                    "Select an organization, workspace or runner", severity="error"
+                )
+                return
+            targets = [(kind, key)]
+
+        def confirmed(confirm):
+            if confirm:
+                self.delete_objects(targets)
+
+        details = [f"{kind[:-1]} {'/'.join(key)}" for kind, key in targets]
+        self.app.push_screen(
+            ConfirmScreen(
+                f"Delete {len(targets)} objects and everything under them?",
+                details,
+            ),
+            confirmed,
+        )
 
-    def __init__(self, manager, **kwargs):
+    @work(thread=True, group="bulk")
+    def delete_objects(self, targets):
+        plan = BulkPlan.deletions(self.manager, targets)
+        plan.execute(max_workers=self.manager.bulk_concurrency)
+        self.app.call_from_thread(self._objects_deleted, plan)
+
+    def _objects_deleted(self, plan):
+        failed = []
+        for operation in plan.operations:
+            if operation.status == DONE:
+                self._remove_object_node(operation.kind, operation.key)
+            else:
+                failed.append(operation)
+        deleted = len(plan.operations) - len(failed)
+        if failed:
+            errors = "\n".join(f"{op.path}: {op.error}" for op in failed[:5])
+            self.notify(
+                f"Deleted {deleted} objects, {len(failed)} failed:\n{errors}",
+                severity="error",
+            )
+        else:
+            self.notify(f"Deleted {deleted} objects", severity="warning")
+        self.app.data_service.refresh(plan.touched())
+
+    def __init__(self, manager, lazy=False, **kwargs):
         super().__init__("Objects", **kwargs)
         self.manager = manager
+        self.lazy = lazy
         self.border_title = "Object tree"
+        # (kind, key) -> node, keys as in eye.delta.Change.key
+        self.nodes = {}
+        self.node_keys = {}
+        # keys of the expanded organization, workspace and runner nodes
+        self.expanded = set()
+        # (kind, key) of the nodes whose children are attached or being fetched
+        self.loaded = set()
+        self.loading = set()
+        # (kind, key) of the node to move the cursor to once its ancestors load
+        self.pending_jump = None
+        # (kind, key) of the nodes marked for bulk operations
+        self.selected = set()
         self.reload()
 
+    @staticmethod
+    def _label(kind, obj):
+        if kind == "runs" and obj.state:
+            return f"{obj.id} [dim]{state_name(obj.state)}[/]"
+        return obj.id
+
+    def _node_label(self, kind, key, obj):
+        label = self._label(kind, obj)
+        if (kind, key) in self.selected:
+            return f"[b green]✓[/] {label}"
+        return label
+
+    def _add_object_node(self, parent, kind, key, obj):
+        label = self._node_label(kind, key, obj)
+        if kind in EXPANDABLE:
+            node = parent.add(label, data=obj, allow_expand=True)
+        else:
+            node = parent.add_leaf(label, data=obj)
+        self.nodes[kind, key] = node
+        self.node_keys[node.id] = (kind, key)
+        return node
+
+    def _remove_object_node(self, kind, key):
+        node = self.nodes.pop((kind, key), None)
+        if node is None:
+            return
+        self.selected.difference_update(
+            [k for k in self.selected if k[1][: len(key)] == key]
+        )
+        for child_key in [k for k in self.nodes if k[1][: len(key)] == key]:
+            self.node_keys.pop(self.nodes.pop(child_key).id, None)
+        self.node_keys.pop(node.id, None)
+        self.expanded.difference_update(
+            [k for k in self.expanded if k[: len(key)] == key]
+        )
+        self.loaded.difference_update(
+            [k for k in self.loaded if k[1][: len(key)] == key]
+        )
+        node.remove()
+
+    def _children(self, kind, key):
+        """Cached children of a node as (kind, key, object), None if not listed"""
+        manager = self.manager
+        if kind is None:
+            return [
+                ("organizations", (organization.id,), organization)
+                for organization in manager.organizations
+            ]
+        if kind == "organizations":
+            (organization_id,) = key
+            if organization_id not in manager.workspaces:
+                return None
+            return [
+                ("workspaces", (organization_id, workspace.id), workspace)
+                for workspace in manager.workspaces[organization_id]
+            ] + [
+                ("solutions", (organization_id, solution.id), solution)
+                for solution in manager.solutions.get(organization_id, [])
+            ]
+        if kind == "workspaces":
+            if key not in manager.runners:
+                return None
+            return [
+                ("runners", (*key, runner.id), runner)
+                for runner in manager.runners[key]
+            ]
+        if kind == "runners":
+            runs = manager.runs.get(key)
+            if runs is None:
+                return None
+            return [("runs", (*key, run.id), run) for run in runs]
+        return []
+
+    def _populate(self, node, kind, key):
+        """Attach the cached children of a node, returning False if not listed.
+
+        In lazy mode only the children of expanded nodes are attached, the
+        others are fetched when expanded. Runs are always fetched on expand.
+        """
+        children = self._children(kind, key)
+        if children is None:
+            return False
+        self.loaded.add((kind, key))
+        for child_kind, child_key, obj in children:
+            child = self._add_object_node(node, child_kind, child_key, obj)
+            if child_key in self.expanded:
+                child.expand()
+            if child_kind in EXPANDABLE and (
+                not self.lazy or child_key in self.expanded
+            ):
+                self._populate(child, child_kind, child_key)
+        return True
+
     def reload(self):
         self.clear()
+        self.nodes.clear()
+        self.node_keys.clear()
+        self.loaded.clear()
+        self.loading.clear()
         self.root.expand()
-        for organization in self.manager.organizations:
-            organization_node = self.root.add(organization.id)
-            organization_node.data = organization
-            for workspace in self.manager.workspaces.get(organization.id):
-                workspace_node = organization_node.add(workspace.id)
-                workspace_node.data = workspace
-                for runner in self.manager.runners.get(
-                    (organization.id, workspace.id), []
-                ):
-                    runner_node = workspace_node.add(runner.id)
-                    runner_node.data = runner
-            for solution in self.manager.solutions.get(organization.id):
-                solution_node = self.root.add(solution.id)
-                solution_node.data = solution
+        self._populate(self.root, None, ())
+
+    def apply_changes(self, changes):
+        """Patch the tree with the changes of a delta refresh"""
+        for change in changes:
+            if change.action == REMOVED:
+                self._remove_object_node(change.kind, change.key)
+            elif change.action == CHANGED:
+                node = self.nodes.get((change.kind, change.key))
+                if node is not None:
+                    node.data = change.obj
+                    node.set_label(
+                        self._node_label(change.kind, change.key, change.obj)
+                    )
+                    if change.kind == "runners":
+                        # its runs were dropped from the run store
+                        self._unload(node, change.kind, change.key)
+            elif change.action == ADDED:
+                parent_kind = PARENT_KIND[change.kind]
+                if (parent_kind, change.parent) not in self.loaded:
+                    # attached from the cache when the parent gets expanded
+                    continue
+                if change.kind == "organizations":
+                    parent = self.root
+                else:
+                    parent = self.nodes.get((parent_kind, change.parent))
+                if parent is not None and (change.kind, change.key) not in self.nodes:
+                    self._add_object_node(parent, change.kind, change.key, change.obj)
+                    if not self.lazy and change.kind != "runners":
+                        # its children follow in the changes, runs never do
+                        # and are fetched when the runner gets expanded
+                        self.loaded.add((change.kind, change.key))
+
+    def apply_run_status(self, updates):
+        """Relabel the run nodes whose status was updated by the run monitor"""
+        for key, status in updates:
+            node = self.nodes.get(("runs", key))
+            if node is not None and status is not None:
+                node.set_label(self._label("runs", node.data))
+                if self.cursor_node is node:
+                    # refresh the object viewer
+                    self.select_node(node)
+
+    def _unload(self, node, kind, key):
+        """Detach the children of a node, fetching them again if expanded"""
+        if (kind, key) not in self.loaded:
+            return
+        for child_key in [k for k in self.nodes if k[1][: len(key)] == key]:
+            if child_key != (kind, key):
+                self.node_keys.pop(self.nodes.pop(child_key).id, None)
+        self.loaded.discard((kind, key))
+        node.remove_children()
+        if node.is_expanded:
+            self.loading.add((kind, key))
+            node.add_leaf("[dim]Loading…[/]")
+            self.load_children(node, kind, key)
+
+    @work(thread=True)
+    def load_children(self, node, kind, key):
+        """Fetch the children of a node that were never listed"""
+        if kind == "organizations":
+            self.manager.update_workspaces(*key)
+            self.manager.update_solutions(*key)
+        elif kind == "workspaces":
+            self.manager.update_runners(*key)
+        else:
+            self.manager.update_runs(*key)
+        self.app.call_from_thread(self._children_loaded, node, kind, key)
+
+    def _children_loaded(self, node, kind, key):
+        self.loading.discard((kind, key))
+        if self.nodes.get((kind, key)) is not node:
+            return  # removed or reloaded meanwhile
+        node.remove_children()
+        if not self._populate(node, kind, key):
+            node.add_leaf("[red]Failed to load, collapse and expand to retry[/]")
+            self.pending_jump = None
+        elif self.pending_jump:
+            self.jump_to(*self.pending_jump)
+
+    def _ensure_loaded(self, node, kind, key) -> bool:
+        """Attach the children of a node, fetching them if never listed.
+
+        Returns True if the children are attached, False while loading.
+        """
+        if (kind, key) in self.loaded:
+            return True
+        if (kind, key) in self.loading:
+            return False
+        node.remove_children()
+        if self._populate(node, kind, key):
+            return True
+        self.loading.add((kind, key))
+        node.add_leaf("[dim]Loading…[/]")
+        self.load_children(node, kind, key)
+        return False
+
+    def jump_to(self, kind, key):
+        """Move the cursor to a node, expanding and loading its ancestors"""
+        self.pending_jump = (kind, key)
+        for depth in range(1, len(key)):
+            ancestor = (EXPANDABLE[depth - 1], key[:depth])
+            node = self.nodes.get(ancestor)
+            if node is None:
+                self.pending_jump = None
+                self.notify(f"{key[-1]} is no longer in the tree", severity="warning")
+                return
+            self.expanded.add(ancestor[1])
+            node.expand()
+            if not self._ensure_loaded(node, *ancestor):
+                return  # resumed by _children_loaded
+        self.pending_jump = None
+        node = self.nodes.get((kind, key))
+        if node is not None:
+            # lines of the newly attached nodes are only known after a refresh
+            self.call_after_refresh(self.move_cursor, node)
+
+    @on(Tree.NodeExpanded)
+    def handle_node_expanded(self, event):
+        kind, key = self.node_keys.get(event.node.id, (None, None))
+        if kind not in EXPANDABLE:
+            return
+        self.expanded.add(key)
+        self._ensure_loaded(event.node, kind, key)
+
+    @on(Tree.NodeCollapsed)
+    def handle_node_collapsed(self, event):
+        _, key = self.node_keys.get(event.node.id, (None, None))
+        self.expanded.discard(key)
@@ -26,10 +26,9 @@ class OrganizationWidget(OptionList):
         ]
         return returnlist
 
-    def compose(self):
-        """Compose the organization list"""
-        for org in self._create_organization_items():
-            yield org
+    def on_mount(self):
+        """Populate the organization list"""
+        self.reload()
 
     @on(OptionList.OptionHighlighted)
     def handle_selected(self, event: OptionList.OptionHighlighted) -> None:
@@ -38,7 +37,11 @@ class OrganizationWidget(OptionList):
         self.post_message(self.OrganizationHighlighted(organization))
 
     def reload(self):
-        """Update the organization list"""
+        """Update the organization list, keeping the highlighted organization"""
+        highlighted = self.highlighted_option.id if self.highlighted_option else None
         self.clear_options()
-        for org in self._create_organization_items():
-            self.add_option(org)
+        options = self._create_organization_items()
+        self.add_options(options)
+        for index, option in enumerate(options):
+            if option.id == highlighted:
+                self.highlighted = index
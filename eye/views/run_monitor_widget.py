@@ -0,0 +1,33 @@
+from textual.widgets import DataTable
+
+from eye.monitor import STATE_STYLES, state_name
+
+
+class RunMonitorWidget(DataTable):
+    """Runs followed by the run monitor, updated in place as they progress"""
+
+    def __init__(self, **kwargs):
+        super().__init__(cursor_type="row", **kwargs)
+        self.border_title = "Run monitor"
+
+    def on_mount(self):
+        self.add_column("Run", key="run")
+        self.add_column("Runner", key="runner")
+        self.add_column("Phase", key="phase")
+        self.add_column("State", key="state")
+        self.add_column("Progress", key="progress")
+
+    def apply_updates(self, updates):
+        for key, status in updates:
+            row_key = "/".join(key)
+            if row_key not in self.rows:
+                self.add_row(key[3], key[2], "", "", "", key=row_key)
+            if status is None:
+                continue
+            state = state_name(status.state) or ""
+            style = STATE_STYLES.get(state)
+            self.update_cell(row_key, "phase", status.phase or "")
+            self.update_cell(
+                row_key, "state", f"[{style}]{state}[/]" if style else state
+            )
+            self.update_cell(row_key, "progress", status.progress or "")
@@ -0,0 +1,33 @@
+import asyncio
+from functools import partial
+
+from textual.command import Hit, Provider
+
+KIND_NAMES = {
+    "organizations": "Organization",
+    "workspaces": "Workspace",
+    "solutions": "Solution",
+    "runners": "Runner",
+}
+
+
+class ObjectSearchProvider(Provider):
+    """Command palette entries jumping to the cached platform objects"""
+
+    async def startup(self):
+        # build the index off the event loop, the first search waits for it
+        self.index = self.app.manager.search
+        await asyncio.to_thread(self.index.refresh)
+
+    async def search(self, query):
+        tree = self.screen.objects_widget.object_tree
+        matcher = self.matcher(query)
+        for score, record in await asyncio.to_thread(self.index.search, query):
+            text = f"{record.id} {record.name or ''}"
+            yield Hit(
+                score,
+                matcher.highlight(text),
+                partial(tree.jump_to, record.kind, record.key),
+                text=text,
+                help=f"{KIND_NAMES[record.kind]} in {'/'.join(record.parent) or '/'}",
+            )
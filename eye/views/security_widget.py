@@ -1,9 +1,29 @@
+import logging
+
+from textual import on, work
 from textual.containers import Container
-from textual.widgets import DataTable
+from textual.widgets import Input
+from textual.worker import get_current_worker
+
+from eye.widgets.security_grid import SecurityGrid, SecurityMatrix
+
+logger = logging.getLogger(__name__)
+
+
+def parse_filter(text):
+    """Split a filter into the user part and a `role:<role>` term"""
+    role = None
+    words = []
+    for word in text.split():
+        if word.startswith("role:"):
+            role = word[len("role:") :] or None
+        else:
+            words.append(word)
+    return " ".join(words), role
 
 
 class SecurityWidget(Container):
-    """Security view component that displays user access permissions in a table"""
+    """Security view component that displays user access permissions in a grid"""
 
     def __init__(self, manager, organization, **kwargs):
         super().__init__(**kwargs)
@@ -11,15 +31,44 @@ class SecurityWidget(Container):
         self.organization = organization
 
     def compose(self):
-        self.table = DataTable(id="security-view")
+        self.filter_input = Input(
+            placeholder="Filter users, role:<role> to keep one role",
+            id="security-filter",
+        )
+        self.table = SecurityGrid(id="security-view")
         self.table.border_title = "Security"
-        self.refresh()
+        yield self.filter_input
         yield self.table
 
     def reload(self):
-        print(self.organization)
-        df = self.manager.get_security_dataframe(self.organization)
-        self.table.clear(columns=True)
-        self.table.add_columns("User", *df.columns.tolist())
-        for idx, row in df.iterrows():
-            self.table.add_row(idx, *row.tolist())
+        """Load the matrix of the current organization in the background"""
+        if not self.organization:
+            return
+        if self.manager.security.cached(self.organization) is None:
+            self.table.loading = True
+        self.load_security(self.organization)
+
+    @work(thread=True, exclusive=True, group="security")
+    def load_security(self, organization):
+        """Fetch a matrix, the result is dropped if another load started"""
+        try:
+            matrix = SecurityMatrix(self.manager.get_security_dataframe(organization))
+        # raised by get_organization_security and get_workspace_security
+        except RuntimeError as e:
+            logger.error(e)
+            self.app.call_from_thread(self.notify, str(e), severity="error")
+            matrix = None
+        if not get_current_worker().is_cancelled:
+            self.app.call_from_thread(self.show_matrix, organization, matrix)
+
+    def show_matrix(self, organization, matrix):
+        if organization != self.organization:
+            return
+        self.table.loading = False
+        self.table.show(matrix)
+        if self.filter_input.value:
+            self.table.filter(*parse_filter(self.filter_input.value))
+
+    @on(Input.Changed, "#security-filter")
+    def handle_filter_changed(self, event):
+        self.table.filter(*parse_filter(event.value))
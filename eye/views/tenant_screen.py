@@ -0,0 +1,43 @@
+from typing import ClassVar
+
+from textual import on
+from textual.binding import BindingType
+from textual.screen import ModalScreen
+from textual.widgets import OptionList
+from textual.widgets.option_list import Option
+
+
+class TenantScreen(ModalScreen):
+    """Pick the profile to switch to, dismissed with its name"""
+
+    BINDINGS: ClassVar[list[BindingType]] = [("escape", "dismiss", "Close")]
+
+    def __init__(self, profiles, current, loaded=(), **kwargs):
+        super().__init__(**kwargs)
+        self.profiles = profiles
+        self.current = current
+        # profiles whose data is already in memory
+        self.loaded = loaded
+
+    def compose(self):
+        options = []
+        for profile in self.profiles:
+            label = profile
+            if profile == self.current:
+                label = f"[b]{profile}[/b] (current)"
+            elif profile in self.loaded:
+                label = f"{profile} (loaded)"
+            options.append(Option(label, id=profile))
+        option_list = OptionList(*options, id="tenant-list")
+        option_list.border_title = "Tenants"
+        yield option_list
+
+    def on_mount(self):
+        option_list = self.query_one(OptionList)
+        if self.current in self.profiles:
+            option_list.highlighted = self.profiles.index(self.current)
+        option_list.focus()
+
+    @on(OptionList.OptionSelected)
+    def handle_selected(self, event: OptionList.OptionSelected) -> None:
+        self.dismiss(event.option.id)
@@ -38,14 +38,38 @@ class UserScreen(Screen):
         yield Footer()
 
     def on_mount(self):
+        self.watch(self.app, "connection_status", self.watch_connection_status)
+        self.watch(self.app, "refresh_progress", self.watch_refresh_progress)
+        self.watch(self.app, "data_version", self.refresh_data)
+        self.watch(self.app, "data_refreshed", self.watch_data_refreshed)
+        self.app.data_changed.subscribe(self, self.refresh_data)
+
+    def watch_connection_status(self, connected: bool):
+        self.status_indicator.is_connected = connected
+
+    def watch_refresh_progress(self, progress: tuple):
+        self.status_indicator.progress = progress
+
+    @property
+    def active(self) -> bool:
+        """Whether the screen belongs to the displayed tenant"""
+        return self.manager is self.app.manager
+
+    def watch_data_refreshed(self, refreshed: bool):
+        """Reload the security matrix once a full refresh completed"""
+        if refreshed and self.active:
+            try:
+                self.users_widget.reload()
+            # a failed reload leaves the previous matrix displayed
+            except Exception as e:  # noqa: BLE001
+                logger.error(e)
+
+    def refresh_data(self, data=None):
+        """Refresh the organization list while data streams in"""
+        if not self.active:
+            return
+        logger.info("Refreshing application data")
         try:
-            self.manager.update_summary_data()
-            self.status_indicator.is_connected = True
-            self.refresh_data()
+            self.users_widget.organization_view.reload()
         except Exception as e:
             logger.error(e)
-
-    def refresh_data(self):
-        """Refresh all data and views"""
-        logger.info("Refreshing application data")
-        self.users_widget.reload()
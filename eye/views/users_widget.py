@@ -5,6 +5,9 @@ from textual.widget import Widget
 from eye.views.organization_widget import OrganizationWidget
 from eye.views.security_widget import SecurityWidget
 
+# Delay before loading the security matrix of the highlighted organization
+DEBOUNCE = 0.3
+
 
 class UsersWidget(Widget):
     def __init__(self, manager, **kwargs):
@@ -12,6 +15,7 @@ class UsersWidget(Widget):
         self.manager = manager
         self.organization_view = OrganizationWidget(self.manager)
         self.security_view = SecurityWidget(self.manager, organization=None)
+        self._reload_timer = None
 
     def compose(self):
         """Layout the widgets horizontally"""
@@ -22,10 +26,15 @@ class UsersWidget(Widget):
     @on(OrganizationWidget.OrganizationHighlighted)
     def handle_organization_selected(self, event):
         """Update security view when an organization is selected"""
+        if event.organization == self.security_view.organization:
+            return
         self.security_view.organization = event.organization
-        self.security_view.reload()
+        if self._reload_timer is not None:
+            self._reload_timer.stop()
+        self._reload_timer = self.set_timer(DEBOUNCE, self.security_view.reload)
 
     def reload(self):
         """Reload both widgets"""
         self.organization_view.reload()
-        self.security_view.reload()
+        if self.security_view.organization:
+            self.security_view.reload()
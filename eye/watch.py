@@ -0,0 +1,228 @@
+import logging
+import time
+from datetime import datetime
+
+from rich.console import Console
+from rich.live import Live
+from rich.segment import Segment
+from rich.text import Text
+from rich.tree import Tree
+
+from eye.delta import ADDED, CHANGED, REMOVED
+from eye.monitor import STATE_STYLES, TERMINAL_STATES, state_name
+from eye.scheduler import API_ERRORS
+
+logger = logging.getLogger("back.watch")
+
+DEFAULT_INTERVAL = 10.0
+# Refreshes between two that refetch every listing, catching the workspaces
+# and solutions added to organizations that did not change themselves
+DEFAULT_RESYNC = 10
+# Seconds an added, removed or changed object stays highlighted
+HIGHLIGHT_SECONDS = 30.0
+
+HIGHLIGHT_STYLES = {ADDED: "bold green", REMOVED: "red strike", CHANGED: "bold yellow"}
+MARKS = {ADDED: "+", REMOVED: "-", CHANGED: "~"}
+
+
+def runner_status(runner) -> str | None:
+    info = getattr(runner, "last_run_info", None)
+    return state_name(info.last_run_status) if info else None
+
+
+def active_workspaces(manager) -> set:
+    """Keys of the workspaces with a runner whose last run is not over"""
+    return {
+        key
+        for key, runners in manager.runners.items()
+        if any(
+            status is not None and status not in TERMINAL_STATES
+            for status in map(runner_status, runners)
+        )
+    }
+
+
+class Highlight:
+    def __init__(self, change, expires, previous_status=None):
+        self.change = change
+        self.expires = expires
+        # last run status of a runner before the change, if it changed
+        self.previous_status = previous_status
+
+
+class WatchView:
+    """Rich renderable of the tenant tree, kept up to date from the changes
+    of delta refreshes.
+
+    Each organization branch is rendered once into lines reused by the next
+    refreshes; only the branches holding a change, or a highlight that
+    expired, are rendered again. Removed objects stay displayed, struck
+    through, as long as they are highlighted.
+    """
+
+    def __init__(self, manager, highlight=HIGHLIGHT_SECONDS):
+        self.manager = manager
+        self.highlight = highlight
+        self.highlights = {}
+        self.footer = Text("")
+        # organization id -> (width, rendered lines)
+        self._lines = {}
+        self._statuses = self._runner_statuses()
+
+    def _runner_statuses(self) -> dict:
+        return {
+            (*key, runner.id): runner_status(runner)
+            for key, runners in self.manager.runners.items()
+            for runner in runners
+        }
+
+    def apply(self, changes, now=None):
+        """Highlight the changes of a refresh and mark their branches dirty"""
+        now = time.monotonic() if now is None else now
+        statuses = self._runner_statuses()
+        for change in changes:
+            previous = None
+            if change.kind == "runners" and change.action == CHANGED:
+                previous = self._statuses.get(change.key)
+                if previous == statuses.get(change.key):
+                    previous = None
+            self.highlights[change.key] = Highlight(
+                change, now + self.highlight, previous
+            )
+            self._lines.pop(change.key[0], None)
+        self._statuses = statuses
+
+    def expire(self, now=None) -> bool:
+        """Drop the highlights that are over, returning whether any was"""
+        now = time.monotonic() if now is None else now
+        expired = [key for key, h in self.highlights.items() if h.expires <= now]
+        for key in expired:
+            del self.highlights[key]
+            self._lines.pop(key[0], None)
+        return bool(expired)
+
+    @property
+    def next_expiry(self) -> float | None:
+        return min((h.expires for h in self.highlights.values()), default=None)
+
+    def label(self, obj, key, status=None) -> Text:
+        highlight = self.highlights.get(key)
+        name = f"{obj.id} {obj.name}"
+        text = Text(name)
+        if status:
+            text.append(" ")
+            if highlight and highlight.previous_status:
+                text.append(f"{highlight.previous_status} → ", style="dim")
+            text.append(status, style=STATE_STYLES.get(status, ""))
+        if highlight:
+            action = highlight.change.action
+            text.stylize(HIGHLIGHT_STYLES[action], 0, len(name))
+            text = Text(f"{MARKS[action]} ", style=HIGHLIGHT_STYLES[action]) + text
+        return text
+
+    def _with_removed(self, kind, parent, items):
+        """Listed items followed by the removed ones still highlighted"""
+        items = list(items)
+        for highlight in self.highlights.values():
+            change = highlight.change
+            if (
+                change.action == REMOVED
+                and change.kind == kind
+                and change.parent == parent
+            ):
+                items.append(change.obj)
+        return items
+
+    def branch(self, organization) -> Tree:
+        manager = self.manager
+        org_id = organization.id
+        tree = Tree(self.label(organization, (org_id,)))
+        workspaces = manager.workspaces.get(org_id, [])
+        for workspace in self._with_removed("workspaces", (org_id,), workspaces):
+            key = (org_id, workspace.id)
+            node = tree.add(self.label(workspace, key))
+            runners = manager.runners.get(key, [])
+            for runner in self._with_removed("runners", key, runners):
+                node.add(self.label(runner, (*key, runner.id), runner_status(runner)))
+        solutions = manager.solutions.get(org_id, [])
+        for solution in self._with_removed("solutions", (org_id,), solutions):
+            tree.add(self.label(solution, (org_id, solution.id)))
+        return tree
+
+    def __rich_console__(self, console, options):
+        width = options.max_width
+        organizations = self._with_removed(
+            "organizations", (), self.manager.organizations
+        )
+        shown = set()
+        for organization in organizations:
+            shown.add(organization.id)
+            cached = self._lines.get(organization.id)
+            if cached is None or cached[0] != width:
+                lines = console.render_lines(
+                    self.branch(organization), options, pad=False
+                )
+                cached = self._lines[organization.id] = (width, lines)
+            for line in cached[1]:
+                yield from line
+                yield Segment.line()
+        for org_id in self._lines.keys() - shown:
+            del self._lines[org_id]
+        yield self.footer
+
+
+def watch(manager, interval=DEFAULT_INTERVAL, resync=DEFAULT_RESYNC, console=None):
+    """Display the tree of the tenant, refreshed every `interval` seconds
+    until interrupted.
+
+    Refreshes go through eye.delta: the organizations are listed again, the
+    runners of the workspaces with runs in progress to follow their status,
+    workspaces and solutions of the organizations that changed, and
+    everything every `resync` refreshes.
+    Between refreshes the display is only redrawn when highlights expire,
+    and only the branches that changed are rendered again.
+    """
+    console = console or Console()
+    view = WatchView(manager)
+    refreshes = 0
+    with Live(view, console=console, auto_refresh=False) as live:
+        try:
+            while True:
+                started = time.monotonic()
+                if resync and refreshes % resync == resync - 1:
+                    expanded = set(manager.runners)
+                    expanded.update((org.id,) for org in manager.organizations)
+                else:
+                    expanded = active_workspaces(manager)
+                calls = manager.metrics.calls
+                try:
+                    changes = manager.refresh_changes(expanded)
+                except (RuntimeError, *API_ERRORS) as e:
+                    logger.error(f"Refresh failed: {e}")
+                    changes, failed = [], str(e)
+                else:
+                    failed = None
+                refreshes += 1
+                requests = manager.metrics.calls - calls
+                view.apply(changes)
+                view.footer = footer(changes, requests, manager.crawl_errors, failed)
+                live.refresh()
+                deadline = started + interval
+                while (now := time.monotonic()) < deadline:
+                    next_expiry = view.next_expiry or deadline
+                    time.sleep(max(min(deadline, next_expiry) - now, 0.05))
+                    if view.expire():
+                        live.refresh()
+        except KeyboardInterrupt:
+            pass
+
+
+def footer(changes, requests, errors, failed=None) -> Text:
+    text = Text(f"\nRefreshed at {datetime.now():%X}: ", style="dim")
+    text.append(f"{len(changes)} changes, {requests} requests")
+    if failed:
+        text.append(f", refresh failed: {failed}", style="red")
+    elif errors:
+        text.append(f", {len(errors)} listings failed", style="red")
+    text.append(" - ctrl+c to stop", style="dim")
+    return text
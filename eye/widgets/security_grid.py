@@ -0,0 +1,256 @@
+from typing import TYPE_CHECKING, ClassVar
+
+import numpy as np
+from rich.segment import Segment
+from rich.style import Style
+from textual.binding import Binding, BindingType
+from textual.geometry import Size
+from textual.reactive import reactive
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+USER_WIDTH = 32
+# Sort column of a matrix in DataFrame order, None being the user column
+UNSORTED = object()
+COLUMN_WIDTH = 14
+ROLE_STYLES = {
+    "admin": Style(color="red", bold=True),
+    "editor": Style(color="yellow"),
+    "validator": Style(color="cyan"),
+    "user": Style(color="green"),
+    "viewer": Style(dim=True),
+}
+
+
+def fit(text, width) -> str:
+    text = str(text)
+    if len(text) >= width:
+        return text[: width - 2] + "… "
+    return text.ljust(width)
+
+
+class SecurityMatrix:
+    """Column-oriented copy of a security DataFrame, cheap to sort and filter.
+
+    Roles are factorized into small integer codes stored one array per
+    column (-1 where a user has no role), and the displayed rows are an
+    array of row numbers: sorting and filtering only compute a new `order`.
+    """
+
+    def __init__(self, df: "pd.DataFrame"):
+        import pandas as pd
+
+        self.users = df.index.to_numpy(dtype=object)
+        self.columns = [str(column) for column in df.columns]
+        values = df.to_numpy(dtype=object).ravel(order="F")
+        codes, roles = pd.factorize(values, use_na_sentinel=True)
+        dtype = np.int8 if len(roles) < 127 else np.int32
+        # one row of `codes` per DataFrame column
+        self.codes = codes.astype(dtype).reshape(len(self.columns), len(self.users))
+        self.roles = [str(role) for role in roles]
+        self.order = np.arange(len(self.users))
+        self.sort_column = UNSORTED
+        self.sort_reverse = False
+        self._sorted = self.order
+        self._mask = None
+
+    def __len__(self):
+        return len(self.order)
+
+    def role(self, row, column) -> str | None:
+        code = self.codes[column, self.order[row]]
+        return self.roles[code] if code >= 0 else None
+
+    def user(self, row) -> str:
+        return self.users[self.order[row]]
+
+    def sort(self, column=None, reverse=False):
+        """Sort by a role column, or by user when `column` is None"""
+        if column is None:
+            keys = self.users.astype(str)
+        else:
+            # rank the role codes by role name, users without role last
+            ranks = np.argsort(np.argsort(self.roles)).tolist() + [len(self.roles)]
+            keys = np.asarray(ranks)[self.codes[column]]
+        order = np.argsort(keys, kind="stable")
+        self._sorted = order[::-1] if reverse else order
+        self.sort_column, self.sort_reverse = column, reverse
+        self._apply()
+
+    def filter(self, user="", role=None):
+        """Keep the users containing `user` and holding `role` anywhere"""
+        mask = None
+        if user:
+            import pandas as pd
+
+            mask = (
+                pd.Series(self.users, dtype=str)
+                .str.contains(user, case=False, regex=False)
+                .to_numpy()
+            )
+        if role:
+            code = self.roles.index(role) if role in self.roles else -2
+            has_role = (self.codes == code).any(axis=0)
+            mask = has_role if mask is None else mask & has_role
+        self._mask = mask
+        self._apply()
+
+    def _apply(self):
+        order = self._sorted
+        if self._mask is not None:
+            order = order[self._mask[order]]
+        self.order = order
+
+
+class SecurityGrid(ScrollView, can_focus=True):
+    """Security matrix grid rendering only the visible cells.
+
+    The user column stays on the left and the header on top; the other
+    lines and columns are drawn from a `SecurityMatrix` as they scroll into
+    view, so the cost of a frame does not depend on the matrix size.
+    """
+
+    BINDINGS: ClassVar[list[BindingType]] = [
+        Binding("up", "move(0, -1)", "Up", show=False),
+        Binding("down", "move(0, 1)", "Down", show=False),
+        Binding("left", "move(-1, 0)", "Left", show=False),
+        Binding("right", "move(1, 0)", "Right", show=False),
+        Binding("pageup", "move(0, -20)", "Page up", show=False),
+        Binding("pagedown", "move(0, 20)", "Page down", show=False),
+        Binding("s", "sort", "Sort column"),
+    ]
+    COMPONENT_CLASSES: ClassVar[set[str]] = {
+        "security-grid--header",
+        "security-grid--cursor",
+    }
+    DEFAULT_CSS = """
+    SecurityGrid > .security-grid--header {
+        text-style: bold;
+        background: $panel;
+    }
+    SecurityGrid > .security-grid--cursor {
+        background: $accent;
+    }
+    """
+
+    # cursor column -1 is the user column
+    cursor_row = reactive(0)
+    cursor_column = reactive(-1)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.matrix = None
+
+    def show(self, matrix: SecurityMatrix | None):
+        self.matrix = matrix
+        self.cursor_row, self.cursor_column = 0, -1
+        self.scroll_to(0, 0, animate=False)
+        self._resize()
+
+    def _resize(self):
+        if self.matrix is None:
+            self.virtual_size = Size(0, 0)
+        else:
+            self.virtual_size = Size(
+                USER_WIDTH + len(self.matrix.columns) * COLUMN_WIDTH,
+                len(self.matrix) + 1,
+            )
+        self.refresh()
+
+    def sort(self, column=None, reverse=False):
+        if self.matrix is not None:
+            self.matrix.sort(column, reverse)
+            self.refresh()
+
+    def filter(self, user="", role=None):
+        if self.matrix is not None:
+            self.matrix.filter(user, role)
+            self.cursor_row = 0
+            self.scroll_to(y=0, animate=False)
+            self._resize()
+
+    def action_sort(self):
+        if self.matrix is None:
+            return
+        column = None if self.cursor_column < 0 else self.cursor_column
+        reverse = self.matrix.sort_column == column and not self.matrix.sort_reverse
+        self.sort(column, reverse)
+
+    def action_move(self, columns, rows):
+        if not self.matrix:
+            return
+        self.cursor_row = min(max(self.cursor_row + rows, 0), len(self.matrix) - 1)
+        self.cursor_column = min(
+            max(self.cursor_column + columns, -1), len(self.matrix.columns) - 1
+        )
+        # keep the cursor in view, the header takes the first line
+        height = self.scrollable_content_region.height - 1
+        y = self.scroll_offset.y
+        if self.cursor_row < y:
+            y = self.cursor_row
+        elif self.cursor_row >= y + height:
+            y = self.cursor_row - height + 1
+        x = self.scroll_offset.x
+        if self.cursor_column >= 0:
+            width = self.scrollable_content_region.width - USER_WIDTH
+            left = self.cursor_column * COLUMN_WIDTH
+            if left < x:
+                x = left
+            elif left + COLUMN_WIDTH > x + width:
+                x = left + COLUMN_WIDTH - width
+        self.scroll_to(x, y, animate=False)
+        self.refresh()
+
+    def _visible_columns(self, width):
+        first = self.scroll_offset.x // COLUMN_WIDTH
+        count = max(width - USER_WIDTH, 0) // COLUMN_WIDTH + 1
+        return range(first, min(first + count, len(self.matrix.columns)))
+
+    def render_line(self, y) -> Strip:
+        width = self.scrollable_content_region.width
+        if self.matrix is None:
+            return Strip.blank(width)
+        header = self.get_component_rich_style("security-grid--header")
+        cursor = self.get_component_rich_style("security-grid--cursor")
+        columns = self._visible_columns(width)
+        matrix = self.matrix
+        if y == 0:
+            arrow = " ▼" if matrix.sort_reverse else " ▲"
+            segments = [
+                Segment(
+                    fit(
+                        "User" + (arrow if matrix.sort_column is None else ""),
+                        USER_WIDTH,
+                    ),
+                    header,
+                )
+            ]
+            for column in columns:
+                label = matrix.columns[column]
+                if matrix.sort_column == column:
+                    label = arrow.strip() + label
+                segments.append(Segment(fit(label, COLUMN_WIDTH), header))
+            return Strip(segments).crop(0, width).extend_cell_length(width, header)
+        row = self.scroll_offset.y + y - 1
+        if row >= len(matrix):
+            return Strip.blank(width)
+        on_row = row == self.cursor_row
+        segments = [
+            Segment(
+                fit(matrix.user(row), USER_WIDTH),
+                cursor if on_row and self.cursor_column < 0 else Style(bold=True),
+            )
+        ]
+        for column in columns:
+            role = matrix.role(row, column)
+            style = ROLE_STYLES.get(role, Style())
+            if on_row and column == self.cursor_column:
+                style += cursor
+            segments.append(Segment(fit(role or "·", COLUMN_WIDTH), style))
+        return Strip(segments).crop(0, width).extend_cell_length(width)
+
+    def watch_cursor_row(self):
+        self.refresh()
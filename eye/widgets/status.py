@@ -4,9 +4,23 @@ from textual.widgets import Static
 
 class ConnectionStatus(Static):
     is_connected = reactive(False)
+    progress = reactive((0, 0))
+
+    def _update_status(self) -> None:
+        connected = self.is_connected
+        status = (
+            f"[{'green' if connected else 'red'}]●[/] "
+            f"{'Connected' if connected else 'Disconnected'}"
+        )
+        done, total = self.progress
+        if done < total:
+            status += f" [yellow]refreshing {done}/{total}[/]"
+        self.update(status)
 
     def watch_is_connected(self, connected: bool) -> None:
         """React to connection status changes"""
-        self.update(
-            f"[{'green' if connected else 'red'}]●[/] {'Connected' if connected else 'Disconnected'}"
-        )
+        self._update_status()
+
+    def watch_progress(self, progress: tuple) -> None:
+        """React to refresh progress changes"""
+        self._update_status()
@@ -0,0 +1,58 @@
+from cosmotech_api.models.organization import Organization
+from cosmotech_api.models.runner import Runner
+from cosmotech_api.models.workspace import Workspace
+
+INFO = {"timestamp": 1704067200000, "userId": "user-0"}
+SECURITY = {"default": "none", "accessControlList": []}
+SOLUTION_ID = "sol-demo1234567"
+
+
+def organization(organization_id, name, **fields):
+    return Organization.from_dict(
+        {
+            "id": organization_id,
+            "name": name,
+            "createInfo": INFO,
+            "updateInfo": INFO,
+            "security": SECURITY,
+            **fields,
+        }
+    )
+
+
+def workspace(organization_id, workspace_id, key, name, **fields):
+    return Workspace.from_dict(
+        {
+            "id": workspace_id,
+            "organizationId": organization_id,
+            "key": key,
+            "name": name,
+            "createInfo": INFO,
+            "updateInfo": INFO,
+            "solution": {"solutionId": SOLUTION_ID},
+            "security": SECURITY,
+            **fields,
+        }
+    )
+
+
+def runner(organization_id, workspace_id, runner_id, name, **fields):
+    return Runner.from_dict(
+        {
+            "id": runner_id,
+            "name": name,
+            "organizationId": organization_id,
+            "workspaceId": workspace_id,
+            "solutionId": SOLUTION_ID,
+            "runTemplateId": "standalone",
+            "ownerName": "alice@example.com",
+            "createInfo": INFO,
+            "updateInfo": INFO,
+            "datasets": {"bases": [], "parameter": ""},
+            "parametersValues": [],
+            "lastRunInfo": {"lastRunStatus": "NotStarted"},
+            "validationStatus": "Draft",
+            "security": SECURITY,
+            **fields,
+        }
+    )
@@ -0,0 +1,258 @@
+from types import SimpleNamespace
+
+import pytest
+from factories import SOLUTION_ID, organization, runner, workspace
+
+from eye.bulk import (
+    CREATE,
+    DELETE,
+    DONE,
+    FAILED,
+    SKIPPED,
+    UPDATE,
+    BulkPlan,
+    ManifestError,
+)
+
+ORG = "o-demo000001"
+WS = "w-demo000001"
+
+
+class FakeManager:
+    """Collections of a small tenant, recording the calls of the plan"""
+
+    def __init__(self, failing=()):
+        self.organizations = [organization(ORG, "Demo")]
+        self.workspaces = {ORG: [workspace(ORG, WS, "supply", "Supply Chain")]}
+        self.runners = {
+            (ORG, WS): [
+                runner(ORG, WS, "r-demo000001", "Baseline"),
+                runner(ORG, WS, "r-demo000002", "Peak season"),
+            ]
+        }
+        self.failing = set(failing)
+        self.calls = []
+        self.created = 0
+
+    def __getattr__(self, name):
+        action, _, kind = name.partition("_")
+        if action not in ("create", "update", "delete"):
+            raise AttributeError(name)
+
+        def call(*args):
+            self.calls.append((name, *args))
+            if name in self.failing:
+                raise RuntimeError(f"{name} refused")
+            if action == "create":
+                self.created += 1
+                return SimpleNamespace(id=f"{kind[0]}-new{self.created:07d}")
+
+        return call
+
+
+def actions(plan):
+    return [
+        (operation.action, operation.kind, operation.label)
+        for operation in plan.operations
+    ]
+
+
+def test_matching_by_name_and_key_is_unchanged():
+    manifest = {
+        "organizations": [
+            {
+                "name": "Demo",
+                "workspaces": [
+                    {
+                        "key": "supply",
+                        "name": "Supply Chain",
+                        "runners": [{"name": "Baseline"}],
+                    }
+                ],
+            }
+        ]
+    }
+    assert BulkPlan.from_manifest(FakeManager(), manifest).operations == []
+
+
+def test_matching_by_id_updates_the_changed_fields():
+    manifest = {
+        "organizations": [
+            {
+                "id": ORG,
+                "name": "Renamed",
+                "workspaces": [
+                    {
+                        "key": "supply",
+                        "name": "Supply Chain",
+                        "description": "Weekly plan",
+                        "solution": {"solutionId": SOLUTION_ID},
+                    }
+                ],
+            }
+        ]
+    }
+    plan = BulkPlan.from_manifest(FakeManager(), manifest)
+    organization_update, workspace_update = plan.operations
+    assert organization_update.action == UPDATE
+    assert organization_update.key == (ORG,)
+    assert organization_update.fields == {"name": "Renamed"}
+    # the unchanged name and solution are left out of the request
+    assert workspace_update.action == UPDATE
+    assert workspace_update.key == (ORG, WS)
+    assert workspace_update.fields == {"description": "Weekly plan"}
+
+
+def test_unknown_id():
+    manifest = {"organizations": [{"id": "o-gone000001", "name": "Gone"}]}
+    with pytest.raises(ManifestError, match="ids are given on creation"):
+        BulkPlan.from_manifest(FakeManager(), manifest)
+
+
+def test_ambiguous_name():
+    manager = FakeManager()
+    manager.organizations.append(organization("o-demo000002", "Demo"))
+    with pytest.raises(ManifestError, match="give its id"):
+        BulkPlan.from_manifest(manager, {"organizations": [{"name": "Demo"}]})
+
+
+def test_invalid_create_request():
+    manifest = {"organizations": [{"name": "Demo", "workspaces": [{"key": "new"}]}]}
+    with pytest.raises(ValueError):
+        BulkPlan.from_manifest(FakeManager(), manifest)
+
+
+def test_absent_cascades_to_the_listed_children():
+    manifest = {
+        "organizations": [
+            {
+                "name": "Demo",
+                "state": "absent",
+                "workspaces": [
+                    {"key": "supply", "runners": [{"name": "Baseline"}]},
+                    {"key": "missing"},
+                ],
+            }
+        ]
+    }
+    plan = BulkPlan.from_manifest(FakeManager(), manifest)
+    assert actions(plan) == [
+        (DELETE, "organizations", "Demo"),
+        (DELETE, "workspaces", "supply"),
+        (DELETE, "runners", "Baseline"),
+    ]
+    organization_delete, workspace_delete, runner_delete = plan.operations
+    assert organization_delete.depends == [workspace_delete]
+    assert workspace_delete.depends == [runner_delete]
+    assert runner_delete.key == (ORG, WS, "r-demo000001")
+    assert plan.phases == [[runner_delete], [workspace_delete], [organization_delete]]
+
+
+def test_phases_delete_deepest_first_then_create_shallowest_first():
+    manifest = {
+        "organizations": [
+            {
+                "name": "New",
+                "workspaces": [
+                    {
+                        "key": "plan",
+                        "name": "Plan",
+                        "solution": {"solutionId": SOLUTION_ID},
+                    }
+                ],
+            },
+            {
+                "name": "Demo",
+                "workspaces": [
+                    {
+                        "key": "supply",
+                        "runners": [{"name": "Peak season", "state": "absent"}],
+                    }
+                ],
+            },
+        ]
+    }
+    plan = BulkPlan.from_manifest(FakeManager(), manifest)
+    assert [
+        [(operation.action, operation.label) for operation in phase]
+        for phase in plan.phases
+    ] == [
+        [(DELETE, "Peak season")],
+        [(CREATE, "New")],
+        [(CREATE, "Plan")],
+    ]
+
+
+def test_execute_creates_children_under_the_created_ids():
+    manifest = {
+        "organizations": [
+            {
+                "name": "New",
+                "workspaces": [
+                    {
+                        "key": "plan",
+                        "name": "Plan",
+                        "solution": {"solutionId": SOLUTION_ID},
+                    }
+                ],
+            }
+        ]
+    }
+    manager = FakeManager()
+    plan = BulkPlan.from_manifest(manager, manifest)
+    plan.execute()
+    assert [operation.status for operation in plan.operations] == [DONE, DONE]
+    assert [call[:-1] for call in manager.calls] == [
+        ("create_organization",),
+        ("create_workspace", "o-new0000001"),
+    ]
+    assert plan.touched() == {(), ("o-new0000001",)}
+
+
+def test_execute_skips_the_dependents_of_failed_operations():
+    manifest = {
+        "organizations": [
+            {
+                "name": "New",
+                "workspaces": [
+                    {
+                        "key": "plan",
+                        "name": "Plan",
+                        "solution": {"solutionId": SOLUTION_ID},
+                    }
+                ],
+            },
+            {"name": "Demo", "state": "absent", "workspaces": [{"key": "supply"}]},
+        ]
+    }
+    manager = FakeManager(failing={"create_organization", "delete_workspace"})
+    plan = BulkPlan.from_manifest(manager, manifest)
+    results = []
+    plan.execute(on_result=results.append)
+    statuses = {operation.label: operation.status for operation in plan.operations}
+    assert statuses == {
+        "New": FAILED,
+        "Plan": SKIPPED,
+        "Demo": SKIPPED,
+        "supply": FAILED,
+    }
+    errors = {operation.label: operation.error for operation in plan.operations}
+    assert errors["Plan"] == "create of New failed"
+    assert errors["Demo"] == f"delete of {ORG}/{WS} failed"
+    assert len(results) == 4
+    assert [call[0] for call in manager.calls] == [
+        "delete_workspace",
+        "create_organization",
+    ]
+    assert plan.touched() == set()
+
+
+def test_deletions_of_a_selection():
+    runner_key = (ORG, WS, "r-demo000002")
+    plan = BulkPlan.deletions(
+        FakeManager(), [("organizations", (ORG,)), ("runners", runner_key)]
+    )
+    organization_delete, runner_delete = plan.operations
+    assert organization_delete.depends == [runner_delete]
+    assert runner_delete.key == runner_key
+    assert plan.phases == [[runner_delete], [organization_delete]]
@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+from eye.context import ChatContext, estimate_tokens
+
+
+def text(tokens):
+    """Content estimated at `tokens` tokens, the message overhead included"""
+    return "x" * ((tokens - 4) * 4)
+
+
+def conversation(turns, tokens=10, budget=100):
+    context = ChatContext(budget=budget)
+    for index in range(turns):
+        context.append("user", text(tokens))
+        context.append("assistant", text(tokens))
+    return context
+
+
+def test_estimate_tokens():
+    assert estimate_tokens(text(10)) == 10
+    assert estimate_tokens("") == 4
+
+
+def test_no_compaction_within_budget():
+    context = conversation(5)
+    assert context.tokens == 100
+    assert context.compaction() is None
+
+
+def test_compaction_keeps_recent_turns_within_half_the_budget():
+    context = conversation(6)
+    upto = context.compaction()
+    # 2 turns of 2 messages fill 40 of the 50 tokens kept, a third does not fit
+    assert upto == 8
+    assert context.history[upto]["role"] == "user"
+    context.compact(upto, "Earlier turns")
+    assert context.compaction() is None
+    messages = context.messages()
+    assert messages[0] == {
+        "role": "system",
+        "content": "Summary of the earlier conversation:\nEarlier turns",
+    }
+    assert messages[1:] == context.history[8:]
+    assert context.tokens == estimate_tokens("Earlier turns") + 40
+
+
+def test_compaction_starts_on_a_user_message():
+    context = conversation(6)
+    context.append("assistant", None, tool_calls=[{"id": "call-1"}])
+    context.append("tool", text(10), tool_call_id="call-1")
+    upto = context.compaction()
+    assert context.history[upto]["role"] == "user"
+
+
+def test_oversized_last_message_is_kept_alone():
+    context = conversation(2)
+    context.append("user", text(500))
+    assert context.compaction() == 4
+    context.compact(4, None)
+    assert context.summary is None
+    assert context.messages() == context.history[4:]
+    # nothing older is left to fold, the message is sent as it is
+    assert context.compaction() is None
+
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / "chat" / "default.json"
+    context = conversation(6)
+    context.compact(8, "Earlier turns")
+    context.save(path)
+    assert not path.with_suffix(".tmp").exists()
+    restored = ChatContext(budget=100)
+    assert restored.load(path)
+    assert restored.history == context.history
+    assert (restored.summary, restored.summarized) == ("Earlier turns", 8)
+    assert restored.tokens == context.tokens
+
+
+def test_load_missing_corrupt_or_old(tmp_path):
+    context = conversation(1)
+    assert not context.load(tmp_path / "missing.json")
+    path = tmp_path / "corrupt.json"
+    path.write_text("{", encoding="utf-8")
+    assert not context.load(path)
+    assert context.history == []
+    path.write_text(json.dumps({"version": 0, "history": []}), encoding="utf-8")
+    assert not context.load(path)
+
+
+def test_failed_save_keeps_the_previous_file(tmp_path, monkeypatch):
+    path = tmp_path / "default.json"
+    conversation(1).save(path)
+    saved = path.read_text(encoding="utf-8")
+
+    def dump(*args, **kwargs):
+        raise TypeError("not serializable")
+
+    monkeypatch.setattr("eye.context.json.dump", dump)
+    with pytest.raises(TypeError):
+        conversation(3).save(path)
+    assert path.read_text(encoding="utf-8") == saved
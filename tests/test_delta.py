@@ -0,0 +1,37 @@
+from factories import organization, workspace
+
+from eye.delta import ADDED, CHANGED, REMOVED, diff
+
+
+def test_diff_unchanged_listing():
+    old = [organization("o-demo000001", "Demo")]
+    new = [organization("o-demo000001", "Demo")]
+    assert diff("organizations", (), old, new) == []
+
+
+def test_diff_added_removed_changed():
+    old = [
+        workspace("o-demo000001", "w-demo000001", "kept", "Kept"),
+        workspace("o-demo000001", "w-demo000002", "gone", "Gone"),
+        workspace("o-demo000001", "w-demo000003", "renamed", "Before"),
+    ]
+    new = [
+        workspace("o-demo000001", "w-demo000001", "kept", "Kept"),
+        workspace("o-demo000001", "w-demo000003", "renamed", "After"),
+        workspace("o-demo000001", "w-demo000004", "new", "New"),
+    ]
+    changes = diff("workspaces", ("o-demo000001",), old, new)
+    assert {(change.action, change.obj.id) for change in changes} == {
+        (REMOVED, "w-demo000002"),
+        (CHANGED, "w-demo000003"),
+        (ADDED, "w-demo000004"),
+    }
+    changed = next(change for change in changes if change.action == CHANGED)
+    assert changed.obj.name == "After"
+    assert changed.key == ("o-demo000001", "w-demo000003")
+
+
+def test_diff_listing_never_fetched():
+    new = [organization("o-demo000001", "Demo")]
+    assert [change.action for change in diff("organizations", (), None, new)] == [ADDED]
+    assert [change.action for change in diff("organizations", (), new, [])] == [REMOVED]
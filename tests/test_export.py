@@ -0,0 +1,127 @@
+import csv
+import json
+from types import SimpleNamespace
+
+import pytest
+from factories import organization, workspace
+
+from eye.crawler import CrawlError, CrawlResult
+from eye.export import COLUMNS, Exporter, InventoryExport
+from eye.main import export
+
+ORG = "o-demo000001"
+WS = "w-demo000001"
+
+
+class FakeCrawler:
+    """Crawl of one organization and workspace, the runners failing"""
+
+    max_workers = 2
+
+    def crawl(self, on_result=None, keep=True):
+        on_result("organizations", (), [organization(ORG, "Demo")])
+        on_result("workspaces", (ORG,), [workspace(ORG, WS, "supply", "Supply")])
+        return CrawlResult(errors=[CrawlError("runners", (ORG, WS), "Error 500")])
+
+
+class FakeManager:
+    def __init__(self, failing_acl=False):
+        self.failing_acl = failing_acl
+
+    def connect(self):
+        pass
+
+    def crawler(self):
+        return FakeCrawler()
+
+    def get_organization_security(self, organization_id):
+        if self.failing_acl:
+            raise RuntimeError("Error getting security: 403")
+        return {"alice@example.com": "admin"}
+
+    def get_workspace_security(self, organization_id, workspace_id):
+        return {"bob@example.com": "viewer"}
+
+
+def test_files_are_renamed_on_close(tmp_path):
+    exporter = Exporter(tmp_path, "csv", ["organizations"])
+    exporter.write("organizations", [{"id": ORG, "name": "Demo"}])
+    assert not (tmp_path / "organizations.csv").exists()
+    assert (tmp_path / "organizations.part").exists()
+    exporter.close()
+    assert not (tmp_path / "organizations.part").exists()
+    with open(tmp_path / "organizations.csv", encoding="utf-8") as f:
+        assert list(csv.DictReader(f)) == [
+            {"id": ORG, "name": "Demo", "owner": "", "created_at": ""}
+        ]
+
+
+def test_aborted_export_leaves_no_file(tmp_path):
+    exporter = Exporter(tmp_path, "jsonl", ["organizations", "acl"])
+    exporter.write("organizations", [{"id": ORG}])
+    exporter.close(commit=False)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_jsonl_rows_have_every_column(tmp_path):
+    exporter = Exporter(tmp_path, "jsonl", ["acl"])
+    exporter.write("acl", [{"organization_id": ORG, "user": "a", "role": "admin"}])
+    exporter.close()
+    lines = (tmp_path / "acl.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [list(json.loads(line)) for line in lines] == [COLUMNS["acl"]]
+
+
+def test_inventory_with_acls(tmp_path):
+    exporter = Exporter(tmp_path, "csv")
+    inventory = InventoryExport(FakeManager(), exporter, max_workers=2)
+    FakeCrawler().crawl(on_result=inventory.add)
+    inventory.wait()
+    exporter.close()
+    assert exporter.counts == {
+        "organizations": 1,
+        "workspaces": 1,
+        "solutions": 0,
+        "runners": 0,
+        "acl": 2,
+    }
+    with open(tmp_path / "acl.csv", encoding="utf-8") as f:
+        rows = sorted(csv.DictReader(f), key=lambda row: row["user"])
+    assert [(row["workspace_id"], row["user"], row["role"]) for row in rows] == [
+        ("", "alice@example.com", "admin"),
+        (WS, "bob@example.com", "viewer"),
+    ]
+
+
+def test_failed_acl_is_reported(tmp_path):
+    exporter = Exporter(tmp_path, "csv")
+    inventory = InventoryExport(FakeManager(failing_acl=True), exporter)
+    FakeCrawler().crawl(on_result=inventory.add)
+    inventory.wait()
+    exporter.close()
+    assert [(error.kind, error.key) for error in inventory.errors] == [("acl", (ORG,))]
+    assert exporter.counts["acl"] == 1
+
+
+def test_writer_error_is_raised_by_wait(tmp_path):
+    exporter = Exporter(tmp_path, "csv", ["organizations", "workspaces"])
+    inventory = InventoryExport(FakeManager(), exporter)
+    FakeCrawler().crawl(on_result=inventory.add)
+    # the ACL rows have no file to go to
+    with pytest.raises(KeyError):
+        inventory.wait()
+    exporter.close(commit=False)
+
+
+def test_failed_call_exits_with_1(tmp_path):
+    args = SimpleNamespace(
+        offline=False, no_acl=False, format="csv", export=str(tmp_path)
+    )
+    assert export(FakeManager(), args) == 1
+    # the listings that were fetched are exported all the same
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "acl.csv",
+        "organizations.csv",
+        "runners.csv",
+        "solutions.csv",
+        "workspaces.csv",
+    ]
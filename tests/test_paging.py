@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+from eye.paging import iter_pages, paginate
+
+
+class Listing:
+    """Paged listing call over `count` objects, recording the pages asked"""
+
+    def __init__(self, count, ignores_paging=False):
+        self.objects = [SimpleNamespace(id=f"o-{index:010d}") for index in range(count)]
+        self.ignores_paging = ignores_paging
+        self.pages = []
+
+    def __call__(self, *args, page=0, size=100):
+        self.pages.append(page)
+        if self.ignores_paging:
+            page = 0
+        return self.objects[page * size : (page + 1) * size]
+
+
+def test_short_last_page_ends_the_listing():
+    listing = Listing(25)
+    pages = list(iter_pages(listing, size=10))
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert listing.pages == [0, 1, 2]
+
+
+def test_full_last_page_needs_an_empty_one():
+    listing = Listing(20)
+    assert [len(page) for page in iter_pages(listing, size=10)] == [10, 10]
+    assert listing.pages == [0, 1, 2]
+
+
+def test_repeated_first_page_ends_the_listing():
+    listing = Listing(25, ignores_paging=True)
+    assert [len(page) for page in iter_pages(listing, size=10)] == [10]
+    assert listing.pages == [0, 1]
+
+
+def test_arguments_are_passed_on():
+    calls = []
+
+    def list_runs(*args, **kwargs):
+        calls.append((args, kwargs))
+        return []
+
+    assert list(paginate(list_runs, "o-1", "w-1", size=5, _request_timeout=3)) == []
+    assert calls == [(("o-1", "w-1"), {"page": 0, "size": 5, "_request_timeout": 3})]
+
+
+def test_paginate_yields_the_objects():
+    listing = Listing(25)
+    assert [obj.id for obj in paginate(listing, size=10)] == [
+        obj.id for obj in listing.objects
+    ]
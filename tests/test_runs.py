@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+from eye.runs import RunStore, latest_runs
+
+KEY = ("o-demo000001", "w-demo000001", "r-demo000001")
+
+
+def run(index):
+    return SimpleNamespace(
+        id=f"run-{index:05d}", create_info=SimpleNamespace(timestamp=index)
+    )
+
+
+class Pages:
+    """Paged listing of runs, counting the pages requested"""
+
+    def __init__(self, runs, size):
+        self.runs = runs
+        self.size = size
+        self.requested = 0
+
+    def __iter__(self):
+        for start in range(0, len(self.runs), self.size):
+            self.requested += 1
+            yield self.runs[start : start + self.size]
+
+
+def ids(runs):
+    return [item.id for item in runs]
+
+
+def test_newest_first_listing_stops_paging():
+    pages = Pages([run(index) for index in reversed(range(1000))], size=100)
+    runs = latest_runs(pages, 50)
+    assert ids(runs) == ids(run(index) for index in reversed(range(950, 1000)))
+    assert pages.requested == 2
+
+
+def test_oldest_first_listing_is_read_through():
+    pages = Pages([run(index) for index in range(1000)], size=100)
+    runs = latest_runs(pages, 50)
+    assert ids(runs) == ids(run(index) for index in reversed(range(950, 1000)))
+    assert pages.requested == 10
+
+
+def test_fewer_runs_than_the_limit():
+    runs = latest_runs(Pages([run(2), run(5), run(1)], size=2), 50)
+    assert ids(runs) == ["run-00005", "run-00002", "run-00001"]
+
+
+def test_runs_created_together_keep_their_order():
+    runs = [SimpleNamespace(id=name, create_info=None) for name in "abc"]
+    assert ids(latest_runs([runs], 2)) == ["a", "b"]
+
+
+def test_store_caches_the_latest_runs():
+    pages = Pages([run(index) for index in reversed(range(300))], size=100)
+    manager = SimpleNamespace(iter_run_pages=lambda *key: iter(pages))
+    store = RunStore(manager, limit=10, capacity=1)
+    assert ids(store.load(KEY)) == ids(run(index) for index in range(299, 289, -1))
+    assert store.get(KEY)[0].id == "run-00299"
+    store.load(("o-demo000001", "w-demo000001", "r-demo000002"))
+    assert KEY not in store
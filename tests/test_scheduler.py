@@ -0,0 +1,145 @@
+import time
+
+import pytest
+from cosmotech_api.exceptions import ApiException
+from urllib3.exceptions import ProtocolError
+
+from eye.scheduler import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RequestScheduler,
+    TokenBucket,
+    retry_after,
+)
+
+
+def api_error(status, retry=None):
+    error = ApiException(status=status, reason="Error")
+    error.headers = {"Retry-After": retry} if retry is not None else {}
+    return error
+
+
+class Endpoint:
+    """API method failing with the given errors before answering"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "answer"
+
+
+@pytest.fixture
+def scheduler():
+    return RequestScheduler(
+        rate=1000, burst=1000, max_retries=2, base_delay=0, failure_threshold=10
+    )
+
+
+def test_bucket_burst_then_rate(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("eye.scheduler.time.sleep", sleeps.append)
+    bucket = TokenBucket(rate=10, burst=2)
+    for _ in range(3):
+        bucket.acquire()
+    assert len(sleeps) == 1
+    assert sleeps[0] == pytest.approx(0.1, abs=0.01)
+
+
+def test_retry_after():
+    assert retry_after(api_error(503, "2")) == 2.0
+    assert retry_after(api_error(503, "soon")) is None
+    assert retry_after(api_error(503)) is None
+
+
+def test_idempotent_calls_are_retried(scheduler):
+    endpoint = Endpoint(api_error(502), ProtocolError("reset"))
+    assert scheduler.hook(endpoint, "OrganizationApi.list_organizations") == "answer"
+    assert endpoint.calls == 3
+    assert scheduler.breaker.failures == 0
+
+
+def test_retries_are_bounded(scheduler):
+    endpoint = Endpoint(*[api_error(502)] * 5)
+    with pytest.raises(ApiException):
+        scheduler.hook(endpoint, "OrganizationApi.list_organizations")
+    assert endpoint.calls == 3
+
+
+def test_client_errors_are_not_retried(scheduler):
+    endpoint = Endpoint(api_error(404))
+    with pytest.raises(ApiException):
+        scheduler.hook(endpoint, "OrganizationApi.get_organization")
+    assert endpoint.calls == 1
+    assert scheduler.breaker.state == "closed"
+
+
+def test_creates_only_retried_when_rejected(scheduler):
+    endpoint = Endpoint(ProtocolError("timed out"))
+    with pytest.raises(ProtocolError):
+        scheduler.hook(endpoint, "RunnerApi.create_runner")
+    assert endpoint.calls == 1
+    endpoint = Endpoint(api_error(503))
+    with pytest.raises(ApiException):
+        scheduler.hook(endpoint, "RunnerApi.create_runner")
+    assert endpoint.calls == 1
+    endpoint = Endpoint(api_error(503, "0"))
+    assert scheduler.hook(endpoint, "RunnerApi.create_runner") == "answer"
+    assert endpoint.calls == 2
+
+
+def test_breaker_opens_after_the_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.failure()
+    assert breaker.state == "closed"
+    breaker.failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before("OrganizationApi.list_organizations")
+
+
+def test_breaker_single_trial_when_half_open():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.failure()
+    assert breaker.state == "half-open"
+    breaker.before("OrganizationApi.list_organizations")
+    with pytest.raises(CircuitOpenError):
+        breaker.before("OrganizationApi.list_organizations")
+    breaker.success()
+    assert breaker.state == "closed"
+    breaker.before("OrganizationApi.list_organizations")
+
+
+def test_breaker_failed_trial_opens_again():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.failure()
+    breaker.opened_at = time.monotonic() - 60
+    breaker.before("OrganizationApi.list_organizations")
+    breaker.failure()
+    assert breaker.state == "open"
+
+
+def test_unexpected_error_releases_the_trial(scheduler):
+    scheduler.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    scheduler.breaker.failure()
+    endpoint = Endpoint(TypeError("unexpected payload"))
+    with pytest.raises(TypeError):
+        scheduler.hook(endpoint, "OrganizationApi.list_organizations")
+    assert scheduler.hook(endpoint, "OrganizationApi.list_organizations") == "answer"
+    assert scheduler.breaker.state == "closed"
+
+
+def test_open_breaker_stops_the_retries(scheduler):
+    endpoint = Endpoint(*[api_error(502)] * 5)
+    scheduler.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    scheduler.max_retries = 5
+    with pytest.raises(ApiException):
+        scheduler.hook(endpoint, "OrganizationApi.list_organizations")
+    assert endpoint.calls == 2
+    with pytest.raises(CircuitOpenError):
+        scheduler.hook(endpoint, "OrganizationApi.list_organizations")
+    assert endpoint.calls == 2
@@ -0,0 +1,77 @@
+import pytest
+from factories import organization, runner, workspace
+
+from eye.search import SearchIndex
+from eye.store import ObjectStore
+
+
+@pytest.fixture
+def store():
+    store = ObjectStore()
+    store.set_listing(
+        "organizations",
+        (),
+        [
+            organization("o-demo000001", "Demo"),
+            organization("o-prod000001", "Production"),
+        ],
+    )
+    store.set_listing(
+        "workspaces",
+        "o-demo000001",
+        [workspace("o-demo000001", "w-demo000001", "supply", "Supply Chain")],
+    )
+    store.set_listing(
+        "runners",
+        ("o-demo000001", "w-demo000001"),
+        [
+            runner("o-demo000001", "w-demo000001", "r-demo000001", "Baseline"),
+            runner("o-demo000001", "w-demo000001", "r-demo000002", "Peak season"),
+        ],
+    )
+    return store
+
+
+def ids(matches):
+    return [record.id for _, record in matches]
+
+
+def test_exact_name_first(store):
+    matches = SearchIndex(store).search("Demo")
+    assert matches[0][0] == 1.0
+    assert ids(matches)[0] == "o-demo000001"
+
+
+def test_short_query_matches_prefixes(store):
+    index = SearchIndex(store)
+    assert set(ids(index.search("pe"))) == {"r-demo000002"}
+    assert set(ids(index.search("r-"))) == {"r-demo000001", "r-demo000002"}
+
+
+def test_name_words_and_partial_ids(store):
+    index = SearchIndex(store)
+    assert ids(index.search("chain")) == ["w-demo000001"]
+    score, record = index.search("demo000002")[0]
+    assert (score, record.id) == (0.8, "r-demo000002")
+
+
+def test_typos(store):
+    assert ids(SearchIndex(store).search("Basline"))[0] == "r-demo000001"
+
+
+def test_limit(store):
+    assert len(SearchIndex(store).search("demo", limit=2)) == 2
+
+
+def test_rebuilt_after_store_change(store):
+    index = SearchIndex(store)
+    assert index.search("Forecast") == []
+    store.runners["o-demo000001", "w-demo000001"] = [
+        runner("o-demo000001", "w-demo000001", "r-demo000003", "Forecast"),
+    ]
+    assert ids(index.search("Forecast")) == ["r-demo000003"]
+    assert index.search("Baseline") == []
+
+
+def test_blank_query(store):
+    assert SearchIndex(store).search("  ") == []
@@ -0,0 +1,98 @@
+import threading
+
+from factories import organization, runner, workspace
+
+from eye.store import ObjectStore
+
+ORG = "o-demo000001"
+WS = "w-demo000001"
+
+
+def workspaces(count):
+    return [
+        workspace(ORG, f"w-demo{index:06d}", f"key{index}", f"Workspace {index}")
+        for index in range(count)
+    ]
+
+
+def filled_store():
+    store = ObjectStore()
+    store.set_listing("organizations", (), [organization(ORG, "Demo")])
+    store.replace("workspaces", {ORG: workspaces(3)})
+    store.replace(
+        "runners",
+        {(ORG, WS): [runner(ORG, WS, "r-demo000001", "Baseline")]},
+    )
+    return store
+
+
+def test_get_and_record():
+    store = filled_store()
+    listed = store.runners[ORG, WS][0]
+    assert store.get("r-demo000001") is listed
+    assert store.record("r-demo000001").key == (ORG, WS, "r-demo000001")
+    assert store.parent("r-demo000001").id == WS
+    assert [record.id for record in store.children(WS)] == ["r-demo000001"]
+    assert store.get("r-unknown001") is None
+
+
+def test_replace_drops_the_objects_no_longer_listed():
+    store = filled_store()
+    store.replace("workspaces", {ORG: workspaces(2)})
+    assert store.get("w-demo000002") is None
+    assert store.record("w-demo000002") is None
+    assert {record.id for record in store.find(kind="workspaces")} == {
+        "w-demo000000",
+        "w-demo000001",
+    }
+    store.replace("workspaces", {})
+    assert ORG not in store.workspaces
+    assert store.find(kind="workspaces") == []
+
+
+def test_dropped_listing():
+    store = filled_store()
+    del store.runners[ORG, WS]
+    assert store.get("r-demo000001") is None
+    assert store.find(owner="alice@example.com") == []
+
+
+def test_growing_listing():
+    store = ObjectStore()
+    organizations = [organization(ORG, "Demo")]
+    store.set_listing("organizations", (), organizations)
+    organizations.append(organization("o-demo000002", "Second"))
+    store.set_listing("organizations", (), organizations)
+    assert store.get("o-demo000002") is organizations[1]
+    assert len(store) == 2
+
+
+def test_reindex():
+    store = filled_store()
+    store.get("r-demo000001").owner_name = "bob@example.com"
+    store.reindex("r-demo000001")
+    assert [record.id for record in store.find(owner="bob@example.com")] == [
+        "r-demo000001"
+    ]
+    assert store.find(owner="alice@example.com") == []
+
+
+def test_readers_see_every_listing_during_replace():
+    store = filled_store()
+    done = threading.Event()
+    misses = []
+
+    def read():
+        while not done.is_set():
+            if ORG not in store.workspaces or store.get("w-demo000001") is None:
+                misses.append(1)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for _ in range(2000):
+            store.replace("workspaces", {ORG: workspaces(3)})
+    finally:
+        done.set()
+        reader.join()
+    assert misses == []